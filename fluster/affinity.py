@@ -0,0 +1,102 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import re
+from typing import List, Optional
+
+NODE_DIR = "/sys/devices/system/node"
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    """Parse a list of CPUs in the format used by the kernel, such as 0-3,8-11"""
+    cpus: List[int] = []
+    for item in cpu_list.strip().split(","):
+        if not item:
+            continue
+        first, _, last = item.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def is_affinity_available() -> bool:
+    """Whether the processes can be pinned to a set of CPUs (Linux only)"""
+    return hasattr(os, "sched_getaffinity") and hasattr(os, "sched_setaffinity")
+
+
+def numa_nodes() -> List[List[int]]:
+    """CPUs this process is allowed to run on, grouped by NUMA node.
+
+    Everything is a single node when the topology isn't available.
+    """
+    allowed = sorted(os.sched_getaffinity(0))
+    nodes: List[List[int]] = []
+    try:
+        node_ids = sorted(int(entry[4:]) for entry in os.listdir(NODE_DIR) if re.fullmatch(r"node\d+", entry))
+        for node_id in node_ids:
+            with open(os.path.join(NODE_DIR, f"node{node_id}", "cpulist"), encoding="utf-8") as cpulist_file:
+                node = [cpu for cpu in parse_cpu_list(cpulist_file.read()) if cpu in allowed]
+            if node:
+                nodes.append(node)
+    except (OSError, ValueError):
+        nodes = []
+    placed = {cpu for node in nodes for cpu in node}
+    if not nodes or len(placed) != len(allowed):
+        return [allowed]
+    return nodes
+
+
+class CpuSlots:
+    """Dedicated sets of CPUs for the jobs of a run, so that every test runs pinned to its own cores.
+
+    The CPUs are split in as many slots of the same size as jobs, each slot
+    within a single NUMA node whenever it fits, so that a decoder doesn't
+    migrate across sockets and keeps its caches warm. With more jobs than
+    CPUs every slot gets one, shared among several jobs.
+    """
+
+    def __init__(self, jobs: int, nodes: Optional[List[List[int]]] = None):
+        if nodes is None:
+            nodes = numa_nodes()
+        cpus_count = sum(len(node) for node in nodes)
+        self.cpus_per_job = max(1, cpus_count // jobs)
+        self.slots: List[List[int]] = []
+        leftovers: List[int] = []
+        for node in nodes:
+            cpus = list(node)
+            while len(cpus) >= self.cpus_per_job and len(self.slots) < jobs:
+                self.slots.append(cpus[: self.cpus_per_job])
+                cpus = cpus[self.cpus_per_job :]
+            leftovers.extend(cpus)
+        # The CPUs left in every node make up the slots that don't fit in any of them
+        while len(leftovers) >= self.cpus_per_job and len(self.slots) < jobs:
+            self.slots.append(leftovers[: self.cpus_per_job])
+            leftovers = leftovers[self.cpus_per_job :]
+        placed = len(self.slots)
+        self.slots.extend(self.slots[index % placed] for index in range(placed, jobs))
+        self._free = list(range(jobs))
+
+    def acquire(self) -> List[int]:
+        """Take the first free slot"""
+        return self.slots[self._free.pop(0)]
+
+    def release(self, cpus: List[int]) -> None:
+        """Give back a slot taken with acquire"""
+        for index, slot in enumerate(self.slots):
+            if slot == cpus and index not in self._free:
+                self._free.append(index)
+                self._free.sort()
+                return
@@ -0,0 +1,115 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from fluster.decoder import Decoder
+from fluster.test_vector import TestVector
+
+CACHE_VERSION = 1
+# Size in MiB of the entries kept in the cache by default
+DEFAULT_CACHE_SIZE = 64
+
+
+class ResultCache:
+    """Checksums produced by the decoders, keyed by the decoder and input they were produced from.
+
+    The key covers the fingerprint of the decoder and the test vector, with
+    its source, output format and parameters, so a test vector is decoded
+    again as soon as any of them changes. Every entry is a small file named
+    after its key, written atomically, so that the tests can share the cache
+    from several processes. The least recently used entries are evicted once
+    the cache grows beyond max_size.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_CACHE_SIZE * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        # decoder name -> fingerprint, computed once per run
+        self.fingerprints: Dict[str, str] = {}
+
+    def fingerprint(self, decoder: Decoder) -> str:
+        if decoder.name not in self.fingerprints:
+            self.fingerprints[decoder.name] = decoder.fingerprint()
+        return self.fingerprints[decoder.name]
+
+    def _path(self, decoder: Decoder, test_suite: str, test_vector: TestVector) -> str:
+        key_data = {
+            "version": CACHE_VERSION,
+            "decoder": decoder.name,
+            "fingerprint": self.fingerprint(decoder),
+            "test_suite": test_suite,
+            "test_vector": test_vector.name,
+            "source_checksum": test_vector.source_checksum,
+            "input_file": test_vector.input_file,
+            "output_format": test_vector.output_format.value,
+            "optional_params": test_vector.optional_params,
+        }
+        key = hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, decoder: Decoder, test_suite: str, test_vector: TestVector) -> Optional[Tuple[str, float]]:
+        """Return the checksum and decode time stored for the test vector, if any"""
+        path = self._path(decoder, test_suite, test_vector)
+        try:
+            with open(path, encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+            # Mark the entry as recently used
+            os.utime(path)
+            return entry["result"], entry["time"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, decoder: Decoder, test_suite: str, test_vector: TestVector, result: str, test_time: float) -> None:
+        """Store the checksum produced for the test vector and how long it took"""
+        path = self._path(decoder, test_suite, test_vector)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path), delete=False) as f:
+                json.dump({"result": result, "time": test_time}, f)
+            os.replace(f.name, path)
+        except OSError:
+            # The cache is only an optimization, the test result is still valid
+            pass
+
+    def evict(self) -> int:
+        """Remove the least recently used entries while the cache is over its size, returning how many"""
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            evicted += 1
+        return evicted
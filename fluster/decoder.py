@@ -15,13 +15,16 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library. If not, see <https://www.gnu.org/licenses/>.
 
+import copy
+import os
 from abc import ABC, abstractmethod
+from enum import Enum
 from functools import lru_cache
 from shutil import which
 from typing import Any, Dict, List, Optional, Type
 
 from fluster.codec import Codec, OutputFormat
-from fluster.utils import normalize_binary_cmd
+from fluster.utils import file_fingerprint, normalize_binary_cmd
 
 
 class NotSupportedError(Exception):
@@ -32,6 +35,13 @@ class NotSupportedError(Exception):
         super().__init__(self.message)
 
 
+class ConcurrencyClass(Enum):
+    """Resource that limits how many instances of a decoder can run at the same time"""
+
+    SOFTWARE = "software"  # CPU cores
+    HARDWARE = "hardware"  # fixed-function engine or driver queue, shared by all HW decoders
+
+
 class Decoder(ABC):
     """Base class for decoders"""
 
@@ -41,10 +51,18 @@ class Decoder(ABC):
     description = ""
     binary = ""
     is_reference = False
+    concurrency_class = ConcurrencyClass.SOFTWARE
+    max_jobs: Optional[int] = None  # maximum number of instances running at the same time
+    device: Optional[str] = None  # device the decoder is bound to, None for the default one
+    cpus: Optional[List[int]] = None  # CPUs the decoder is pinned to, None for all of them
+    thread_count: Optional[int] = None  # threads the decoder runs with, 0 for its default, None when it can't be set
+    sequential_output = False  # whether the output is written once from start to end, so it can be a named pipe
 
     def __init__(self) -> None:
         if self.binary:
             self.binary = normalize_binary_cmd(self.binary)
+        if self.hw_acceleration:
+            self.concurrency_class = ConcurrencyClass.HARDWARE
 
     @abstractmethod
     def decode(
@@ -74,6 +92,51 @@ class Decoder(ABC):
                 return False
         return True
 
+    def fingerprint(self) -> str:
+        """Returns a stable identity of the implementation being tested, which changes whenever it is updated.
+
+        It is made of the name of the decoder and the resolved path, size,
+        modification time and checksum of its binary. Decoders loading the
+        implementation from elsewhere add the versions they find. The
+        expensive parts are computed once for the whole run.
+        """
+        fingerprint = self.name
+        path = which(self.binary) if self.binary else None
+        if path:
+            try:
+                fingerprint += f":{file_fingerprint(path)}"
+            except OSError:
+                pass
+        return fingerprint
+
+    def build_files(self) -> List[str]:
+        """Returns the files the implementation being tested is loaded from, which change whenever it is rebuilt"""
+        path = which(self.binary) if self.binary else None
+        return [os.path.realpath(path)] if path else []
+
+    def devices(self) -> List[str]:
+        """Returns the devices the decoder can be bound to, so that jobs can be spread among them"""
+        return []
+
+    def with_device(self, device: str) -> "Decoder":
+        """Returns a copy of the decoder bound to one of its devices"""
+        decoder = copy.copy(self)
+        decoder.device = device
+        return decoder
+
+    def with_cpus(self, cpus: List[int]) -> "Decoder":
+        """Returns a copy of the decoder pinned to a set of CPUs, running as many threads as CPUs if it can"""
+        decoder = self.with_threads(len(cpus))
+        decoder.cpus = cpus
+        return decoder
+
+    def with_threads(self, count: int) -> "Decoder":
+        """Returns a copy of the decoder running a number of threads if it can"""
+        decoder = copy.copy(self)
+        if decoder.thread_count is not None:
+            decoder.thread_count = count
+        return decoder
+
     def __str__(self) -> str:
         return f"    {self.name}: {self.description}"
 
@@ -29,7 +29,8 @@ class AV1AOMDecoder(Decoder):
     description = "libaom AV1 reference decoder"
     binary = "aomdec"
     codec = Codec.AV1
-    annexb = False
+    sequential_output = True
+    thread_count = 0
 
     def decode(
         self,
@@ -43,10 +44,13 @@ class AV1AOMDecoder(Decoder):
     ) -> str:
         """Decodes input_filepath in output_filepath"""
         fmt = "--rawvideo"
+        # Test vectors stored in Annex B format instead of Section 5 OBUs say so in their parameters
+        annexb = bool(optional_params and optional_params.get("annexb"))
 
         cmd = [
             self.binary,
-            "--annexb" if self.annexb else "",
+            "--annexb" if annexb else "",
+            f"--threads={self.thread_count}" if self.thread_count else "",
             fmt,
             input_filepath,
             "-o",
@@ -29,6 +29,8 @@ class AV1Dav1dDecoder(Decoder):
     description = "dav1d AV1 decoder"
     binary = "dav1d"
     codec = Codec.AV1
+    sequential_output = True
+    thread_count = 0
 
     def decode(
         self,
@@ -42,18 +44,21 @@ class AV1Dav1dDecoder(Decoder):
     ) -> str:
         """Decodes input_filepath in output_filepath"""
         fmt = "yuv"
+        command = [
+            self.binary,
+            "--alllayers",
+            "0",
+            "--muxer",
+            fmt,
+            "-i",
+            input_filepath,
+            "-o",
+            output_filepath,
+        ]
+        if self.thread_count:
+            command.extend(["--threads", str(self.thread_count)])
         run_command(
-            [
-                self.binary,
-                "--alllayers",
-                "0",
-                "--muxer",
-                fmt,
-                "-i",
-                input_filepath,
-                "-o",
-                output_filepath,
-            ],
+            command,
             timeout=timeout,
             verbose=verbose,
         )
@@ -25,6 +25,7 @@ class CrosCodecsDecoder(Decoder):
     """Generic class for cros-codecs decoder"""
 
     binary = "ccdec"
+    sequential_output = True
 
     def __init__(self) -> None:
         super().__init__()
@@ -16,13 +16,16 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library. If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
 import re
 import subprocess
 from functools import lru_cache
-from typing import Any, Dict, Optional, Tuple
+from shutil import which
+from typing import Any, Dict, List, Optional, Tuple
 
 from fluster.codec import Codec, OutputFormat
 from fluster.decoder import Decoder, register_decoder
+from fluster.system_info import SystemInfo
 from fluster.utils import file_checksum, run_command_with_output
 
 
@@ -85,6 +88,8 @@ class FFmpegDecoder(Decoder):
                 command.extend(["-init_hw_device", self.init_hw_device])
             if not self.wrapper:
                 command.extend(["-hwaccel", self.api.lower()])
+                if self.device:
+                    command.extend(["-hwaccel_device", self.device])
             if self.hw_output_format:
                 command.extend(["-hwaccel_output_format", self.hw_output_format])
                 if self.wrapper:
@@ -192,6 +197,15 @@ class FFmpegDecoder(Decoder):
         api = re.escape(self.api.lower())
         return re.search(rf"\s+{api}\s+", output) is not None
 
+    def fingerprint(self) -> str:
+        """Adds the version of ffmpeg and a digest of the libraries and configuration it reports"""
+        if which(self.binary) is None:
+            return super().fingerprint()
+        output = _run_ffmpeg_command(self.binary, "-version")
+        version = re.search(r" version (\S+)", output)
+        digest = hashlib.md5(output.encode("utf-8")).hexdigest()
+        return f"{super().fingerprint()}:{version.group(1) if version else ''}:{digest}"
+
 
 @register_decoder
 class FFmpegH264Decoder(FFmpegDecoder):
@@ -248,6 +262,11 @@ class FFmpegVaapiDecoder(FFmpegDecoder):
     hw_acceleration = True
     api = "VAAPI"
 
+    @lru_cache(maxsize=128)
+    def devices(self) -> List[str]:
+        """Returns the DRM render nodes to spread the jobs among them"""
+        return SystemInfo.get_render_nodes()
+
 
 @register_decoder
 class FFmpegH264VaapiDecoder(FFmpegVaapiDecoder):
@@ -17,17 +17,20 @@
 # License along with this library. If not, see <https://www.gnu.org/licenses/>.
 
 
+import hashlib
 import os
 import shlex
 import subprocess
 from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, cast
 
 from fluster.codec import Codec, OutputFormat
-from fluster.decoder import Decoder, register_decoder
+from fluster.decoder import ConcurrencyClass, Decoder, register_decoder
 from fluster.decoders.dolby_pad import EAC3_CHANNELS_LAYOUT_TO_SPEAKER_CONFIG
+from fluster.system_info import SystemInfo
 from fluster.utils import (
     file_checksum,
+    file_fingerprint,
     normalize_binary_cmd,
     run_command,
     run_command_with_output,
@@ -35,6 +38,26 @@ from fluster.utils import (
 
 PIPELINE_TPL = "{} --no-fault filesrc location={} ! {} ! {} ! {} ! {} {}"
 
+# APIs of the decoders that run on a fixed-function engine instead of the CPU
+HW_APIS = (
+    "VA",
+    "VAAPI",
+    "VDPAU",
+    "NVDEC",
+    "NVDECSL",
+    "V4L2",
+    "V4L2SL",
+    "Vulkan",
+    "D3D11",
+    "D3D12",
+    "DXVA2",
+    "MSDK",
+    "QSV",
+    "VT",
+    "VDA",
+    "HW",
+)
+
 
 @lru_cache(maxsize=None)
 def _videocodectestsink_supports_format(gst_fmt: str) -> bool:
@@ -73,6 +96,57 @@ def gst_element_exists(element: str) -> bool:
         return False
 
 
+@lru_cache(maxsize=None)
+def gst_version(cmd: str) -> str:
+    """Version of GStreamer that runs the pipelines"""
+    try:
+        output = run_command_with_output([cmd, "--version"])
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        return ""
+    lines = output.strip().splitlines()
+    return lines[-1].strip() if lines else ""
+
+
+@lru_cache(maxsize=None)
+def gst_plugin_details(element: str) -> Dict[str, str]:
+    """Details of the plugin an element belongs to, as found in the registry"""
+    inspect_exe = normalize_binary_cmd("gst-inspect-1.0")
+    try:
+        output = run_command_with_output([inspect_exe, element])
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        return {}
+
+    # Plugin Details:
+    #   Name                     libav
+    #   Filename                 /usr/lib/x86_64-linux-gnu/gstreamer-1.0/libgstlibav.so
+    #   Version                  1.22.0
+    #   ...
+    details: Dict[str, str] = {}
+    in_plugin_details = False
+    for line in output.splitlines():
+        if line.startswith("Plugin Details:"):
+            in_plugin_details = True
+        elif in_plugin_details:
+            if not line.strip():
+                break
+            key, _, value = line.strip().partition("  ")
+            details[key] = value.strip()
+    return details
+
+
+def gst_element_fingerprint(element: str) -> str:
+    """Identity of the implementation of an element from the plugin details in the registry"""
+    details = gst_plugin_details(element)
+    if not details:
+        return ""
+    digest = hashlib.md5(str(sorted(details.items())).encode("utf-8")).hexdigest()
+    fingerprint = f"{details.get('Version', '')}:{digest}"
+    filename = details.get("Filename")
+    if filename and os.path.isfile(filename):
+        fingerprint += f":{file_fingerprint(filename)}"
+    return fingerprint
+
+
 def output_format_to_gst(output_format: OutputFormat) -> str:
     """Return GStreamer pixel format"""
     mapping = {
@@ -109,6 +183,7 @@ class GStreamer(Decoder):
     provider = "GStreamer"
     sink = "filesink"
     parser = "parsebin"
+    sequential_output = True
 
     def __init__(self) -> None:
         super().__init__()
@@ -116,6 +191,9 @@ class GStreamer(Decoder):
             self.name = f"{self.provider}-{self.codec.value}-{self.api}"
         self.description = f"{self.provider} {self.codec.value} {self.api} decoder for GStreamer"
         self.cmd = normalize_binary_cmd(self.cmd)
+        if self.api in HW_APIS:
+            self.concurrency_class = ConcurrencyClass.HARDWARE
+        self._device_elements: Dict[str, str] = {}
 
         if not gst_element_exists(self.sink):
             self.sink = "filesink"
@@ -139,6 +217,34 @@ class GStreamer(Decoder):
             output,
         )
 
+    @lru_cache(maxsize=128)
+    def devices(self) -> List[str]:
+        """Returns the devices with a decoder element of their own, so that jobs can be spread among them"""
+        element = self.decoder_bin.strip()
+        if self.api == "VA" and element.startswith("va"):
+            nodes = SystemInfo.get_render_nodes()
+            elements = {node: f"va{os.path.basename(node)}{element[2:]}" for node in nodes}
+        elif self.api == "V4L2" and element.startswith("v4l2"):
+            nodes = SystemInfo.get_v4l2_m2m_decoder_nodes()
+            elements = {node: f"v4l2{os.path.basename(node)}{element[4:]}" for node in nodes}
+        else:
+            return []
+
+        # The element of the first device is registered with the plain name
+        # and the ones of the rest of devices are named after their node
+        elements = {node: name for node, name in elements.items() if gst_element_exists(name)}
+        first_nodes = [node for node in nodes if node not in elements]
+        if not elements or not first_nodes:
+            return []
+        self._device_elements = {first_nodes[0]: element, **elements}
+        return list(self._device_elements)
+
+    def with_device(self, device: str) -> Decoder:
+        """Returns a copy of the decoder using the element of one of its devices"""
+        decoder = cast(GStreamer, super().with_device(device))
+        decoder.decoder_bin = f" {self._device_elements[device]} "
+        return decoder
+
     def _get_sink_for_format(self, output_format: OutputFormat) -> str:  # pylint: disable=unused-argument
         return self.sink
 
@@ -187,6 +293,24 @@ class GStreamer(Decoder):
         run_command(shlex.split(pipeline), timeout=timeout, verbose=verbose)
         return file_checksum(output_filepath)
 
+    def fingerprint(self) -> str:
+        """Adds the version of GStreamer and the plugin details of the decoder elements"""
+        fingerprint = f"{super().fingerprint()}:{gst_version(self.cmd)}"
+        for element in self.decoder_bin.split("!"):
+            if element.strip():
+                fingerprint += f":{gst_element_fingerprint(element.split()[0])}"
+        return fingerprint
+
+    def build_files(self) -> List[str]:
+        """Adds the plugins the decoder elements are loaded from"""
+        files = super().build_files()
+        for element in self.decoder_bin.split("!"):
+            if element.strip():
+                filename = gst_plugin_details(element.split()[0]).get("Filename")
+                if filename and filename not in files:
+                    files.append(filename)
+        return files
+
     @lru_cache(maxsize=128)
     def check(self, verbose: bool) -> bool:
         """Check if GStreamer decoder is valid (better than gst-inspect)"""
@@ -15,12 +15,11 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library. If not, see <https://www.gnu.org/licenses/>.
 import os
-import subprocess
 from typing import Any, Dict, Optional, Tuple
 
 from fluster.codec import Codec, OutputFormat
 from fluster.decoder import Decoder, register_decoder
-from fluster.utils import normalize_binary_cmd, run_command
+from fluster.utils import normalize_binary_cmd, run_command, run_command_with_output
 
 
 @register_decoder
@@ -74,8 +73,7 @@ class ISOMPEG4VDecoder(Decoder):
             input_filepath,
         ]
 
-        result = subprocess.run(command, capture_output=True, text=True, timeout=30, check=True)
-        result_lines = result.stdout.strip().splitlines()
+        result_lines = run_command_with_output(command, timeout=30).strip().splitlines()
 
         if len(result_lines) < 2:
             raise ValueError("ffprobe returned insufficient output")
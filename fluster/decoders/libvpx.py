@@ -29,6 +29,8 @@ class VPXDecoder(Decoder):
     description = ""
     binary = "vpxdec"
     codec = Codec.NONE
+    sequential_output = True
+    thread_count = 0
 
     def __init__(self) -> None:
         super().__init__()
@@ -52,8 +54,11 @@ class VPXDecoder(Decoder):
         else:
             fmt = "--rawvideo"
 
+        command = [self.binary, fmt]
+        if self.thread_count:
+            command.append(f"--threads={self.thread_count}")
         run_command(
-            [self.binary, fmt, input_filepath, "-o", output_filepath],
+            command + [input_filepath, "-o", output_filepath],
             timeout=timeout,
             verbose=verbose,
         )
@@ -18,7 +18,7 @@ import subprocess
 from typing import Any, Dict, Optional
 
 from fluster.codec import Codec, OutputFormat
-from fluster.decoder import Decoder, NotSupportedError, register_decoder
+from fluster.decoder import ConcurrencyClass, Decoder, NotSupportedError, register_decoder
 from fluster.utils import file_checksum, run_command
 
 # BSD sysexits.h EX_UNAVAILABLE — media not supported.
@@ -29,6 +29,8 @@ class VKVSDecoder(Decoder):
     """NVidia vk_video_samples decoder implementation"""
 
     binary = "vk-video-dec-test"
+    sequential_output = True
+    concurrency_class = ConcurrencyClass.HARDWARE
 
     def __init__(self) -> None:
         super().__init__()
@@ -0,0 +1,414 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import copy
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import threading
+from collections import deque
+from multiprocessing.pool import ThreadPool
+from time import perf_counter
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fluster.decoder import Decoder, get_reference_decoder_for_codec
+from fluster.events import EventStream
+from fluster.history import TestHistory
+from fluster.journal import ResultsJournal
+from fluster.scheduler import Scheduler, SuiteRun
+from fluster.test import Test
+from fluster.test_suite import Context, TestMethod, TestSuite
+from fluster.test_vector import TestVector, TestVectorResult
+from fluster.utils import ResourceLimits
+
+# The coordinator and the workers exchange JSON messages, one per line, over
+# TCP. A worker connects and says how many jobs it runs with a "hello", along
+# with the token of the coordinator if it has one, then the coordinator hands
+# it "work" items up to that number and a new one after every "result" it gets
+# back. Once every test has a result, the coordinator says "done" to all the
+# workers.
+
+# Secs between checks of whether the coordinator has finished while waiting for workers
+ACCEPT_TIMEOUT = 0.5
+# Host the coordinator listens on when none is given, so that no other machine can connect to it by default
+DEFAULT_COORDINATOR_HOST = "127.0.0.1"
+# Environment variable with the token shared by the coordinator and its workers, required by the coordinator to
+# listen on a host other machines can reach
+TOKEN_ENV = "FLUSTER_COORDINATOR_TOKEN"
+
+
+def parse_address(address: str, default_host: str = "") -> Tuple[str, int]:
+    """Parse an address in [HOST:]PORT format"""
+    host, _, port = address.rpartition(":")
+    try:
+        return (host.strip("[]") or default_host, int(port))
+    except ValueError:
+        raise ValueError(f"invalid address {address}, expected [HOST:]PORT") from None
+
+
+def is_local_host(host: str) -> bool:
+    """Whether only the processes of this machine can connect to a host being listened on"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    """Send a message as a line of JSON"""
+    sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+class _RemoteWorker:
+    """Connection of a worker to the coordinator"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.name = ""
+        self.jobs = 0
+        # Work items handed to the worker that have no result yet
+        self.items: Set[int] = set()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        try:
+            send_message(self.sock, message)
+        except OSError:
+            # The worker is gone, the thread reading from it takes care of its items
+            pass
+
+
+class Coordinator(Scheduler):
+    """Hands the tests of several test suite and decoder pairs out to remote workers.
+
+    Workers take a new test each time they finish one, so faster nodes run
+    more tests. Once there are no tests left to hand out, idle workers steal
+    the test that has been running for longest on another worker and the
+    first result to arrive is kept, so that a slow or stuck node doesn't hold
+    up the end of the run. The tests of a worker that disconnects are handed
+    out again.
+
+    When a token is given, the workers that don't present it are turned
+    away.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        failfast: bool = False,
+        history: Optional[TestHistory] = None,
+        journal: Optional[ResultsJournal] = None,
+        events: Optional[EventStream] = None,
+        token: Optional[str] = None,
+    ):
+        super().__init__(1, failfast, history, journal=journal, events=events)
+        self.address = address
+        self.token = token
+        self._server: Optional[socket.socket] = None
+        self._tests: List[Tuple[SuiteRun, Test]] = []
+        self._queue: Deque[int] = deque()
+        self._assignees: Dict[int, List[_RemoteWorker]] = {}
+        self._dispatch_times: Dict[int, float] = {}
+        self._finished: Set[int] = set()
+        self._workers: List[_RemoteWorker] = []
+
+    def listen(self) -> None:
+        """Start listening for workers, updating the address with the port actually bound"""
+        if self._server is not None:
+            return
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(self.address)
+        self._server.listen()
+        self._server.settimeout(ACCEPT_TIMEOUT)
+        self.address = (self.address[0], self._server.getsockname()[1])
+
+    def run(self) -> None:
+        """Run all the tests added on the workers, returning once all of them have finished"""
+        self._tests = self._ordered_tests()
+        self._queue = deque(range(len(self._tests)))
+        self._assignees = {}
+        self._dispatch_times = {}
+        self._finished = set()
+        self._workers = []
+        self._stopped = False
+        self.listen()
+        print(f"Waiting for workers on {self.address[0] or '*'}:{self.address[1]}", flush=True)
+        accept_thread = threading.Thread(target=self._accept, daemon=True)
+        accept_thread.start()
+        try:
+            with self._cond:
+                while len(self._finished) < len(self._tests) and not self._stopped:
+                    self._cond.wait()
+                self._stopped = True
+                for worker in self._workers:
+                    worker.send({"type": "done"})
+                self._emit_unfinished()
+        finally:
+            accept_thread.join()
+            assert self._server is not None
+            self._server.close()
+            self._server = None
+
+    def _accept(self) -> None:
+        assert self._server is not None
+        while not self._stopped:
+            try:
+                sock, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.settimeout(None)
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        """Read the messages of a worker until it disconnects"""
+        worker = _RemoteWorker(sock)
+        try:
+            with sock.makefile("r", encoding="utf-8") as lines:
+                for line in lines:
+                    message = json.loads(line)
+                    with self._cond:
+                        if message["type"] == "hello":
+                            if not self._authenticate(message):
+                                print(f"Worker {message['name']} rejected, its token doesn't match", flush=True)
+                                break
+                            worker.name = message["name"]
+                            worker.jobs = message["jobs"]
+                            self._workers.append(worker)
+                            print(f"Worker {worker.name} connected with {worker.jobs} job(s)", flush=True)
+                            if self._stopped:
+                                worker.send({"type": "done"})
+                        elif worker not in self._workers:
+                            # Nothing is taken from a connection that hasn't said hello
+                            break
+                        elif message["type"] == "result":
+                            self._on_remote_result(worker, message)
+                        self._dispatch_remote()
+                        self._cond.notify()
+                    if message["type"] == "result" and self.journal is not None:
+                        self.journal.sync()
+        except (OSError, ValueError, KeyError) as ex:
+            print(f"Error reading from worker {worker.name}: {ex}")
+        finally:
+            with self._cond:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+                    if not self._stopped:
+                        print(f"Worker {worker.name} disconnected", flush=True)
+                    self._requeue(worker)
+                    self._dispatch_remote()
+                    self._cond.notify()
+            sock.close()
+
+    def _authenticate(self, message: Dict[str, Any]) -> bool:
+        if self.token is None:
+            return True
+        return hmac.compare_digest(str(message.get("token", "")).encode("utf-8"), self.token.encode("utf-8"))
+
+    def _requeue(self, worker: _RemoteWorker) -> None:
+        """Hand out again the tests of a worker that is gone. Must be called with the lock held"""
+        for item in sorted(worker.items, reverse=True):
+            self._assignees[item].remove(worker)
+            if item not in self._finished and not self._assignees[item]:
+                self._queue.appendleft(item)
+        worker.items.clear()
+
+    def _next_item(self, worker: _RemoteWorker) -> Optional[int]:
+        """Next test for a worker, stealing the one running for longest elsewhere when none is pending"""
+        if self._queue:
+            return self._queue.popleft()
+        running = [
+            item
+            for item, assignees in self._assignees.items()
+            if item not in self._finished and len(assignees) == 1 and worker not in assignees
+        ]
+        if not running:
+            return None
+        return min(running, key=lambda item: self._dispatch_times[item])
+
+    def _dispatch_remote(self) -> None:
+        """Hand tests out to the workers with free jobs. Must be called with the lock held"""
+        for worker in self._workers:
+            while len(worker.items) < worker.jobs and not self._stopped:
+                item = self._next_item(worker)
+                if item is None:
+                    break
+                suite_run, test = self._tests[item]
+                self._on_dispatch(suite_run, test, worker.name)
+                self._dispatch_times.setdefault(item, perf_counter())
+                self._assignees.setdefault(item, []).append(worker)
+                worker.items.add(item)
+                worker.send(
+                    {
+                        "type": "work",
+                        "id": item,
+                        "test_suite": test.test_suite.name,
+                        "decoder": test.decoder.name,
+                        "test_vector": test.test_vector.name,
+                        "skip": test.skip,
+                        "timeout": test.timeout,
+                        "stall_timeout": test.stall_timeout,
+                        "limits": test.limits.to_dict() if test.limits is not None else None,
+                        "reference": test.reference,
+                        "keep_files": test.keep_files,
+                        "verbose": test.verbose,
+                    }
+                )
+
+    def _on_remote_result(self, worker: _RemoteWorker, message: Dict[str, Any]) -> None:
+        item = message["id"]
+        worker.items.discard(item)
+        if item in self._finished:
+            # Another worker stole the test and was faster
+            return
+        self._finished.add(item)
+        suite_run, test = self._tests[item]
+        suite_run.test_finished(test)
+        test.test_vector.load_results(message)
+        self._record_result(suite_run, test, test.test_vector)
+
+
+class Worker:
+    """Runs the tests handed out by a coordinator with its own test suites, resources and decoders.
+
+    The tests run in a pool of threads since the decoders are external
+    processes most of the time.
+    """
+
+    def __init__(
+        self,
+        test_suites: List[TestSuite],
+        decoders: List[Decoder],
+        output_dir: str,
+        jobs: int,
+        name: Optional[str] = None,
+        token: Optional[str] = None,
+    ):
+        self.test_suites = {test_suite.name: test_suite for test_suite in test_suites}
+        self.decoders = {decoder.name: decoder for decoder in decoders}
+        self.output_dir = output_dir
+        self.jobs = jobs
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.token = token
+        self._send_lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+
+    def run(self, address: Tuple[str, int]) -> int:
+        """Run the tests handed out by the coordinator until it is done, returning how many were run"""
+        tests_run = 0
+        with socket.create_connection(address) as sock:
+            self._sock = sock
+            print(f"Connected to coordinator {address[0]}:{address[1]} as {self.name}", flush=True)
+            hello: Dict[str, Any] = {"type": "hello", "name": self.name, "jobs": self.jobs}
+            if self.token is not None:
+                hello["token"] = self.token
+            self._send(hello)
+            with ThreadPool(self.jobs) as pool, sock.makefile("r", encoding="utf-8") as lines:
+                for line in lines:
+                    message = json.loads(line)
+                    if message["type"] == "done":
+                        break
+                    if message["type"] == "work":
+                        self._start(pool, message)
+                        tests_run += 1
+            self._sock = None
+        return tests_run
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        with self._send_lock:
+            if self._sock is None:
+                return
+            try:
+                send_message(self._sock, message)
+            except OSError:
+                # The coordinator is gone, the run is over
+                pass
+
+    def _send_result(self, item: int, test_vector: TestVector) -> None:
+        self._send({"type": "result", "id": item, **test_vector.results_to_serialize()})
+
+    def _send_error(self, item: int, message: Dict[str, Any], error: str) -> None:
+        test_id = f"{message['decoder']}.{message['test_suite']}.{message['test_vector']}"
+        self._send(
+            {
+                "type": "result",
+                "id": item,
+                "test_result": TestVectorResult.ERROR.value,
+                "result": "",
+                "test_time": 0.0,
+                "output_size": 0,
+                "errors": [[f"{message['test_vector']} ({test_id})", f"{error} in worker {self.name}"]],
+            }
+        )
+
+    def _start(self, pool: Any, message: Dict[str, Any]) -> None:
+        item = message["id"]
+        try:
+            test = self._create_test(message)
+        except ValueError as ex:
+            self._send_error(item, message, str(ex))
+            return
+
+        def _callback(test_vector: TestVector) -> None:
+            self._send_result(item, test_vector)
+
+        def _error_callback(err: BaseException) -> None:
+            self._send_error(item, message, f"Error running the test: {err}")
+
+        pool.apply_async(test.test_suite.run_worker, (test,), callback=_callback, error_callback=_error_callback)
+
+    def _create_test(self, message: Dict[str, Any]) -> Test:
+        """Create the test of a work item out of the local test suites and decoders"""
+        test_suite = self.test_suites.get(message["test_suite"])
+        if test_suite is None or message["test_vector"] not in test_suite.test_vectors:
+            raise ValueError(f"Test vector {message['test_vector']} of {message['test_suite']} not available")
+        decoder = self.decoders.get(message["decoder"])
+        if decoder is None or not decoder.check(message["verbose"]):
+            raise ValueError(f"Decoder {message['decoder']} cannot be run")
+
+        output_dir = os.path.join(self.output_dir, test_suite.name, decoder.name)
+        os.makedirs(output_dir, exist_ok=True)
+        ctx = Context(
+            1,
+            decoder,
+            message["timeout"],
+            False,
+            True,
+            output_dir,
+            message["reference"],
+            keep_files=message["keep_files"],
+            verbose=message["verbose"],
+            stall_timeout=message.get("stall_timeout"),
+            limits=ResourceLimits(**message["limits"]) if message.get("limits") else None,
+        )
+        vector_name = message["test_vector"]
+        ctx.test_vector_names = {vector_name.lower()}
+        if message["skip"]:
+            ctx.skip_vectors = [vector_name.lower()]
+        if test_suite.test_method in (TestMethod.PIXEL, TestMethod.SAMPLE):
+            ctx.reference_decoder = get_reference_decoder_for_codec(decoder.codec)
+            if ctx.reference_decoder is None or not ctx.reference_decoder.check(ctx.verbose):
+                raise ValueError(f"No reference decoder for codec {decoder.codec.name}")
+
+        # Copy only the test vector run, the results of each test are kept apart
+        item_suite = copy.copy(test_suite)
+        item_suite.test_vectors = {vector_name: copy.deepcopy(test_suite.test_vectors[vector_name])}
+        return item_suite.generate_tests(ctx)[0]
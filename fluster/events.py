@@ -0,0 +1,83 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import IO, Any, Dict, Optional
+
+
+def make_event(event: str, **fields: Any) -> Dict[str, Any]:
+    """An event with its name, the time it happened in seconds since the epoch and its fields"""
+    return {"event": event, "time": round(time.time(), 6), **fields}
+
+
+class EventStream:
+    """Progress of a run written as it happens, one line of JSON per event.
+
+    Every event carries its name and the time it happened, in seconds since
+    the epoch, so that dashboards and log shippers can follow long runs and
+    measure utilization. The target is a file, or an open file descriptor
+    when it is a number. Every line is flushed right away.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        if target.isdigit():
+            # The descriptor belongs to whoever started fluster
+            self._file: Optional[IO[str]] = os.fdopen(int(target), "w", encoding="utf-8", closefd=False)
+        else:
+            self._file = open(target, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        """Write an event along with its fields"""
+        line = json.dumps(make_event(event, **fields))
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(line + "\n")
+                self._file.flush()
+            except OSError as ex:
+                # Whoever was following the events is gone, the run goes on without them
+                print(f"\nUnable to write events to {self.target}: {ex}")
+                self._file = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+
+
+class EventQueue:
+    """Events of a run kept in memory, for another thread to take them as they happen"""
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        self._queue.put(make_event(event, **fields))
+
+    def get(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Take the next event, waiting for it to happen. Raises queue.Empty on timeout"""
+        return self._queue.get(timeout=timeout)
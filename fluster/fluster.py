@@ -15,26 +15,37 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library. If not, see <https://www.gnu.org/licenses/>.
 
+import copy
 import csv
+import fnmatch
 import json
 import os
 import os.path
 import sys
+import time
 from enum import Enum
 from functools import lru_cache
 from shutil import rmtree
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
-from fluster.codec import Codec, Profile
+from fluster.cache import DEFAULT_CACHE_SIZE, ResultCache
+from fluster.codec import Codec, OutputFormat, Profile
 from fluster.decoder import DECODERS, Decoder
 
 # Import decoders that will auto-register
 from fluster.decoders import *  # noqa: F403
-from fluster.decoders.av1_aom import AV1AOMDecoder
+from fluster.distributed import DEFAULT_COORDINATOR_HOST, TOKEN_ENV, Coordinator, Worker, parse_address
+from fluster.events import EventStream
+from fluster.history import TestHistory
+from fluster.journal import ResultsJournal, load_entries
+from fluster.scheduler import DEFAULT_HW_JOBS, Engine, Scheduler, SuiteRun, parse_shard, select_shard
+from fluster.service import Service
 from fluster.system_info import SystemInfo
+from fluster.test import Test
 from fluster.test_suite import Context as TestSuiteContext
 from fluster.test_suite import TestMethod, TestSuite
 from fluster.test_vector import TestVector, TestVectorResult
+from fluster.utils import ResourceLimits
 
 
 class Context:
@@ -58,6 +69,27 @@ class Context:
         verbose: bool = False,
         summary_output: str = "",
         summary_format: str = "",
+        engine: str = Engine.PROCESSES.value,
+        hw_jobs: int = DEFAULT_HW_JOBS,
+        min_free_space: Optional[int] = None,
+        adaptive: bool = False,
+        coordinator: Optional[str] = None,
+        shard: Optional[str] = None,
+        journal: Optional[str] = None,
+        resume: Optional[str] = None,
+        cache: bool = False,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        adaptive_timeout: Optional[float] = None,
+        stall_timeout: Optional[int] = None,
+        events: Optional[str] = None,
+        cpu_affinity: bool = False,
+        memory_limit: Optional[int] = None,
+        cpu_time_limit: Optional[int] = None,
+        file_size_limit: Optional[int] = None,
+        verify_jobs: Optional[int] = None,
+        only_failed: Optional[str] = None,
+        watch: bool = False,
+        fifo: bool = False,
     ):
         self.jobs = jobs
         self.timeout = timeout
@@ -77,6 +109,29 @@ class Context:
         self.verbose = verbose
         self.summary_output = summary_output
         self.summary_format = summary_format
+        self.engine = engine
+        self.hw_jobs = hw_jobs
+        self.min_free_space = min_free_space
+        self.adaptive = adaptive
+        self.coordinator = coordinator
+        self.shard = shard
+        self.journal = journal
+        self.resume = resume
+        self.cache = cache
+        self.cache_size = cache_size
+        self.adaptive_timeout = adaptive_timeout
+        self.stall_timeout = stall_timeout
+        self.events = events
+        self.cpu_affinity = cpu_affinity
+        self.memory_limit = memory_limit
+        self.cpu_time_limit = cpu_time_limit
+        self.file_size_limit = file_size_limit
+        self.verify_jobs = verify_jobs
+        self.only_failed = only_failed
+        self.watch = watch
+        self.fifo = fifo
+        # Tests that failed in the last run by test suite, decoder and test vector, run first in the next one
+        self.failed_first: Set[Tuple[str, str, str]] = set()
 
     def to_test_suite_context(
         self,
@@ -84,8 +139,12 @@ class Context:
         output_dir: str,
         test_vectors: List[str],
         skip_vectors: List[str],
+        cache: Optional[ResultCache] = None,
     ) -> TestSuiteContext:
         """Create a TestSuite's Context from this"""
+        limits = None
+        if any(limit is not None for limit in (self.memory_limit, self.cpu_time_limit, self.file_size_limit)):
+            limits = ResourceLimits(self.memory_limit, self.cpu_time_limit, self.file_size_limit)
         ts_context = TestSuiteContext(
             jobs=self.jobs,
             decoder=decoder,
@@ -98,6 +157,12 @@ class Context:
             skip_vectors=skip_vectors,
             keep_files=self.keep_files,
             verbose=self.verbose,
+            engine=self.engine,
+            remote=self.coordinator is not None,
+            cache=cache,
+            stall_timeout=self.stall_timeout,
+            limits=limits,
+            fifo=self.fifo,
         )
         return ts_context
 
@@ -109,6 +174,7 @@ EMOJI_RESULT = {
     TestVectorResult.TIMEOUT: "⌛",
     TestVectorResult.ERROR: "☠",
     TestVectorResult.NOT_SUPPORTED: "○",
+    TestVectorResult.LIMIT_EXCEEDED: "🚫",
 }
 
 TEXT_RESULT = {
@@ -118,6 +184,7 @@ TEXT_RESULT = {
     TestVectorResult.TIMEOUT: "TO",
     TestVectorResult.ERROR: "ER",
     TestVectorResult.NOT_SUPPORTED: "NS",
+    TestVectorResult.LIMIT_EXCEEDED: "LE",
 }
 
 RESULT_MAP = {
@@ -128,8 +195,19 @@ RESULT_MAP = {
     TestVectorResult.FAIL: "Fail",
     TestVectorResult.NOT_RUN: "Not run",
     TestVectorResult.NOT_SUPPORTED: "Not supported",
+    TestVectorResult.LIMIT_EXCEEDED: "Limit exceeded",
 }
 
+# Results of the test vectors that make a run fail
+FAILED_RESULTS = (
+    TestVectorResult.FAIL,
+    TestVectorResult.ERROR,
+    TestVectorResult.TIMEOUT,
+    TestVectorResult.LIMIT_EXCEEDED,
+)
+# Secs between the checks of the files of the decoders being watched
+WATCH_INTERVAL = 1
+
 
 class SummaryFormat(Enum):
     """Summary formats"""
@@ -150,20 +228,28 @@ class Fluster:
         output_dir: str,
         verbose: bool = False,
         use_emoji: bool = True,
+        history_file: Optional[str] = None,
+        cache_dir: Optional[str] = None,
     ):
         self.test_suites_dir = test_suites_dir
         self.resources_dir = resources_dir
         self.output_dir = output_dir
+        self.history_file = history_file
+        self.cache_dir = cache_dir
         self.verbose = verbose
         self.test_suites: List[TestSuite] = []
         self.decoders = DECODERS
         self.emoji = EMOJI_RESULT if use_emoji else TEXT_RESULT
+        # Wall-clock time of the tests of every decoder in the last run, as its suites overlap
+        self.wall_times: Dict[str, float] = {}
         if self.verbose:
             print(
                 f"NOTE: Internal dirs used:\n"
                 f" * test_suites_dir: {self.test_suites_dir}\n"
                 f" * resources_dir: {self.resources_dir}\n"
-                f" * output_dir: {self.output_dir}"
+                f" * output_dir: {self.output_dir}\n"
+                f" * history_file: {self.history_file}\n"
+                f" * cache_dir: {self.cache_dir}"
             )
 
     def _walk_test_suite_dir(self) -> Iterator[Tuple[str, List[str], List[str]]]:
@@ -266,7 +352,62 @@ class Fluster:
 
         self._load_test_suites()
         self._normalize_context(ctx)
+        if ctx.watch:
+            self._watch_test_suites(ctx)
+        else:
+            self._run_test_suites(ctx)
+
+    def _watch_test_suites(self, ctx: Context) -> None:
+        """Run the test suites again whenever a decoder is rebuilt, keeping the suites and decoders loaded"""
+        codecs = {test_suite.codec for test_suite in ctx.test_suites}
+        build_files = sorted(
+            {path for decoder in ctx.decoders if decoder.codec in codecs for path in decoder.build_files()}
+        )
+        if not build_files:
+            sys.exit("None of the decoders has a binary or plugin to watch for changes")
+        try:
+            while True:
+                try:
+                    self._run_test_suites(ctx)
+                except SystemExit as ex:
+                    # Failures and thresholds end the run, not the watch
+                    if isinstance(ex.code, str):
+                        print(ex.code)
+                # The tests restored from the journal were only skipped in the first run, the next ones write
+                # their results to it from scratch
+                if ctx.resume is not None:
+                    ctx.journal, ctx.resume = ctx.resume, None
+                print(f"\nWatching {', '.join(build_files)} for changes, press Ctrl+C to stop")
+                self._wait_for_changes(build_files)
+                print(f"\nChange detected, running the tests again, {len(ctx.failed_first)} failed ones first\n")
+        except KeyboardInterrupt:
+            print()
 
+    @staticmethod
+    def _wait_for_changes(files: List[str]) -> None:
+        """Poll the modification time of the files until any of them changes and stays the same afterwards"""
+
+        def snapshot() -> Dict[str, Optional[int]]:
+            mtimes: Dict[str, Optional[int]] = {}
+            for path in files:
+                try:
+                    mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    # Removed while being rebuilt
+                    mtimes[path] = None
+            return mtimes
+
+        initial = current = snapshot()
+        while current == initial:
+            time.sleep(WATCH_INTERVAL)
+            current = snapshot()
+        # Let the build finish writing them
+        previous: Optional[Dict[str, Optional[int]]] = None
+        while current != previous:
+            time.sleep(WATCH_INTERVAL)
+            previous, current = current, snapshot()
+
+    def _run_test_suites(self, ctx: Context) -> None:
         if ctx.reference and (not ctx.decoders or len(ctx.decoders) > 1):
             dec_names = [dec.name for dec in ctx.decoders]
             raise Exception(f"Only one decoder can be the reference. Given: {', '.join(dec_names)}")
@@ -279,68 +420,389 @@ class Fluster:
         if ctx.reference:
             print("\n=== Reference mode ===\n")
 
+        # Prepare every test suite and decoder pair first, so that all their
+        # tests are run on a single pool of workers instead of one at a time
+        history = TestHistory(self.history_file) if self.history_file else None
+        # Read before the journal of this run is opened, as it may be the one given
+        failed_tests = self._load_failed_tests(ctx.only_failed) if ctx.only_failed is not None else None
+        if failed_tests is not None:
+            print(f"Running only the {len(failed_tests)} tests that failed in {ctx.only_failed}\n")
+            if not failed_tests:
+                return
+        if ctx.resume is not None and not os.path.isfile(ctx.resume):
+            sys.exit(f"Journal {ctx.resume} not found")
+        journal = None
+        journal_file = ctx.resume if ctx.resume is not None else ctx.journal
+        if journal_file is not None:
+            try:
+                journal = ResultsJournal(journal_file, ctx.resume is not None)
+            except OSError as ex:
+                sys.exit(f"Unable to open the results journal: {ex}")
+        events = None
+        if ctx.events is not None:
+            try:
+                events = EventStream(ctx.events)
+            except OSError as ex:
+                if journal is not None:
+                    journal.close()
+                sys.exit(f"Unable to open the event stream {ctx.events}: {ex}")
+        # The results stored in the cache come from the decoders, never from the reference ones. Remote workers
+        # don't share the cache of the coordinator.
+        cache = None
+        if ctx.cache and self.cache_dir and not ctx.reference and ctx.coordinator is None:
+            cache = ResultCache(self.cache_dir, ctx.cache_size * 1024 * 1024)
+        min_free_space = ctx.min_free_space * 1024 * 1024 if ctx.min_free_space is not None else None
+        scheduler: Scheduler
+        if ctx.coordinator is not None:
+            scheduler = Coordinator(
+                parse_address(ctx.coordinator, DEFAULT_COORDINATOR_HOST),
+                ctx.failfast,
+                history,
+                journal,
+                events,
+                os.environ.get(TOKEN_ENV) or None,
+            )
+        else:
+            scheduler = Scheduler(
+                ctx.jobs,
+                ctx.failfast,
+                history,
+                ctx.engine,
+                ctx.hw_jobs,
+                min_free_space,
+                ctx.adaptive,
+                journal,
+                events,
+                ctx.cpu_affinity,
+                ctx.verify_jobs,
+                ctx.failed_first,
+            )
+        if ctx.shard is not None:
+            # Split before preparing, which drops the tests this runner can't run
+            shard_index, shard_count = parse_shard(ctx.shard)
+            all_tests = self._defined_tests(ctx)
+            shard_tests = select_shard(all_tests, shard_index, shard_count)
+            print(f"Running shard {ctx.shard}: {len(shard_tests)} of {len(all_tests)} tests\n")
+        prepared_pairs = self._prepare_pairs(ctx, self.output_dir, cache, failed_tests)
+
+        pairs: List[Tuple[TestSuite, Decoder, TestSuiteContext, SuiteRun]] = []
+        for test_suite, decoder, test_suite_ctx, test_suite_res, prepared_tests in prepared_pairs:
+            tests = prepared_tests
+            if ctx.shard is not None:
+                tests = [
+                    test for test in tests if (test_suite.name, decoder.name, test.test_vector.name) in shard_tests
+                ]
+            if failed_tests is not None:
+                tests = [
+                    test for test in tests if (test_suite.name, decoder.name, test.test_vector.name) in failed_tests
+                ]
+            if ctx.shard is not None or failed_tests is not None:
+                if not tests:
+                    continue
+                # Only the test vectors selected are reported
+                test_suite_res.test_vectors = {test.test_vector.name: test.test_vector for test in tests}
+            if ctx.adaptive_timeout is not None:
+                estimate = history.estimate if history is not None else TestHistory.default_estimate
+                for test in tests:
+                    test.timeout = TestHistory.adaptive_timeout(estimate(test), ctx.adaptive_timeout)
+            # Tests that finished before the run was interrupted are not run again
+            pending: List[Test] = []
+            restored: List[Test] = []
+            for test in tests:
+                if journal is not None and journal.restore(test):
+                    restored.append(test)
+                else:
+                    pending.append(test)
+            pairs.append((test_suite, decoder, test_suite_ctx, scheduler.add(test_suite_res, pending, restored)))
+
+        if ctx.resume is not None:
+            restored_count = sum(len(pair[3].restored) for pair in pairs)
+            print(f"Resuming from journal {ctx.resume}: {restored_count} tests already finished\n")
+
+        try:
+            if pairs:
+                # The rows of all the pairs are interleaved in a single table
+                TestSuite.align_results([(pair[3].test_suite, pair[1].name) for pair in pairs])
+                pairs[0][3].test_suite.print_results_header(pairs[0][1].name)
+                scheduler.run()
+                print("\n")
+                if history is not None:
+                    try:
+                        history.save()
+                    except OSError as ex:
+                        print(f"Unable to store the decode times in {history.filename}: {ex}")
+        finally:
+            if journal is not None:
+                journal.close()
+            if events is not None:
+                events.close()
+            if cache is not None:
+                cache.evict()
+
+        # The suites of a decoder overlap, so it took from the first of its tests dispatched to the last one finished
+        spans: Dict[str, Tuple[float, float]] = {}
+        for _, decoder, _, suite_run in pairs:
+            if suite_run.start_time is not None and suite_run.end_time is not None:
+                start, end = spans.get(decoder.name, (suite_run.start_time, suite_run.end_time))
+                spans[decoder.name] = (min(start, suite_run.start_time), max(end, suite_run.end_time))
+        self.wall_times = {name: end - start for name, (start, end) in spans.items()}
+        ctx.failed_first = {
+            (test_suite.name, decoder.name, test_vector.name)
+            for test_suite, decoder, _, suite_run in pairs
+            for test_vector in suite_run.results
+            if test_vector.test_result in FAILED_RESULTS
+        }
         error = False
         no_test_run = True
         results: Dict[str, List[Tuple[Decoder, TestSuite]]] = {}
+        for test_suite, decoder, test_suite_ctx, suite_run in pairs:
+            test_suite_res = suite_run.test_suite
+            test_suite_res.collect_test_vector_results(suite_run.results, suite_run.tests_count, suite_run.time_taken)
+            test_suite_res.finish(test_suite_ctx)
+
+            no_test_run = False
+            test_suite_results = results.setdefault(test_suite.name, [])
+            test_suite_results.append((decoder, test_suite_res))
+            success = True
+            for test_vector in test_suite_res.test_vectors.values():
+                if test_vector.errors:
+                    success = False
+                    break
+
+            if not success:
+                error = True
+                if ctx.failfast:
+                    self._show_summary_if_needed(ctx, results)
+                    sys.exit(1)
+
+            if ctx.threshold:
+                if test_suite_res.test_vectors_success < ctx.threshold:
+                    self._show_summary_if_needed(ctx, results)
+                    print(
+                        f"Tests results below threshold: {test_suite_res.test_vectors_success} vs "
+                        f"{ctx.threshold}\nReporting error through exit code 2"
+                    )
+                    sys.exit(2)
+
+            if ctx.time_threshold:
+                # Without the time its tests waited behind the ones of the other suites run along with it
+                if suite_run.decode_time > ctx.time_threshold:
+                    self._show_summary_if_needed(ctx, results)
+                    print(
+                        f"Tests results over time threshold: {suite_run.decode_time} vs "
+                        f"{ctx.time_threshold}\nReporting error through exit code 3"
+                    )
+                    sys.exit(3)
+
+        self._show_summary_if_needed(ctx, results)
+
+        if not ctx.keep_files and os.path.isdir(self.output_dir):
+            rmtree(self.output_dir)
+
+        if (error and (not ctx.threshold and not ctx.time_threshold)) or no_test_run:
+            sys.exit(1)
+
+    @staticmethod
+    def _defined_tests(ctx: Context) -> List[Tuple[str, str, str]]:
+        """Test suite, decoder and test vector of the tests selected, whether or not they can be run here"""
+        tests = []
         for test_suite in ctx.test_suites:
-            test_suite_results: List[Tuple[Decoder, TestSuite]] = []
             for decoder in ctx.decoders:
-                if isinstance(decoder, AV1AOMDecoder) and decoder.name == "libaom-AV1":
-                    if any(keyword in test_suite.name for keyword in ["CORE", "STRESS"]):
-                        decoder.annexb = True
                 if decoder.codec != test_suite.codec:
                     continue
                 if test_suite.test_method == TestMethod.PIXEL and decoder.is_reference:
                     continue
-                test_suite_res = test_suite.run(
-                    ctx.to_test_suite_context(
-                        decoder,
-                        self.output_dir,
-                        ctx.test_vectors_names,
-                        ctx.skip_vectors_names,
-                    )
+                for name in test_suite.test_vectors:
+                    if ctx.test_vectors_names and not any(
+                        fnmatch.fnmatch(name.lower(), pattern) for pattern in ctx.test_vectors_names
+                    ):
+                        continue
+                    tests.append((test_suite.name, decoder.name, name))
+        return tests
+
+    def _prepare_pairs(
+        self,
+        ctx: Context,
+        output_dir: str,
+        cache: Optional[ResultCache] = None,
+        failed_tests: Optional[Set[Tuple[str, str, str]]] = None,
+    ) -> List[Tuple[TestSuite, Decoder, TestSuiteContext, TestSuite, List[Test]]]:
+        """Prepare every test suite and decoder pair of the context that has tests to run"""
+        prepared_pairs: List[Tuple[TestSuite, Decoder, TestSuiteContext, TestSuite, List[Test]]] = []
+        for test_suite in ctx.test_suites:
+            for decoder in ctx.decoders:
+                if decoder.codec != test_suite.codec:
+                    continue
+                if test_suite.test_method == TestMethod.PIXEL and decoder.is_reference:
+                    continue
+                if failed_tests is not None and not any(
+                    key[:2] == (test_suite.name, decoder.name) for key in failed_tests
+                ):
+                    continue
+                if cache is not None:
+                    # Computed once here instead of in every process running the tests
+                    cache.fingerprint(decoder)
+                test_suite_ctx = ctx.to_test_suite_context(
+                    decoder,
+                    output_dir,
+                    ctx.test_vectors_names,
+                    ctx.skip_vectors_names,
+                    cache,
                 )
+                prepared = test_suite.prepare(test_suite_ctx)
+                if prepared:
+                    prepared_pairs.append((test_suite, decoder, test_suite_ctx, *prepared))
+        return prepared_pairs
 
-                if test_suite_res:
-                    no_test_run = False
-                    test_suite_results.append((decoder, test_suite_res))
-                    results[test_suite.name] = test_suite_results
-                    success = True
-                    for test_vector in test_suite_res.test_vectors.values():
-                        if test_vector.errors:
-                            success = False
-                            break
-
-                    if not success:
-                        error = True
-                        if ctx.failfast:
-                            self._show_summary_if_needed(ctx, results)
-                            sys.exit(1)
-
-                    if ctx.threshold:
-                        if test_suite_res.test_vectors_success < ctx.threshold:
-                            self._show_summary_if_needed(ctx, results)
-                            print(
-                                f"Tests results below threshold: {test_suite_res.test_vectors_success} vs "
-                                f"{ctx.threshold}\nReporting error through exit code 2"
-                            )
-                            sys.exit(2)
-
-                    if ctx.time_threshold:
-                        if test_suite_res.time_taken > ctx.time_threshold:
-                            self._show_summary_if_needed(ctx, results)
-                            print(
-                                f"Tests results over time threshold: {test_suite_res.time_taken} vs "
-                                f"{ctx.time_threshold}\nReporting error through exit code 3"
-                            )
-                            sys.exit(3)
+    def serve(self, ctx: Context, address: str) -> None:
+        """Run the tests requested over a local HTTP API on a single pool of workers"""
+        self._load_test_suites()
+        # Every decoder is checked once here, the requests reuse the results
+        available = [decoder for decoder in self.decoders if decoder.check(ctx.verbose)]
+        print(f"{len(self.test_suites)} test suites and {len(available)} of {len(self.decoders)} decoders available")
+        min_free_space = ctx.min_free_space * 1024 * 1024 if ctx.min_free_space is not None else None
+        scheduler = Scheduler(
+            ctx.jobs,
+            False,
+            None,
+            ctx.engine,
+            ctx.hw_jobs,
+            min_free_space,
+            ctx.adaptive,
+            cpu_affinity=ctx.cpu_affinity,
+            verify_jobs=ctx.verify_jobs,
+        )
+        service = Service(
+            parse_address(address, "localhost"),
+            scheduler,
+            self.test_suites,
+            self.decoders,
+            lambda request, output_dir: self._prepare_request(ctx, request, output_dir),
+            self.output_dir,
+            ctx.keep_files,
+        )
+        try:
+            service.run()
+        except OSError as ex:
+            sys.exit(f"Unable to serve on {address}: {ex}")
+        except KeyboardInterrupt:
+            print()
+
+    def _prepare_request(
+        self, ctx: Context, request: Dict[str, Any], output_dir: str
+    ) -> List[Tuple[TestSuite, List[Test]]]:
+        """Prepare the tests of a request to the service, raising ValueError when it is not valid"""
+        request_ctx = copy.copy(ctx)
+        for field, attribute in (
+            ("test_suites", "test_suites_names"),
+            ("decoders", "decoders_names"),
+            ("test_vectors", "test_vectors_names"),
+            ("skip_vectors", "skip_vectors_names"),
+        ):
+            names = request.get(field, [])
+            if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+                raise ValueError(f"{field} must be a list of names")
+            setattr(request_ctx, attribute, names)
+        try:
+            self._normalize_context(request_ctx)
+        except SystemExit as ex:
+            raise ValueError(str(ex.code)) from None
+        return [(test_suite_res, tests) for *_, test_suite_res, tests in self._prepare_pairs(request_ctx, output_dir)]
 
-        self._show_summary_if_needed(ctx, results)
+    @staticmethod
+    def _load_failed_tests(filename: str) -> Set[Tuple[str, str, str]]:
+        """Test suite, decoder and test vector of the tests that failed according to a JSON summary or a journal"""
+        results_map = {value: key for key, value in RESULT_MAP.items()}
+        failed: Set[Tuple[str, str, str]] = set()
+        try:
+            with open(filename, encoding="utf-8") as results_file:
+                try:
+                    data = json.load(results_file)
+                except ValueError:
+                    # A journal holds a JSON document per line
+                    data = None
+            if isinstance(data, dict) and "test_suites" in data:
+                for test_suite_name, suite_data in data["test_suites"].items():
+                    for decoder_name, decoder_data in suite_data["decoders"].items():
+                        for vector_name, vector_data in decoder_data["vectors"].items():
+                            if results_map[vector_data["result"]] in FAILED_RESULTS:
+                                failed.add((test_suite_name, decoder_name, vector_name))
+            else:
+                entries, _ = load_entries(filename)
+                for key, entry in entries.items():
+                    if TestVectorResult(entry["test_result"]) in FAILED_RESULTS:
+                        failed.add(key)
+        except (OSError, ValueError, KeyError) as ex:
+            sys.exit(f"Unable to read the results {filename}: {ex}")
+        return failed
+
+    def merge_results(self, ctx: Context, summaries: List[str]) -> None:
+        """Combine the JSON summaries of several runs, such as the shards of a run, into a single report"""
+        results_map = {value: key for key, value in RESULT_MAP.items()}
+        decoders = {decoder.name: decoder for decoder in self.decoders}
+        merged: Dict[str, Dict[str, TestSuite]] = {}
+        self.wall_times = {}
+        for summary in summaries:
+            try:
+                with open(summary, encoding="utf-8") as json_file:
+                    data = json.load(json_file)
+                # How long every decoder took, told by the global summary unless it ran a single suite
+                decoder_times = {
+                    decoder_name: decoder_data["total_time"]
+                    for suite_data in data["test_suites"].values()
+                    for decoder_name, decoder_data in suite_data["decoders"].items()
+                }
+                for decoder_name, summary_entry in data.get("global_summary", {}).items():
+                    decoder_times[decoder_name] = summary_entry["total_time"]
+                for decoder_name, decoder_time in decoder_times.items():
+                    self.wall_times[decoder_name] = max(self.wall_times.get(decoder_name, 0.0), decoder_time)
+                for test_suite_name, suite_data in data["test_suites"].items():
+                    for decoder_name, decoder_data in suite_data["decoders"].items():
+                        decoder = decoders.get(decoder_name)
+                        if decoder is None:
+                            sys.exit(f"Unknown decoder {decoder_name} in {summary}")
+                        test_suite = merged.setdefault(test_suite_name, {}).setdefault(
+                            decoder_name, TestSuite("", "", test_suite_name, decoder.codec, "", {})
+                        )
+                        # The shards run at the same time, so the run took as long as the slowest of them
+                        test_suite.time_taken = max(test_suite.time_taken, decoder_data["total_time"])
+                        for vector_name, vector_data in decoder_data["vectors"].items():
+                            profile = Profile[vector_data["profile"]] if "profile" in vector_data else None
+                            test_vector = TestVector(vector_name, "", "", "", OutputFormat.NONE, "", profile)
+                            test_vector.test_result = results_map[vector_data["result"]]
+                            test_vector.test_time = vector_data["time"]
+                            test_suite.test_vectors[vector_name] = test_vector
+            except (OSError, ValueError, KeyError) as ex:
+                sys.exit(f"Unable to read the summary {summary}: {ex}")
 
-        if not ctx.keep_files and os.path.isdir(self.output_dir):
-            rmtree(self.output_dir)
+        try:
+            self._load_test_suites()
+        except Exception:
+            # Without the test suites, the test vectors are kept in the order of the summaries
+            pass
+        suites_order = {
+            test_suite.name: {name: index for index, name in enumerate(test_suite.test_vectors)}
+            for test_suite in self.test_suites
+        }
 
-        if (error and (not ctx.threshold and not ctx.time_threshold)) or no_test_run:
+        error = False
+        results: Dict[str, List[Tuple[Decoder, TestSuite]]] = {}
+        for test_suite_name, suite_decoders in merged.items():
+            order = suites_order.get(test_suite_name, {})
+            for decoder_name, test_suite in suite_decoders.items():
+                test_suite.test_vectors = dict(
+                    sorted(test_suite.test_vectors.items(), key=lambda item: order.get(item[0], len(order)))
+                )
+                test_vector_results = [tv.test_result for tv in test_suite.test_vectors.values()]
+                test_suite.test_vectors_success = test_vector_results.count(TestVectorResult.SUCCESS)
+                test_suite.test_vectors_not_run = test_vector_results.count(TestVectorResult.NOT_RUN)
+                test_suite.test_vectors_not_supported = test_vector_results.count(TestVectorResult.NOT_SUPPORTED)
+                error |= any(result in FAILED_RESULTS for result in test_vector_results)
+                results.setdefault(test_suite_name, []).append((decoders[decoder_name], test_suite))
+
+        ctx.summary = True
+        self._show_summary_if_needed(ctx, results)
+        if error or not results:
             sys.exit(1)
 
     def _show_summary_if_needed(self, ctx: Context, results: Dict[str, List[Tuple[Decoder, TestSuite]]]) -> None:
@@ -420,6 +882,10 @@ class Fluster:
                     p = entry["profile_stats"].setdefault(profile_name, {"passed": 0, "total": 0})
                     p["passed"] += data["passed"]
                     p["total"] += data["total"]
+        # The suites run at the same time, so adding up their times would count the same secs several times
+        for name, wall_time in self.wall_times.items():
+            if name in global_stats:
+                global_stats[name]["time_taken"] = wall_time
         return global_stats
 
     def _generate_junit_summary(self, ctx: Context, results: Dict[str, List[Tuple[Decoder, TestSuite]]]) -> None:
@@ -436,6 +902,7 @@ class Fluster:
                 TestVectorResult.FAIL: junitp.Failure,
                 TestVectorResult.NOT_RUN: junitp.Skipped,
                 TestVectorResult.TIMEOUT: junitp.Failure,
+                TestVectorResult.LIMIT_EXCEEDED: junitp.Error,
             }
 
             jerrors = []
@@ -856,6 +1323,16 @@ class Fluster:
         else:
             print(output)
 
+    def run_worker(self, coordinator: str, jobs: int, name: Optional[str] = None) -> None:
+        """Run the tests handed out by a coordinator"""
+        self._load_test_suites()
+        worker = Worker(self.test_suites, self.decoders, self.output_dir, jobs, name, os.environ.get(TOKEN_ENV) or None)
+        try:
+            tests_run = worker.run(parse_address(coordinator, "localhost"))
+        except OSError as ex:
+            sys.exit(f"Unable to reach coordinator {coordinator}: {ex}")
+        print(f"Ran {tests_run} tests for the coordinator")
+
     def download_test_suites(
         self,
         test_suites: List[str],
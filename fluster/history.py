@@ -0,0 +1,140 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import math
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from fluster.test import Test
+from fluster.test_vector import TestVector, TestVectorResult
+
+HISTORY_VERSION = 1
+# Bytes of input decoded per second assumed for decoders that have never been run
+DEFAULT_THROUGHPUT = 1024 * 1024
+# Ratio between the size of the decoded output and the size of the input assumed for decoders that have never been run
+DEFAULT_OUTPUT_RATIO = 100
+# Times the expected decode time given to a test before it times out in adaptive timeout mode
+DEFAULT_TIMEOUT_FACTOR = 4.0
+# Minimum timeout in secs in adaptive timeout mode, covering the startup of the decoders
+MIN_ADAPTIVE_TIMEOUT = 10
+
+
+class TestHistory:
+    """Decode times and output sizes of the test vectors measured in previous runs, per decoder"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        # decoder name -> "test suite/test vector" -> {"time": secs, "input_size": bytes, "output_size": bytes}
+        self.decoders: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.filename, encoding="utf-8") as json_file:
+                data = json.load(json_file)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == HISTORY_VERSION:
+            self.decoders = data.get("decoders", {})
+
+    @staticmethod
+    def _key(test: Test) -> str:
+        return f"{test.test_suite.name}/{test.test_vector.name}"
+
+    @staticmethod
+    def _input_size(test: Test) -> int:
+        try:
+            return os.path.getsize(test.input_filepath)
+        except OSError:
+            return 0
+
+    def _throughput(self, decoder_name: str) -> float:
+        """Average bytes of input decoded per second by a decoder"""
+        entries = self.decoders.get(decoder_name, {}).values()
+        total_size = sum(entry["input_size"] for entry in entries)
+        total_time = sum(entry["time"] for entry in entries)
+        if total_size <= 0 or total_time <= 0:
+            return DEFAULT_THROUGHPUT
+        return total_size / total_time
+
+    def _output_ratio(self, decoder_name: str) -> float:
+        """Average ratio between the size of the outputs written by a decoder and the size of its inputs"""
+        entries = [entry for entry in self.decoders.get(decoder_name, {}).values() if "output_size" in entry]
+        total_input_size = sum(entry["input_size"] for entry in entries)
+        if total_input_size <= 0:
+            return DEFAULT_OUTPUT_RATIO
+        return sum(entry["output_size"] for entry in entries) / total_input_size
+
+    def get(self, test: Test) -> Optional[float]:
+        """Return the decode time measured last time the test was run, if any"""
+        entry = self.decoders.get(test.decoder.name, {}).get(self._key(test))
+        return entry["time"] if entry else None
+
+    def estimate(self, test: Test) -> float:
+        """Estimate how long a test takes to run, in seconds"""
+        if test.skip:
+            return 0.0
+        test_time = self.get(test)
+        if test_time is not None:
+            return test_time
+        # Never run before: assume decode time grows with the size of the input
+        return self._input_size(test) / self._throughput(test.decoder.name)
+
+    def estimate_output_size(self, test: Test) -> float:
+        """Estimate how many bytes a test writes to the output directory"""
+        if test.skip:
+            return 0.0
+        entry = self.decoders.get(test.decoder.name, {}).get(self._key(test))
+        if entry and "output_size" in entry:
+            return entry["output_size"]
+        return self._input_size(test) * self._output_ratio(test.decoder.name)
+
+    @staticmethod
+    def adaptive_timeout(estimate: float, factor: float) -> int:
+        """Timeout in secs for a test expected to take estimate secs"""
+        return max(MIN_ADAPTIVE_TIMEOUT, math.ceil(estimate * factor))
+
+    @classmethod
+    def default_estimate(cls, test: Test) -> float:
+        """Estimate how long a test takes to run, in seconds, without any history"""
+        return 0.0 if test.skip else cls._input_size(test) / DEFAULT_THROUGHPUT
+
+    @classmethod
+    def default_output_size(cls, test: Test) -> float:
+        """Estimate how many bytes a test writes to the output directory without any history"""
+        return 0.0 if test.skip else float(cls._input_size(test) * DEFAULT_OUTPUT_RATIO)
+
+    def record(self, test: Test, test_vector: TestVector) -> None:
+        """Store the decode time and output size of a test that has just been run"""
+        if test_vector.test_result == TestVectorResult.NOT_RUN or test_vector.test_time <= 0 or test_vector.cached:
+            return
+        self.decoders.setdefault(test.decoder.name, {})[self._key(test)] = {
+            "time": test_vector.test_time,
+            "input_size": self._input_size(test),
+            "output_size": test_vector.output_size,
+        }
+
+    def save(self) -> None:
+        """Write the history to disk, replacing the file atomically"""
+        data: Dict[str, Any] = {"version": HISTORY_VERSION, "decoders": self.decoders}
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(dirname, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=dirname, delete=False) as json_file:
+            json.dump(data, json_file, indent=4)
+            json_file.write("\n")
+        os.replace(json_file.name, self.filename)
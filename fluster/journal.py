@@ -0,0 +1,101 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import threading
+from typing import IO, Any, Dict, Optional, Tuple
+
+from fluster.test import Test
+from fluster.test_vector import TestVector
+
+
+def load_entries(filename: str) -> Tuple[Dict[Tuple[str, str, str], Dict[str, Any]], bool]:
+    """Read the entries of a journal by test suite, decoder and test vector, and whether its last line is complete
+
+    When a test vector shows up several times, the last entry wins.
+    """
+    entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    line = ""
+    with open(filename, encoding="utf-8") as journal_file:
+        for line in journal_file:
+            try:
+                entry = json.loads(line)
+                entries[(entry["test_suite"], entry["decoder"], entry["test_vector"])] = entry
+            except (ValueError, KeyError, TypeError):
+                continue
+    return entries, not line or line.endswith("\n")
+
+
+class ResultsJournal:
+    """Results of the tests appended to a file as soon as they finish, so that an interrupted run can be resumed.
+
+    Every result is a line of JSON that is flushed as soon as it is recorded
+    and synced to disk by sync(), which is meant to be called without holding
+    the lock of the scheduler, so a run killed at any point loses at most the
+    tests that were running. A line cut short by the crash is ignored when
+    resuming.
+    """
+
+    def __init__(self, filename: str, resume: bool = False):
+        self.filename = filename
+        # (test suite, decoder, test vector) -> results of the test vector
+        self.entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        complete = True
+        if resume:
+            self.entries, complete = load_entries(self.filename)
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(dirname, exist_ok=True)
+        # Keeps the file from being closed while it is synced
+        self._sync_lock = threading.Lock()
+        self._file: Optional[IO[str]] = open(self.filename, "a" if resume else "w", encoding="utf-8")
+        if not complete:
+            # Don't append the next result to the line cut short
+            self._file.write("\n")
+
+    @staticmethod
+    def _key(test: Test) -> Tuple[str, str, str]:
+        return (test.test_suite.name, test.decoder.name, test.test_vector.name)
+
+    def restore(self, test: Test) -> bool:
+        """Set the results of the test from the journal, returning whether it had already finished"""
+        entry = self.entries.get(self._key(test))
+        if entry is None:
+            return False
+        test.test_vector.load_results(entry)
+        return True
+
+    def record(self, test: Test, test_vector: TestVector) -> None:
+        """Append the results of a test that has just finished"""
+        if self._file is None:
+            return
+        test_suite, decoder, vector = self._key(test)
+        entry = {"test_suite": test_suite, "decoder": decoder, "test_vector": vector}
+        entry.update(test_vector.results_to_serialize())
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def sync(self) -> None:
+        """Write the results recorded so far to disk"""
+        with self._sync_lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._sync_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -26,14 +26,21 @@ from tempfile import gettempdir
 from typing import Any, Tuple
 
 from fluster import utils
+from fluster.cache import DEFAULT_CACHE_SIZE
 from fluster.codec import Codec
+from fluster.distributed import DEFAULT_COORDINATOR_HOST, TOKEN_ENV, is_local_host, parse_address
 from fluster.fluster import Context, Fluster, SummaryFormat
+from fluster.history import DEFAULT_TIMEOUT_FACTOR, MIN_ADAPTIVE_TIMEOUT
+from fluster.scheduler import DEFAULT_HW_JOBS, Engine, parse_shard
+from fluster.service import DEFAULT_SERVICE_PORT
 
 APPNAME = "fluster"
 TEST_SUITES_DIR = "test_suites"
 DECODERS_DIR = "decoders"
 RESOURCES_DIR = "resources"
 OUTPUT_DIR = "fluster_output"
+HISTORY_FILE = "history.json"
+CACHE_DIR = "cache"
 
 
 def fluster_main() -> None:
@@ -80,6 +87,8 @@ class Main:
                 output_dir=args.output,
                 use_emoji=not args.no_emoji,
                 verbose=args.verbose if "verbose" in args else False,
+                history_file=os.path.join(utils.user_data_dir(APPNAME), HISTORY_FILE),
+                cache_dir=os.path.join(utils.user_data_dir(APPNAME), CACHE_DIR),
             )
             args.func(args, fluster)
         else:
@@ -87,6 +96,41 @@ class Main:
 
     @staticmethod
     def _validate_args(args: Any) -> None:
+        if getattr(args, "coordinator", None) is not None:
+            try:
+                host, _ = parse_address(args.coordinator, DEFAULT_COORDINATOR_HOST)
+            except ValueError as ex:
+                sys.exit(f"error: {ex}.")
+            if not is_local_host(host) and not os.environ.get(TOKEN_ENV):
+                sys.exit(
+                    f"error: other machines can reach the coordinator on {host}, set the token the workers must "
+                    f"present in {TOKEN_ENV}."
+                )
+        if getattr(args, "adaptive_timeout", None) is not None and args.adaptive_timeout <= 0:
+            sys.exit("error: the adaptive timeout factor must be greater than 0.")
+        if getattr(args, "verify_jobs", None) is not None and args.verify_jobs <= 0:
+            sys.exit("error: the number of verify jobs must be greater than 0.")
+        if getattr(args, "stall_timeout", None) is not None and args.stall_timeout <= 0:
+            sys.exit("error: the stall timeout must be greater than 0.")
+        for limit in ("memory_limit", "cpu_time_limit", "file_size_limit"):
+            if getattr(args, limit, None) is not None:
+                if os.name != "posix":
+                    sys.exit("error: resource limits are only available on POSIX systems.")
+                if getattr(args, limit) <= 0:
+                    sys.exit(f"error: the {limit.replace('_', ' ')} must be greater than 0.")
+        if getattr(args, "fifo", False) and not utils.is_fifo_available():
+            sys.exit("error: FIFO outputs are only available on POSIX systems.")
+        if getattr(args, "watch", False) and getattr(args, "coordinator", None) is not None:
+            sys.exit("error: the decoders of the workers can't be watched, --watch can't be used with --coordinator.")
+        if getattr(args, "journal", None) is not None and getattr(args, "resume", None) is not None:
+            sys.exit("error: --resume keeps appending to the journal it resumes from, --journal can't be used with it.")
+        if getattr(args, "only_failed", None) is not None and not os.path.isfile(args.only_failed):
+            sys.exit(f"error: {args.only_failed} not found.")
+        if getattr(args, "shard", None) is not None:
+            try:
+                parse_shard(args.shard)
+            except ValueError as ex:
+                sys.exit(f"error: {ex}.")
         if hasattr(args, "format"):
             if (
                 args.format in [SummaryFormat.JUNITXML.value, SummaryFormat.CSV.value, SummaryFormat.JSON.value]
@@ -155,6 +199,9 @@ class Main:
         self._add_run_cmd(subparsers)
         self._add_download_cmd(subparsers)
         self._add_reference_cmd(subparsers)
+        self._add_worker_cmd(subparsers)
+        self._add_serve_cmd(subparsers)
+        self._add_merge_results_cmd(subparsers)
         return parser
 
     def _add_list_cmd(self, subparsers: Any) -> None:
@@ -205,6 +252,31 @@ class Main:
             type=int,
             default=multiprocessing.cpu_count(),
         )
+        subparser.add_argument(
+            "--hw-jobs",
+            help="maximum number of jobs running hardware decoders at the same time on each device, as they "
+            f"saturate their engine long before the number of cores. Defaults to {DEFAULT_HW_JOBS}",
+            type=int,
+            default=DEFAULT_HW_JOBS,
+        )
+        subparser.add_argument(
+            "--min-free-space",
+            help="hold back tests while the free space in the output directory, minus the expected size of the "
+            "outputs of the tests running, would drop below this amount of MiB",
+            type=int,
+        )
+        subparser.add_argument(
+            "--adaptive",
+            help="adjust the number of jobs running, up to the number of jobs, following the CPU, memory and IO "
+            "pressure of the host (Linux only)",
+            action="store_true",
+        )
+        subparser.add_argument(
+            "--cpu-affinity",
+            help="pin every job to a set of CPUs of its own, within a single NUMA node when they fit, and run the "
+            "decoders able to set their number of threads with as many threads as CPUs (Linux only)",
+            action="store_true",
+        )
         subparser.add_argument(
             "-t",
             "--timeout",
@@ -212,6 +284,46 @@ class Main:
             type=int,
             default=30,
         )
+        subparser.add_argument(
+            "--adaptive-timeout",
+            help="instead of a single timeout, give each decoding FACTOR times the time it took in previous runs, "
+            "or the time expected from the size of its input, and never less than "
+            f"{MIN_ADAPTIVE_TIMEOUT} secs. FACTOR defaults to {DEFAULT_TIMEOUT_FACTOR:g}",
+            type=float,
+            nargs="?",
+            const=DEFAULT_TIMEOUT_FACTOR,
+            metavar="FACTOR",
+        )
+        subparser.add_argument(
+            "--stall-timeout",
+            help="kill a decoding once its output files, stdout and stderr don't grow for this amount of secs, "
+            "reporting a timeout, or as soon as it prints an error it never recovers from, reporting an error. "
+            "Decoders writing their whole output at the end need a value above their decode time",
+            type=int,
+        )
+        subparser.add_argument(
+            "--memory-limit",
+            help="maximum address space in MiB of every decoding, a decoder exiting with ENOMEM or killed with this "
+            "limit is reported as having exceeded it (POSIX only)",
+            type=int,
+        )
+        subparser.add_argument(
+            "--cpu-time-limit",
+            help="maximum CPU time in secs of every process of a decoding (POSIX only)",
+            type=int,
+        )
+        subparser.add_argument(
+            "--file-size-limit",
+            help="maximum size in MiB of every file written by a decoding (POSIX only)",
+            type=int,
+        )
+        subparser.add_argument(
+            "--fifo",
+            help="make the outputs of the decoders that write them in order named pipes, hashed by fluster as they "
+            "are written so that they never reach the disk. Only for the test suites compared by MD5 and without "
+            "--keep (POSIX only)",
+            action="store_true",
+        )
         subparser.add_argument(
             "-ff",
             "--failfast",
@@ -280,6 +392,78 @@ class Main:
             help="set exit code to 3 if test suite takes longer than threshold seconds. exit code is 0 otherwise",
             type=float,
         )
+        subparser.add_argument(
+            "--engine",
+            help="run the tests in a pool of processes or in a pool of threads, which avoids pickling the tests. "
+            "pipeline runs the tests in threads too, but frees the job of a decoder as soon as it exits and hashes "
+            "and compares the outputs in the verify jobs. Defaults to processes",
+            choices=[x.value for x in Engine],
+            default=Engine.PROCESSES.value,
+        )
+        subparser.add_argument(
+            "--verify-jobs",
+            help="number of tests hashing and comparing their outputs at the same time with the pipeline engine, "
+            "besides the jobs running decoders. Defaults to half the number of jobs",
+            type=int,
+        )
+        subparser.add_argument(
+            "--coordinator",
+            help="listen on [HOST:]PORT and hand the tests out to the workers that connect, which run them with "
+            f"their own decoders and resources instead of running them locally. The host defaults to "
+            f"{DEFAULT_COORDINATOR_HOST}, any other one that isn't a loopback address requires a token in {TOKEN_ENV} "
+            "that the workers must present",
+            metavar="[HOST:]PORT",
+        )
+        subparser.add_argument(
+            "--shard",
+            help="run only the tests of shard i out of N, i going from 1 to N. The tests defined by the test suites "
+            "and decoders selected are split evenly among the shards, whether or not they can be run locally",
+            metavar="i/N",
+        )
+        subparser.add_argument(
+            "--journal",
+            help="write the results of the tests to this journal as soon as they finish, so that the run can be "
+            "resumed with --resume if it is interrupted. An existing journal is overwritten",
+            metavar="JOURNAL",
+        )
+        subparser.add_argument(
+            "--resume",
+            help="skip the tests that already finished according to the results journal of an interrupted run, "
+            "and keep appending to it",
+            metavar="JOURNAL",
+        )
+        subparser.add_argument(
+            "--only-failed",
+            help="run only the tests that failed, had an error or timed out according to the JSON summary or the "
+            "results journal of a previous run, for the same decoders and test suites",
+            metavar="SUMMARY|JOURNAL",
+        )
+        subparser.add_argument(
+            "--watch",
+            help="keep the test suites and decoders loaded and run the tests again, the failed ones first, every "
+            "time the binary or the GStreamer plugin of a decoder changes. Stop with Ctrl+C",
+            action="store_true",
+        )
+        subparser.add_argument(
+            "--events",
+            help="write the progress of the run to a file, or to an open file descriptor when given a number, as "
+            "one line of JSON per event: suite started, test vector dispatched, test vector finished and suite "
+            "finished",
+            metavar="FILE|FD",
+        )
+        subparser.add_argument(
+            "--cache",
+            help="reuse the results of the test vectors already decoded with the same decoder binary, input, "
+            "output format and parameters instead of decoding them again",
+            action="store_true",
+        )
+        subparser.add_argument(
+            "--cache-size",
+            help="size in MiB of the cache of results, beyond which the least recently used ones are evicted. "
+            f"Defaults to {DEFAULT_CACHE_SIZE}",
+            type=int,
+            default=DEFAULT_CACHE_SIZE,
+        )
         subparser.add_argument(
             "-v",
             "--verbose",
@@ -368,6 +552,123 @@ class Main:
         subparser.add_argument("testsuites", help="list of testsuites to download", nargs="*")
         subparser.set_defaults(func=self._download_cmd)
 
+    def _add_worker_cmd(self, subparsers: Any) -> None:
+        subparser = subparsers.add_parser(
+            "worker", aliases=["w"], help="run the tests handed out by a coordinator started with run --coordinator"
+        )
+        subparser.add_argument(
+            "coordinator",
+            help=f"address of the coordinator, which is presented the token in {TOKEN_ENV} if set",
+            metavar="[HOST:]PORT",
+        )
+        subparser.add_argument(
+            "-j",
+            "--jobs",
+            help="number of parallel jobs to use (by default 1x logical cores, value 0 is interpreted as the same)",
+            type=int,
+            default=multiprocessing.cpu_count(),
+        )
+        subparser.add_argument(
+            "-n",
+            "--name",
+            help="name the coordinator identifies the worker with. Defaults to the hostname and process id",
+        )
+        subparser.set_defaults(func=self._worker_cmd)
+
+    def _add_serve_cmd(self, subparsers: Any) -> None:
+        subparser = subparsers.add_parser(
+            "serve",
+            aliases=["s"],
+            help="load the test suites and decoders once and run the tests requested over a local HTTP API, all of "
+            "them on a single pool of jobs",
+        )
+        subparser.add_argument(
+            "address",
+            help=f"address to listen on, localhost when no host is given. Defaults to {DEFAULT_SERVICE_PORT}",
+            nargs="?",
+            default=str(DEFAULT_SERVICE_PORT),
+            metavar="[HOST:]PORT",
+        )
+        subparser.add_argument(
+            "-j",
+            "--jobs",
+            help="number of parallel jobs shared by all the requests (by default 1x logical cores, value 0 is "
+            "interpreted as the same)",
+            type=int,
+            default=multiprocessing.cpu_count(),
+        )
+        subparser.add_argument(
+            "--hw-jobs",
+            help="maximum number of jobs running hardware decoders at the same time on each device. "
+            f"Defaults to {DEFAULT_HW_JOBS}",
+            type=int,
+            default=DEFAULT_HW_JOBS,
+        )
+        subparser.add_argument(
+            "--engine",
+            help="run the tests in a pool of processes or in a pool of threads, see run --help. Defaults to threads",
+            choices=[x.value for x in Engine],
+            default=Engine.THREADS.value,
+        )
+        subparser.add_argument(
+            "--verify-jobs",
+            help="number of tests hashing and comparing their outputs at the same time with the pipeline engine. "
+            "Defaults to half the number of jobs",
+            type=int,
+        )
+        subparser.add_argument(
+            "--min-free-space",
+            help="hold back tests while the free space in the output directory would drop below this amount of MiB",
+            type=int,
+        )
+        subparser.add_argument(
+            "--adaptive",
+            help="adjust the number of jobs running following the pressure of the host (Linux only)",
+            action="store_true",
+        )
+        subparser.add_argument(
+            "--cpu-affinity",
+            help="pin every job to a set of CPUs of its own (Linux only)",
+            action="store_true",
+        )
+        subparser.add_argument(
+            "-t",
+            "--timeout",
+            help="timeout in secs for each decoding. Defaults to 30 secs",
+            type=int,
+            default=30,
+        )
+        subparser.add_argument(
+            "-k",
+            "--keep",
+            help="keep output files generated during the tests",
+            action="store_true",
+        )
+        subparser.add_argument(
+            "-v",
+            "--verbose",
+            help="show stdout and stderr of commands executed",
+            action="store_true",
+        )
+        subparser.set_defaults(func=self._serve_cmd)
+
+    def _add_merge_results_cmd(self, subparsers: Any) -> None:
+        subparser = subparsers.add_parser(
+            "merge-results",
+            aliases=["m"],
+            help="combine the JSON summaries of several runs, such as the shards of a run, into a single report",
+        )
+        subparser.add_argument("summaries", help="JSON summaries to combine", nargs="+")
+        subparser.add_argument("-so", "--summary-output", help="dump summary output to file")
+        subparser.add_argument(
+            "-f",
+            "--format",
+            help="specify the format for the summary file",
+            choices=[x.value for x in SummaryFormat],
+            default=SummaryFormat.MARKDOWN.value,
+        )
+        subparser.set_defaults(func=self._merge_results_cmd)
+
     @staticmethod
     def _list_cmd(args: Any, fluster: Fluster) -> None:
         fluster.list_test_suites(show_test_vectors=args.testvectors, test_suites=args.testsuites, codec=args.codec)
@@ -392,6 +693,27 @@ class Main:
             verbose=args.verbose,
             summary_output=args.summary_output,
             summary_format=args.format,
+            engine=args.engine,
+            hw_jobs=args.hw_jobs,
+            min_free_space=args.min_free_space,
+            adaptive=args.adaptive,
+            coordinator=args.coordinator,
+            shard=args.shard,
+            journal=args.journal,
+            resume=args.resume,
+            cache=args.cache,
+            cache_size=args.cache_size,
+            adaptive_timeout=args.adaptive_timeout,
+            stall_timeout=args.stall_timeout,
+            events=args.events,
+            cpu_affinity=args.cpu_affinity,
+            memory_limit=args.memory_limit,
+            cpu_time_limit=args.cpu_time_limit,
+            file_size_limit=args.file_size_limit,
+            verify_jobs=args.verify_jobs,
+            only_failed=args.only_failed,
+            watch=args.watch,
+            fifo=args.fifo,
         )
         try:
             fluster.run_test_suites(context)
@@ -417,6 +739,51 @@ class Main:
         except SystemExit as exception:
             sys.exit(exception.code)
 
+    @staticmethod
+    def _worker_cmd(args: Any, fluster: Fluster) -> None:
+        args.jobs = args.jobs if args.jobs > 0 else multiprocessing.cpu_count()
+        fluster.run_worker(args.coordinator, args.jobs, args.name)
+
+    @staticmethod
+    def _serve_cmd(args: Any, fluster: Fluster) -> None:
+        try:
+            parse_address(args.address)
+        except ValueError as ex:
+            sys.exit(f"error: {ex}.")
+        args.jobs = args.jobs if args.jobs > 0 else multiprocessing.cpu_count()
+        context = Context(
+            jobs=args.jobs,
+            timeout=args.timeout,
+            test_suites=[],
+            decoders=[],
+            test_vectors=[],
+            skip_vectors=[],
+            quiet=True,
+            keep_files=args.keep,
+            verbose=args.verbose,
+            engine=args.engine,
+            hw_jobs=args.hw_jobs,
+            min_free_space=args.min_free_space,
+            adaptive=args.adaptive,
+            cpu_affinity=args.cpu_affinity,
+            verify_jobs=args.verify_jobs,
+        )
+        fluster.serve(context, args.address)
+
+    @staticmethod
+    def _merge_results_cmd(args: Any, fluster: Fluster) -> None:
+        context = Context(
+            jobs=0,
+            timeout=0,
+            test_suites=[],
+            decoders=[],
+            test_vectors=[],
+            skip_vectors=[],
+            summary_output=args.summary_output,
+            summary_format=args.format,
+        )
+        fluster.merge_results(context, args.summaries)
+
     @staticmethod
     def _download_cmd(args: Any, fluster: Fluster) -> None:
         args.jobs = args.jobs if args.jobs > 0 else multiprocessing.cpu_count()
@@ -0,0 +1,75 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+from time import monotonic
+from typing import Optional
+
+PRESSURE_DIR = "/proc/pressure"
+PRESSURE_RESOURCES = ("cpu", "memory", "io")
+# Seconds between adjustments of the number of jobs, the averages cover the last 10 secs
+PRESSURE_INTERVAL = 2.0
+# Percentage of time some tasks were stalled above which jobs are removed, and below which jobs are added
+HIGH_PRESSURE = 40.0
+LOW_PRESSURE = 10.0
+
+
+def read_pressure(resource: str) -> Optional[float]:
+    """Return the percentage of time some tasks were stalled on a resource in the last 10 secs (Linux only)"""
+    try:
+        with open(os.path.join(PRESSURE_DIR, resource), encoding="utf-8") as pressure_file:
+            for line in pressure_file:
+                fields = line.split()
+                if fields and fields[0] == "some":
+                    return max(float(field.split("=", 1)[1]) for field in fields[1:] if field.startswith("avg10="))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def is_pressure_available() -> bool:
+    """Whether the kernel provides pressure stall information"""
+    return all(read_pressure(resource) is not None for resource in PRESSURE_RESOURCES)
+
+
+class PressureController:
+    """Adjusts the number of jobs to keep the host just below saturation.
+
+    Uses the pressure stall information of CPU, memory and IO: a job is
+    added while the pressure stays low and a quarter of them are removed
+    when it gets high, so the run backs off quickly when the host is shared
+    with other work and grows again slowly once it is released.
+    """
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self.jobs = max_jobs
+        self._last_update = monotonic()
+
+    def update(self) -> int:
+        """Return the number of jobs to run, adjusted if enough time has passed since the last time"""
+        now = monotonic()
+        if now - self._last_update < PRESSURE_INTERVAL:
+            return self.jobs
+        self._last_update = now
+
+        pressures = [read_pressure(resource) for resource in PRESSURE_RESOURCES]
+        pressure = max((value for value in pressures if value is not None), default=0.0)
+        if pressure > HIGH_PRESSURE:
+            self.jobs = max(1, self.jobs - max(1, self.jobs // 4))
+        elif pressure < LOW_PRESSURE:
+            self.jobs = min(self.max_jobs, self.jobs + 1)
+        return self.jobs
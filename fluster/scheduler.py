@@ -0,0 +1,597 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import shutil
+import threading
+from collections import deque
+from enum import Enum
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from time import perf_counter
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fluster.affinity import CpuSlots, is_affinity_available
+from fluster.decoder import ConcurrencyClass, Decoder
+from fluster.events import EventQueue, EventStream
+from fluster.history import TestHistory
+from fluster.journal import ResultsJournal
+from fluster.pressure import PRESSURE_INTERVAL, PressureController, is_pressure_available
+from fluster.test import Test
+from fluster.test_vector import TestVector
+from fluster.utils import (
+    PipelineStages,
+    kill_commands_on_termination,
+    kill_running_commands,
+    set_pipeline_stages,
+)
+
+# Hardware decoders that can run at the same time by default
+DEFAULT_HW_JOBS = 2
+
+
+class Engine(Enum):
+    """How the tests are executed"""
+
+    PROCESSES = "processes"
+    THREADS = "threads"
+    PIPELINE = "pipeline"
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a shard in i/N format, i going from 1 to N"""
+    index, _, count = shard.partition("/")
+    try:
+        shard_index, shard_count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"invalid shard {shard}, expected i/N") from None
+    if shard_count < 1 or not 1 <= shard_index <= shard_count:
+        raise ValueError(f"invalid shard {shard}, i must go from 1 to N")
+    return shard_index, shard_count
+
+
+def select_shard(tests: List[Tuple[str, str, str]], shard_index: int, shard_count: int) -> Set[Tuple[str, str, str]]:
+    """Select the tests of a shard, i going from 1 to N, out of their test suite, decoder and test vector.
+
+    The tests are dealt in turn to the shards in the order of their names.
+    The split only depends on the tests defined by the test suites and the
+    decoders selected, never on what the runner has available, such as the
+    decoders it can run or the resources it has downloaded, so every runner
+    computes the same split.
+    """
+    return {test for position, test in enumerate(sorted(tests)) if position % shard_count == shard_index - 1}
+
+
+class SuiteRun:
+    """Tests of a test suite and decoder pair along with their results"""
+
+    def __init__(
+        self,
+        test_suite: Any,  # can't use TestSuite type because of circular dependency
+        tests: List[Test],
+        restored: Optional[List[Test]] = None,
+        priority: int = 0,
+        events: Optional[EventQueue] = None,
+    ):
+        self.test_suite = test_suite
+        self.tests = tests
+        # Pairs with a higher priority have their tests dispatched first
+        self.priority = priority
+        # Events of this pair only, besides the ones of the whole run
+        self.events = events
+        # Tests that already finished in a previous run, with their results restored
+        self.restored = restored or []
+        self.decoder = (tests + self.restored)[0].decoder
+        self.results: List[TestVector] = [test.test_vector for test in self.restored]
+        # Tests that couldn't be run at all, which have no result
+        self.errored = 0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        # When every test was first dispatched and the spans of the tests finished
+        self._dispatch_times: Dict[str, float] = {}
+        self._spans: List[Tuple[float, float]] = []
+
+    @property
+    def tests_count(self) -> int:
+        """Number of tests of the pair, including the ones restored"""
+        return len(self.tests) + len(self.restored)
+
+    @property
+    def finished(self) -> bool:
+        return len(self.results) + self.errored >= self.tests_count
+
+    @property
+    def time_taken(self) -> float:
+        """Wall-clock time elapsed between the first test dispatched and the last one finished"""
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+    @property
+    def decode_time(self) -> float:
+        """Wall-clock time with tests of the pair running, leaving out the waits behind the tests of other pairs"""
+        decode_time = 0.0
+        busy_until = 0.0
+        for start, end in sorted(self._spans):
+            decode_time += max(0.0, end - max(start, busy_until))
+            busy_until = max(busy_until, end)
+        return decode_time
+
+    def test_dispatched(self, test: Test) -> None:
+        """Account for a test of the pair handed out to run"""
+        now = perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        self._dispatch_times.setdefault(test.test_vector.name, now)
+
+    def test_finished(self, test: Test) -> None:
+        """Account for a test of the pair that has finished"""
+        self.end_time = perf_counter()
+        self._spans.append((self._dispatch_times.get(test.test_vector.name, self.end_time), self.end_time))
+
+
+class Scheduler:
+    """Runs the tests of several test suite and decoder pairs on a single pool of workers.
+
+    Tests are handed to the pool only when a worker is free, so that every
+    suite gets accurate timings and no core is left idle while there is
+    still work pending for any of the pairs. When a history of decode times
+    is given, the most expensive tests are dispatched first so that a long
+    test vector doesn't start last and delay the end of the whole run.
+
+    With the threads engine the tests run in threads of this same process,
+    which avoids pickling every test along with its whole test suite. The
+    decoders are external processes most of the time so the GIL is seldom
+    the bottleneck.
+
+    The pipeline engine runs the tests in threads as well, split in stages
+    with a concurrency of their own: at most jobs decoder processes run at
+    the same time, while up to verify_jobs tests hash and compare their
+    outputs. Another test is started as soon as a decoder exits, so the
+    number of tests in flight, and thus the queue in front of every stage,
+    is bounded by the sum of both.
+
+    Besides the total number of jobs, the tests of a decoder are limited by
+    its max_jobs, and the hardware decoders are limited to hw_jobs per device
+    since they saturate their fixed-function engine or driver queue long
+    before the CPU cores. Software decoders keep using the rest of the jobs
+    meanwhile. The tests of hardware decoders able to use several devices
+    are bound to the least busy one, in round-robin order, so that throughput
+    scales with the number of devices.
+
+    When min_free_space is given, a test is held back while the free space
+    in its output directory, minus the output expected from the tests
+    already running, would drop below it. This throttles the run instead of
+    making every job fail once the disk fills up.
+
+    In adaptive mode, the number of tests running grows and shrinks within
+    jobs following the pressure stall information of the host, so that a
+    shared host is neither oversubscribed nor underused.
+
+    With cpu_affinity, every test is pinned to a set of CPUs of its own for
+    as long as it runs, and the decoders able to set their number of threads
+    run as many as CPUs they get, so that the timings are stable and the
+    decoders keep their caches warm instead of migrating across sockets.
+
+    The tests in failed_first, by test suite, decoder and test vector, are
+    dispatched before the rest, so that the ones that failed last time are
+    the first to report whether they have been fixed.
+
+    Tests can also be added while the scheduler is running, to be dispatched
+    along with the ones pending, after those of a higher priority. Serving
+    waits for more tests until close is called instead of returning, so that
+    a long running service can share a single pool of workers among all the
+    runs requested.
+
+    When a journal is given, every result is appended to it as soon as the
+    test finishes so that an interrupted run can be resumed. When an event
+    stream is given, the suites starting and finishing and the tests being
+    dispatched and finishing are written to it as they happen.
+    """
+
+    def __init__(
+        self,
+        jobs: int,
+        failfast: bool = False,
+        history: Optional[TestHistory] = None,
+        engine: str = Engine.PROCESSES.value,
+        hw_jobs: int = DEFAULT_HW_JOBS,
+        min_free_space: Optional[int] = None,
+        adaptive: bool = False,
+        journal: Optional[ResultsJournal] = None,
+        events: Optional[EventStream] = None,
+        cpu_affinity: bool = False,
+        verify_jobs: Optional[int] = None,
+        failed_first: Optional[Set[Tuple[str, str, str]]] = None,
+    ):
+        self.jobs = jobs
+        self.failfast = failfast
+        self.history = history
+        self.engine = Engine(engine)
+        self.hw_jobs = max(1, hw_jobs)
+        self.min_free_space = min_free_space
+        self.adaptive = adaptive
+        self.journal = journal
+        self.events = events
+        self.cpu_affinity = cpu_affinity
+        self.verify_jobs = verify_jobs if verify_jobs is not None else max(1, jobs // 2)
+        self.failed_first = failed_first or set()
+        self._pressure: Optional[PressureController] = None
+        self._cpu_slots: Optional[CpuSlots] = None
+        self.suite_runs: List[SuiteRun] = []
+        # Tests pending to run per decoder, along with their priority and position in the order of dispatch
+        self._pending: Dict[str, Deque[Tuple[Tuple[int, int], SuiteRun, Test]]] = {}
+        self._next_index = 0
+        self._running = 0
+        self._running_decoders: Dict[str, int] = {}
+        # Devices of every hardware decoder, None standing for the default one
+        self._devices: Dict[str, List[Optional[str]]] = {}
+        self._next_device: Dict[str, int] = {}
+        # Tests running per device, keyed by _device_key
+        self._running_devices: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        # Bytes expected to be written by the tests running
+        self._reserved_space = 0.0
+        self._stopped = False
+        self._closed = False
+        self._pool: Any = None
+        self._cond = threading.Condition()
+
+    def add(
+        self,
+        test_suite: Any,
+        tests: List[Test],
+        restored: Optional[List[Test]] = None,
+        priority: int = 0,
+        events: Optional[EventQueue] = None,
+    ) -> SuiteRun:
+        """Add the tests of a test suite and decoder pair to be run, along with the ones already finished"""
+        suite_run = SuiteRun(test_suite, tests, restored, priority, events)
+        with self._cond:
+            self.suite_runs.append(suite_run)
+            if self._pool is not None:
+                # Already running, the tests are queued right away
+                self._enqueue(self._ordered_tests([suite_run]))
+                self._dispatch(self._pool)
+        return suite_run
+
+    def remove(self, suite_run: SuiteRun) -> None:
+        """Forget a pair, dropping its tests that are still pending"""
+        with self._cond:
+            if suite_run in self.suite_runs:
+                self.suite_runs.remove(suite_run)
+            for queue in self._pending.values():
+                for job in [job for job in queue if job[1] is suite_run]:
+                    queue.remove(job)
+
+    def close(self) -> None:
+        """Let a run started with keep_running return once the tests added have finished"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _ordered_tests(self, suite_runs: Optional[List[SuiteRun]] = None) -> List[Tuple[SuiteRun, Test]]:
+        """Tests of the pairs in order of dispatch, the most expensive first when there is a history"""
+        if suite_runs is None:
+            suite_runs = self.suite_runs
+        pending = [(suite_run, test) for suite_run in suite_runs for test in suite_run.tests]
+        if self.history is not None:
+            history = self.history
+            pending.sort(key=lambda job: history.estimate(job[1]), reverse=True)
+        if self.failed_first:
+            failed_first = self.failed_first
+            pending.sort(
+                key=lambda job: (
+                    (job[1].test_suite.name, job[1].decoder.name, job[1].test_vector.name) not in failed_first
+                )
+            )
+        pending.sort(key=lambda job: -job[0].priority)
+        return pending
+
+    def _enqueue(self, jobs: List[Tuple[SuiteRun, Test]]) -> None:
+        """Queue tests in order of dispatch, behind the pending ones of the same or a higher priority.
+
+        Must be called with the lock held.
+        """
+        for suite_run, test in jobs:
+            decoder = test.decoder
+            key = (-suite_run.priority, self._next_index)
+            self._next_index += 1
+            queue = self._pending.setdefault(decoder.name, deque())
+            position = len(queue)
+            while position and queue[position - 1][0] > key:
+                position -= 1
+            queue.insert(position, (key, suite_run, test))
+            self._running_decoders.setdefault(decoder.name, 0)
+            if decoder.concurrency_class == ConcurrencyClass.HARDWARE and decoder.name not in self._devices:
+                self._devices[decoder.name] = list(decoder.devices()) or [None]
+
+    def _emit(self, event: str, suite_run: SuiteRun, **fields: Any) -> None:
+        if self.events is not None:
+            self.events.emit(event, test_suite=suite_run.test_suite.name, decoder=suite_run.decoder.name, **fields)
+        if suite_run.events is not None:
+            suite_run.events.emit(event, test_suite=suite_run.test_suite.name, decoder=suite_run.decoder.name, **fields)
+
+    def _emit_suite_finished(self, suite_run: SuiteRun) -> None:
+        results: Dict[str, int] = {}
+        for test_vector in suite_run.results:
+            results[test_vector.test_result.value] = results.get(test_vector.test_result.value, 0) + 1
+        self._emit(
+            "suite_finished",
+            suite_run,
+            finished=suite_run.finished,
+            results=results,
+            errored=suite_run.errored,
+            time_taken=suite_run.time_taken,
+        )
+
+    def _on_dispatch(self, suite_run: SuiteRun, test: Test, worker: Optional[str] = None) -> None:
+        """Account for a test handed out to run. Must be called with the lock held"""
+        if suite_run.start_time is None:
+            self._emit("suite_started", suite_run, test_vectors=suite_run.tests_count)
+        suite_run.test_dispatched(test)
+        self._emit(
+            "vector_dispatched",
+            suite_run,
+            test_vector=test.test_vector.name,
+            device=test.decoder.device,
+            cpus=test.decoder.cpus,
+            worker=worker,
+        )
+
+    def _record_result(self, suite_run: SuiteRun, test: Test, test_vector: TestVector) -> None:
+        """Store the result of a test that has just been run. Must be called with the lock held"""
+        suite_run.results.append(test_vector)
+        if self.history is not None:
+            self.history.record(test, test_vector)
+        if self.journal is not None:
+            self.journal.record(test, test_vector)
+        self._emit(
+            "vector_finished",
+            suite_run,
+            test_vector=test_vector.name,
+            result=test_vector.test_result.value,
+            test_time=test_vector.test_time,
+            cached=test_vector.cached,
+        )
+        if suite_run.finished:
+            self._emit_suite_finished(suite_run)
+        suite_run.test_suite.print_test_vector_result(suite_run.decoder.name, test_vector)
+        if self.failfast and test_vector.errors and not suite_run.test_suite.negative_test:
+            self._stopped = True
+
+    def _record_error(self, suite_run: SuiteRun, test: Test, err: BaseException) -> None:
+        """Account for a test that couldn't be run at all. Must be called with the lock held"""
+        suite_run.errored += 1
+        self._emit("vector_finished", suite_run, test_vector=test.test_vector.name, result=None, error=str(err))
+        if suite_run.finished:
+            self._emit_suite_finished(suite_run)
+
+    def _emit_unfinished(self) -> None:
+        """Close the suites left unfinished when the run is stopped"""
+        for suite_run in self.suite_runs:
+            if suite_run.start_time is not None and not suite_run.finished:
+                self._emit_suite_finished(suite_run)
+
+    def run(self) -> None:
+        """Run all the tests added, returning once all of them have finished"""
+        self._run(keep_running=False)
+
+    def serve(self) -> None:
+        """Run the tests added, including the ones added meanwhile, until close is called"""
+        self._run(keep_running=True)
+
+    def _run(self, keep_running: bool) -> None:
+        self._pending = {}
+        self._next_index = 0
+        self._running = 0
+        self._running_decoders = {}
+        self._devices = {}
+        self._next_device = {}
+        self._running_devices = {}
+        self._reserved_space = 0.0
+        self._stopped = False
+        self._pressure = None
+        if self.adaptive:
+            if is_pressure_available():
+                self._pressure = PressureController(self.jobs)
+            else:
+                print("Pressure stall information not available, running a fixed number of jobs")
+        self._cpu_slots = None
+        if self.cpu_affinity:
+            if is_affinity_available():
+                self._cpu_slots = CpuSlots(self.jobs)
+                print(f"Pinning every job to {self._cpu_slots.cpus_per_job} CPU(s)")
+            else:
+                print("CPU affinity not available, running the jobs unpinned")
+        if self.engine == Engine.PIPELINE:
+            # The commands are pinned as they take a slot of the decode stage, the tests verifying don't hold any CPUs
+            cpu_slots = self._cpu_slots.slots if self._cpu_slots is not None else None
+            set_pipeline_stages(PipelineStages(self.jobs, self.verify_jobs, cpu_slots))
+        if self.engine == Engine.PROCESSES:
+            # Every decoder runs in a process group of its own, which the workers kill when terminated
+            pool = Pool(self.jobs, kill_commands_on_termination)
+        else:
+            pool = ThreadPool(self._tests_in_flight(self.jobs))
+        try:
+            with pool:
+                with self._cond:
+                    # The tests added from now on are queued as they come
+                    self._enqueue(self._ordered_tests())
+                    self._pool = pool
+                    self._dispatch(pool)
+                    while (
+                        self._running or any(self._pending.values()) or (keep_running and not self._closed)
+                    ) and not self._stopped:
+                        if self._pressure is None:
+                            self._cond.wait()
+                        else:
+                            # Wake up periodically to follow the pressure even if no test finishes
+                            self._cond.wait(PRESSURE_INTERVAL)
+                            self._dispatch(pool)
+                    self._pool = None
+                if self._stopped:
+                    kill_running_commands()
+                    pool.terminate()
+                else:
+                    pool.close()
+                    pool.join()
+            with self._cond:
+                self._emit_unfinished()
+        finally:
+            with self._cond:
+                self._pool = None
+            # Ctrl-C included, no decoder started by the threads of this process is left running
+            kill_running_commands()
+            set_pipeline_stages(None)
+
+    def _tests_in_flight(self, jobs: int) -> int:
+        """Tests that can be running at the same time with the given number of jobs"""
+        if self.engine == Engine.PIPELINE:
+            return jobs + self.verify_jobs
+        return jobs
+
+    @staticmethod
+    def _device_key(decoder: Decoder, device: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Key of a device in the tests running, shared by every decoder using it.
+
+        The default device of a decoder that doesn't tell its devices is
+        unknown, so it only counts the tests of that decoder.
+        """
+        return (None, device) if device is not None else (decoder.name, None)
+
+    def _running_on(self, decoder: Decoder, device: Optional[str]) -> int:
+        return self._running_devices.get(self._device_key(decoder, device), 0)
+
+    def _free_devices(self, decoder: Decoder) -> List[Optional[str]]:
+        """Devices of a hardware decoder below hw_jobs, starting from the next one in round-robin order"""
+        devices = self._devices[decoder.name]
+        start = self._next_device.get(decoder.name, 0)
+        devices = devices[start:] + devices[:start]
+        return [device for device in devices if self._running_on(decoder, device) < self.hw_jobs]
+
+    def _can_run(self, decoder: Decoder) -> bool:
+        if decoder.max_jobs and self._running_decoders[decoder.name] >= decoder.max_jobs:
+            return False
+        return decoder.concurrency_class != ConcurrencyClass.HARDWARE or bool(self._free_devices(decoder))
+
+    def _bind_device(self, test: Test) -> None:
+        """Bind the test to the least busy device of its decoder"""
+        decoder = test.decoder
+        if decoder.concurrency_class != ConcurrencyClass.HARDWARE:
+            return
+        device = min(self._free_devices(decoder), key=lambda device: self._running_on(decoder, device))
+        devices = self._devices[decoder.name]
+        self._next_device[decoder.name] = (devices.index(device) + 1) % len(devices)
+        if device is not None:
+            test.decoder = decoder.with_device(device)
+
+    def _bind_cpus(self, test: Test) -> None:
+        """Pin the test to a free set of CPUs"""
+        if self._cpu_slots is None:
+            return
+        if self.engine == Engine.PIPELINE:
+            # Pinned by the decode stage, which only tells the CPUs once the commands run
+            test.decoder = test.decoder.with_threads(self._cpu_slots.cpus_per_job)
+        else:
+            test.decoder = test.decoder.with_cpus(self._cpu_slots.acquire())
+
+    def _estimate_output_size(self, test: Test) -> float:
+        if self.history is not None:
+            return self.history.estimate_output_size(test)
+        return TestHistory.default_output_size(test)
+
+    def _has_free_space(self, test: Test, output_size: float) -> bool:
+        """Whether there is room for the output of the test, always true when nothing else is running"""
+        if self.min_free_space is None or not self._running:
+            return True
+        try:
+            free_space = shutil.disk_usage(test.output_dir).free
+        except OSError:
+            return True
+        return free_space - self._reserved_space - output_size >= self.min_free_space
+
+    def _update_running(self, decoder: Decoder, count: int) -> None:
+        self._running += count
+        self._running_decoders[decoder.name] += count
+        if decoder.concurrency_class == ConcurrencyClass.HARDWARE:
+            key = self._device_key(decoder, decoder.device)
+            self._running_devices[key] = self._running_devices.get(key, 0) + count
+
+    def _dispatch(self, pool: Any) -> None:
+        """Submit pending tests while there are free workers. Must be called with the lock held"""
+        max_running = self._tests_in_flight(self._pressure.update() if self._pressure is not None else self.jobs)
+        while self._running < max_running and not self._stopped:
+            # Take the first test in order of dispatch among the decoders that are below their limits
+            queues = [queue for queue in self._pending.values() if queue and self._can_run(queue[0][2].decoder)]
+            if not queues:
+                break
+            queue = min(queues, key=lambda queue: queue[0][0])
+            _, suite_run, test = queue[0]
+            output_size = self._estimate_output_size(test) if self.min_free_space is not None else 0.0
+            if not self._has_free_space(test, output_size):
+                # Wait for the tests running to finish and free their outputs
+                break
+            queue.popleft()
+            self._bind_device(test)
+            self._bind_cpus(test)
+            self._on_dispatch(suite_run, test)
+            self._update_running(test.decoder, 1)
+            self._reserved_space += output_size
+
+            def _callback(
+                test_vector: TestVector,
+                suite_run: SuiteRun = suite_run,
+                test: Test = test,
+                output_size: float = output_size,
+            ) -> None:
+                self._on_result(pool, suite_run, test, output_size, test_vector)
+
+            def _error_callback(
+                err: BaseException, suite_run: SuiteRun = suite_run, test: Test = test, output_size: float = output_size
+            ) -> None:
+                print(f"\nError running test vector {test.test_vector.name} of {suite_run.test_suite.name}: {err}\n")
+                self._on_result(pool, suite_run, test, output_size, None, err)
+
+            pool.apply_async(
+                suite_run.test_suite.run_worker,
+                (test,),
+                callback=_callback,
+                error_callback=_error_callback,
+            )
+
+    def _on_result(
+        self,
+        pool: Any,
+        suite_run: SuiteRun,
+        test: Test,
+        output_size: float,
+        test_vector: Optional[TestVector],
+        err: Optional[BaseException] = None,
+    ) -> None:
+        with self._cond:
+            self._update_running(test.decoder, -1)
+            self._reserved_space -= output_size
+            if self._cpu_slots is not None and test.decoder.cpus is not None:
+                self._cpu_slots.release(test.decoder.cpus)
+            suite_run.test_finished(test)
+            if test_vector is not None:
+                self._record_result(suite_run, test, test_vector)
+            elif err is not None:
+                self._record_error(suite_run, test, err)
+            self._dispatch(pool)
+            self._cond.notify()
+        # Syncing the journal to disk is slow, don't hold back the other results meanwhile
+        if self.journal is not None:
+            self.journal.sync()
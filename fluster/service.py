@@ -0,0 +1,243 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import queue
+import select
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from shutil import rmtree
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fluster.decoder import Decoder
+from fluster.events import EventQueue, make_event
+from fluster.scheduler import Scheduler, SuiteRun
+from fluster.test import Test
+from fluster.test_suite import TestSuite
+
+# The service answers these requests, all of them in JSON:
+#   GET /test-suites  test suites loaded, with their codec and number of test vectors
+#   GET /decoders     decoders loaded, with their codec and whether they can be run
+#   POST /runs        run the tests of the test suites, decoders and test vector patterns given, along with the
+#                     priority of the run. The response is made of the events of the run, one line of JSON each,
+#                     written as they happen and ending with a run_finished one.
+
+# Port the service listens on when none is given
+DEFAULT_SERVICE_PORT = 8910
+# Secs between the checks of whether the client of a run is still connected while no event happens
+CLIENT_CHECK_INTERVAL = 0.5
+
+# Prepares the tests of a run request, with its outputs in the directory given, raising ValueError when the
+# request is not valid
+Preparer = Callable[[Dict[str, Any], str], List[Tuple[TestSuite, List[Test]]]]
+
+
+class _Run:
+    """Tests of a request being run, along with their events"""
+
+    def __init__(self, run_id: int, output_dir: str):
+        self.id = run_id
+        self.output_dir = output_dir
+        self.events = EventQueue()
+        self.suite_runs: List[SuiteRun] = []
+
+
+class Service:
+    """Runs the tests requested over a local HTTP API, all of them on a single scheduler.
+
+    The test suites, the decoders and whether they can be run are loaded
+    once when starting, instead of every time fluster runs. The tests of
+    every request are added to the scheduler as soon as they arrive, behind
+    the ones of a higher priority, so the CI jobs of a host share its jobs
+    instead of each one starting as many as cores. The events of a request
+    stream back while its tests run, and the tests still pending of a client
+    that disconnects are dropped.
+    """
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        scheduler: Scheduler,
+        test_suites: List[TestSuite],
+        decoders: List[Decoder],
+        prepare: Preparer,
+        output_dir: str,
+        keep_files: bool = False,
+    ):
+        self.address = address
+        self.scheduler = scheduler
+        self.test_suites = test_suites
+        self.decoders = decoders
+        self.prepare = prepare
+        self.output_dir = output_dir
+        self.keep_files = keep_files
+        self._server: Optional[_Server] = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def listen(self) -> None:
+        """Start listening for requests, updating the address with the port actually bound"""
+        if self._server is not None:
+            return
+        self._server = _Server(self.address, _RequestHandler)
+        self._server.service = self
+        self.address = (self.address[0], self._server.server_address[1])
+
+    def run(self) -> None:
+        """Serve the requests until the scheduler is closed"""
+        self.listen()
+        assert self._server is not None
+        print(f"Serving on http://{self.address[0]}:{self.address[1]}", flush=True)
+        server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            self.scheduler.serve()
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def close(self) -> None:
+        """Stop serving once the tests already requested have finished"""
+        self.scheduler.close()
+
+    def list_test_suites(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": test_suite.name, "codec": test_suite.codec.value, "test_vectors": len(test_suite.test_vectors)}
+            for test_suite in self.test_suites
+        ]
+
+    def list_decoders(self) -> List[Dict[str, Any]]:
+        # The checks are cached, so they are only run the first time
+        return [
+            {"name": decoder.name, "codec": decoder.codec.value, "available": decoder.check(False)}
+            for decoder in self.decoders
+        ]
+
+    def start_run(self, request: Dict[str, Any]) -> _Run:
+        """Add the tests of a request to the scheduler, raising ValueError when the request is not valid"""
+        priority = request.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError("priority must be an integer")
+        with self._lock:
+            self._next_id += 1
+            run = _Run(self._next_id, os.path.join(self.output_dir, f"run{self._next_id}"))
+        prepared = self.prepare(request, run.output_dir)
+        if not prepared:
+            self._clean_up(run)
+            raise ValueError("no tests to run for the request")
+        run.events.emit("run_queued", id=run.id, priority=priority, tests=sum(len(tests) for _, tests in prepared))
+        run.suite_runs = [
+            self.scheduler.add(test_suite, tests, priority=priority, events=run.events)
+            for test_suite, tests in prepared
+        ]
+        return run
+
+    def follow_run(
+        self, run: _Run, write: Callable[[Dict[str, Any]], None], connected: Callable[[], bool] = lambda: True
+    ) -> None:
+        """Hand the events of a run to write as they happen until it finishes.
+
+        The run is dropped as soon as connected tells the client is gone, or
+        when write fails.
+        """
+        finished = 0
+        try:
+            while finished < len(run.suite_runs):
+                # A run can go on for long without any event, the client is checked meanwhile
+                if not connected():
+                    raise ConnectionResetError("the client disconnected")
+                try:
+                    event = run.events.get(CLIENT_CHECK_INTERVAL)
+                except queue.Empty:
+                    continue
+                write(event)
+                if event["event"] == "suite_finished":
+                    finished += 1
+            success = all(
+                not suite_run.errored and not any(test_vector.errors for test_vector in suite_run.results)
+                for suite_run in run.suite_runs
+            )
+            write(make_event("run_finished", id=run.id, success=success))
+        except OSError:
+            print(f"\nThe client of run {run.id} is gone, dropping its pending tests")
+        finally:
+            for suite_run in run.suite_runs:
+                self.scheduler.remove(suite_run)
+            self._clean_up(run)
+
+    def _clean_up(self, run: _Run) -> None:
+        if not self.keep_files and os.path.isdir(run.output_dir):
+            rmtree(run.output_dir, ignore_errors=True)
+
+
+class _Server(ThreadingHTTPServer):
+    # Requests still streaming events don't hold the service back from stopping
+    daemon_threads = True
+    service: Service
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: _Server
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/test-suites":
+            self._send_json(200, self.server.service.list_test_suites())
+        elif self.path == "/decoders":
+            self._send_json(200, self.server.service.list_decoders())
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path != "/runs":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("the request must be a JSON object")
+            run = self.server.service.start_run(request)
+        except ValueError as ex:
+            self._send_json(400, {"error": str(ex)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        self.server.service.follow_run(run, self._write_event, self._connected)
+
+    def _connected(self) -> bool:
+        # The client sends nothing else once the request has been read, so the connection only becomes
+        # readable when it is closed
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return not readable or self.connection.recv(1, socket.MSG_PEEK) != b""
+        except OSError:
+            return False
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, code: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
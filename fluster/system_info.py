@@ -17,6 +17,7 @@
 
 import ctypes
 import ctypes.util
+import glob
 import os
 import platform
 import re
@@ -670,6 +671,23 @@ class SystemInfo:
 
         return _has_compressed(["--list-formats-out"]) and _has_uncompressed(["--list-formats"])
 
+    @classmethod
+    def _v4l2_m2m_decoders(cls) -> List[Tuple[str, str]]:
+        """Return the card type and node of the V4L2 M2M decoder devices found via v4l2-ctl (Linux only)"""
+        listing = run_command_with_output(["v4l2-ctl", "-A"], check=False)
+        if not listing:
+            return []
+
+        video_nodes = [line.strip() for line in listing.split("\n") if line.strip().startswith("/dev/video")]
+
+        devices = []
+        for node in video_nodes:
+            card = cls._v4l2_card_type(node)
+            if card is None or not cls._v4l2_is_decoder(node):
+                continue
+            devices.append((card, node))
+        return devices
+
     @classmethod
     def _detect_v4l2_m2m(cls) -> Optional[str]:
         """Detect V4L2 memory-to-memory (M2M) decoder devices via v4l2-ctl (Linux only).
@@ -678,19 +696,7 @@ class SystemInfo:
         unavailable or no M2M decoder is present.
         """
         try:
-            listing = run_command_with_output(["v4l2-ctl", "-A"], check=False)
-            if not listing:
-                return None
-
-            video_nodes = [line.strip() for line in listing.split("\n") if line.strip().startswith("/dev/video")]
-
-            devices = []
-            for node in video_nodes:
-                card = cls._v4l2_card_type(node)
-                if card is None or not cls._v4l2_is_decoder(node):
-                    continue
-                devices.append(f"{card} ({node})")
-
+            devices = [f"{card} ({node})" for card, node in cls._v4l2_m2m_decoders()]
             if devices:
                 return ", ".join(devices)
         except (OSError, ValueError):
@@ -698,6 +704,19 @@ class SystemInfo:
 
         return None
 
+    @classmethod
+    def get_v4l2_m2m_decoder_nodes(cls) -> List[str]:
+        """Return the nodes of the V4L2 M2M decoder devices (Linux only)"""
+        try:
+            return [node for _, node in cls._v4l2_m2m_decoders()]
+        except (OSError, ValueError):
+            return []
+
+    @staticmethod
+    def get_render_nodes() -> List[str]:
+        """Return the DRM render nodes of the GPUs, e.g. /dev/dri/renderD128 (Linux only)"""
+        return sorted(glob.glob("/dev/dri/renderD*"), key=lambda node: (len(node), node))
+
     @staticmethod
     def _detect_directx() -> Optional[str]:
         """Detect DirectX version on Windows"""
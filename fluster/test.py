@@ -12,11 +12,25 @@ import unittest
 from abc import abstractmethod
 from subprocess import TimeoutExpired
 from time import perf_counter
-from typing import Any
+from typing import Any, List, Optional
 
+from fluster.cache import ResultCache
 from fluster.decoder import Decoder, NotSupportedError
 from fluster.test_vector import TestVector, TestVectorResult
-from fluster.utils import compare_wav_files, compare_yuv_files, normalize_path
+from fluster.utils import (
+    FifoChecksum,
+    LimitExceededError,
+    ProgressWatchdog,
+    ResourceLimits,
+    compare_wav_files,
+    compare_yuv_files,
+    fifo_output,
+    limit_resources,
+    normalize_path,
+    pin_to_cpus,
+    pipeline_wait,
+    watch_progress,
+)
 
 
 class Test(unittest.TestCase):
@@ -33,6 +47,7 @@ class Test(unittest.TestCase):
         timeout: int,
         keep_files: bool,
         verbose: bool,
+        cache: Optional[ResultCache] = None,
     ):
         self.decoder = decoder
         self.test_suite = test_suite
@@ -44,6 +59,13 @@ class Test(unittest.TestCase):
         self.timeout = timeout
         self.keep_files = keep_files
         self.verbose = verbose
+        self.cache = cache
+        # Secs without progress after which the decoder is killed, None to wait for the timeout
+        self.stall_timeout: Optional[int] = None
+        self.limits: Optional[ResourceLimits] = None
+        # Whether the output is a named pipe hashed as it is written instead of a file
+        self.fifo = False
+        self._fifo_checksum: Optional[FifoChecksum] = None
         self._keep_files_during_test = False
         self.test_vector_result = self.test_suite.test_vectors[self.test_vector.name]
 
@@ -54,6 +76,14 @@ class Test(unittest.TestCase):
         # Initialize file paths
         self._initialize_file_paths()
 
+    def id(self) -> str:
+        return f"{self.decoder.name}.{self.test_suite.name}.{self.test_vector.name}"
+
+    def __str__(self) -> str:
+        # Identify the test by decoder and test suite instead of by class, so
+        # that errors can be told apart when several suites run together
+        return f"{self.test_vector.name} ({self.id()})"
+
     def _find_input_path(self, input_file: str) -> str:
         if os.path.sep in input_file:
             path_option1 = normalize_path(os.path.join(self.resources_dir, self.test_suite.name, input_file))
@@ -94,36 +124,70 @@ class Test(unittest.TestCase):
         if not self.keep_files and os.path.exists(self.output_filepath):
             os.remove(self.output_filepath)
 
+    def _output_files(self) -> List[str]:
+        """Files written by the test"""
+        return [self.output_filepath]
+
     def _test_wrapper(self) -> None:
         try:
             self._test()
         finally:
+            self.test_vector_result.output_size = sum(
+                os.path.getsize(filepath) for filepath in self._output_files() if os.path.isfile(filepath)
+            )
+            if self._fifo_checksum is not None:
+                # What the decoder wrote to the pipe, as it would have taken on the disk
+                self.test_vector_result.output_size += self._fifo_checksum.size
             self._cleanup_if_needed()
 
+    @staticmethod
+    def _clock() -> float:
+        """Time that leaves out the waits for the stages of the pipeline engine, which aren't part of the test"""
+        return perf_counter() - pipeline_wait()
+
     def _test(self) -> None:
         """Execute the test and process results."""
         if self.skip:
             self.test_vector_result.test_result = TestVectorResult.NOT_RUN
             return
 
-        start = perf_counter()
+        start = self._clock()
 
         try:
-            result = self._execute_decode()
-            self.test_vector_result.test_time = perf_counter() - start
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self.decoder, self.test_suite.name, self.test_vector)
+            if cached is not None:
+                result, self.test_vector_result.test_time = cached
+                self.test_vector_result.cached = True
+            else:
+                watchdog = ProgressWatchdog(self.stall_timeout, self._output_files()) if self.stall_timeout else None
+                fifo = self.output_filepath if self.fifo else None
+                with watch_progress(watchdog), pin_to_cpus(self.decoder.cpus), limit_resources(self.limits):
+                    with fifo_output(fifo) as self._fifo_checksum:
+                        result = self._execute_decode()
+                self.test_vector_result.test_time = self._clock() - start
+                if self.cache is not None:
+                    self.cache.put(
+                        self.decoder, self.test_suite.name, self.test_vector, result, self.test_vector_result.test_time
+                    )
         except NotSupportedError as ex:
             self.test_vector_result.test_result = TestVectorResult.NOT_SUPPORTED
-            self.test_vector_result.test_time = perf_counter() - start
+            self.test_vector_result.test_time = self._clock() - start
             if self.verbose:
                 print(f"  {self.test_vector.name}: {ex.message}")
             return
+        except LimitExceededError:
+            self.test_vector_result.test_result = TestVectorResult.LIMIT_EXCEEDED
+            self.test_vector_result.test_time = self._clock() - start
+            raise
         except TimeoutExpired:
             self.test_vector_result.test_result = TestVectorResult.TIMEOUT
-            self.test_vector_result.test_time = perf_counter() - start
+            self.test_vector_result.test_time = self._clock() - start
             raise
         except Exception:
             self.test_vector_result.test_result = TestVectorResult.ERROR
-            self.test_vector_result.test_time = perf_counter() - start
+            self.test_vector_result.test_time = self._clock() - start
             raise
 
         if self.reference:
@@ -204,6 +268,9 @@ class ReferenceComparisonTest(Test):
             self.test_vector.optional_params,
         )
 
+    def _output_files(self) -> List[str]:
+        return super()._output_files() + [self.reference_filepath, self.reference_filepath + self._ref_file_extension]
+
     def _cleanup_if_needed(self) -> None:
         super()._cleanup_if_needed()
         for filepath in [self.reference_filepath, self.reference_filepath + self._ref_file_extension]:
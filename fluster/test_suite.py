@@ -25,13 +25,14 @@ from enum import Enum
 from functools import lru_cache
 from multiprocessing import Pool
 from shutil import rmtree
-from time import perf_counter
-from typing import Any, Dict, List, Optional, Set, Type, cast
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, cast
 from unittest.result import TestResult
 
 from fluster import utils
+from fluster.cache import ResultCache
 from fluster.codec import Codec
 from fluster.decoder import Decoder, get_reference_decoder_for_codec
+from fluster.scheduler import Engine, Scheduler
 from fluster.test import MD5ComparisonTest, PixelComparisonTest, ReferenceComparisonTest, SampleComparisonTest, Test
 from fluster.test_vector import TestVector, TestVectorResult
 
@@ -101,6 +102,12 @@ class Context:
         verbose: bool = False,
         reference_decoder: Optional[Decoder] = None,
         test_vector_names: Optional[Set[str]] = None,
+        engine: str = Engine.PROCESSES.value,
+        remote: bool = False,
+        cache: Optional[ResultCache] = None,
+        stall_timeout: Optional[int] = None,
+        limits: Optional[utils.ResourceLimits] = None,
+        fifo: bool = False,
     ):
         self.jobs = jobs
         self.decoder = decoder
@@ -116,6 +123,13 @@ class Context:
         self.verbose = verbose
         self.reference_decoder = reference_decoder
         self.test_vector_names = test_vector_names
+        self.engine = engine
+        # Whether the tests are run by remote workers with their own decoders and resources
+        self.remote = remote
+        self.cache = cache
+        self.stall_timeout = stall_timeout
+        self.limits = limits
+        self.fifo = fifo
 
 
 class TestMethod(Enum):
@@ -163,6 +177,8 @@ class TestSuite:
         self.test_vectors_not_run = 0
         self.test_vectors_not_supported = 0
         self.time_taken = 0.0
+        # Widths of the columns of the table of results, when shared with other test suites
+        self.results_widths: Optional[Tuple[int, int, int]] = None
 
     def clone(self) -> "TestSuite":
         """Create a deep copy of the object"""
@@ -196,6 +212,7 @@ class TestSuite:
             data.pop("test_vectors_not_run")
             data.pop("test_vectors_not_supported")
             data.pop("time_taken")
+            data.pop("results_widths")
             if self.failing_test_vectors is None:
                 data.pop("failing_test_vectors")
             else:
@@ -364,12 +381,6 @@ class TestSuite:
 
         print("All downloads finished")
 
-    @staticmethod
-    def _rename_test(test: Test, module: str, qualname: str) -> None:
-        test_cls = type(test)
-        test_cls.__module__ = module
-        test_cls.__qualname__ = qualname
-
     @staticmethod
     def _collect_results(test_result: TestResult) -> None:
         """Collect all TestResults with error to add them into the test vectors"""
@@ -380,17 +391,8 @@ class TestSuite:
             test_vector = cast(Test, res[0]).test_vector
             test_vector.errors.append([str(x) for x in res])
 
-    def _run_worker(self, test: Test) -> TestVector:
+    def run_worker(self, test: Test) -> TestVector:
         """Run one unit test returning the TestVector"""
-        # Save the original module and qualname to restore it before returning
-        # the TestVector. Otherwise, Pickle will complain if the classes can't
-        # be found in global scope. The trick here is that we change the names
-        # momentarily just to obtain the error traces in str format
-        test_cls = type(test)
-        module_orig = test_cls.__module__
-        qualname_orig = test_cls.__qualname__
-        self._rename_test(test, test.decoder.name, test.test_suite.name)
-
         test_result = TestResult()
         test(test_result)
 
@@ -402,8 +404,6 @@ class TestSuite:
             elif test.test_vector.test_result == TestVectorResult.FAIL:
                 test.test_vector.test_result = TestVectorResult.SUCCESS
 
-        self._rename_test(test, module_orig, qualname_orig)
-
         return test.test_vector
 
     @staticmethod
@@ -424,59 +424,70 @@ class TestSuite:
         decoder_name: Optional[str] = None,
     ) -> str:
         decoder_name = decoder_text if not decoder_name else decoder_name
-        tests_suite_max_len = self._get_max_length_list_name([self.name], TestSuite.TEST_SUITE_NAME)
-        decoder_max_len = self._get_max_length_list_name([decoder_name], TestSuite.DECODER_NAME)
-        test_vectors_max_len = self._get_max_length_list_name(
-            list(self.test_vectors.keys()), TestSuite.TEST_VECTOR_NAME
-        )
+        if self.results_widths is not None:
+            tests_suite_max_len, decoder_max_len, test_vectors_max_len = self.results_widths
+        else:
+            tests_suite_max_len = self._get_max_length_list_name([self.name], TestSuite.TEST_SUITE_NAME)
+            decoder_max_len = self._get_max_length_list_name([decoder_name], TestSuite.DECODER_NAME)
+            test_vectors_max_len = self._get_max_length_list_name(
+                list(self.test_vectors.keys()), TestSuite.TEST_VECTOR_NAME
+            )
 
         return (
             f"[{test_suite_text:{tests_suite_max_len}}] ({decoder_text:{decoder_max_len}}) "
             f"{test_vector_text:{test_vectors_max_len}} ... {result_text}"
         )
 
-    def run_test_suite_in_parallel(self, jobs: int, tests: List[Test], failfast: bool) -> None:
-        """Run the test suite in parallel"""
-        test_vector_results: List[TestVector] = []
-        decoder = tests[0].decoder
+    @staticmethod
+    def align_results(pairs: List[Tuple["TestSuite", str]]) -> None:
+        """Share the widths of the table of results among test suite and decoder pairs whose rows are interleaved"""
+        widths = (
+            TestSuite._get_max_length_list_name(
+                [test_suite.name for test_suite, _ in pairs], TestSuite.TEST_SUITE_NAME
+            ),
+            TestSuite._get_max_length_list_name([decoder_name for _, decoder_name in pairs], TestSuite.DECODER_NAME),
+            TestSuite._get_max_length_list_name(
+                [name for test_suite, _ in pairs for name in test_suite.test_vectors], TestSuite.TEST_VECTOR_NAME
+            ),
+        )
+        for test_suite, _ in pairs:
+            test_suite.results_widths = widths
 
+    def print_results_header(self, decoder_name: str) -> None:
+        """Print the header of the table of test vector results"""
         print(
             self._get_result_line(
                 TestSuite.TEST_SUITE_NAME,
                 TestSuite.DECODER_NAME,
                 TestSuite.TEST_VECTOR_NAME,
                 TestSuite.RESULT_NAME,
-                decoder.name,
+                decoder_name,
             )
             + f"\n{'-' * 70}"
         )
-        with Pool(jobs) as pool:
-
-            def _callback(test_result: TestVector) -> None:
-                print(
-                    self._get_result_line(
-                        self.name,
-                        decoder.name,
-                        test_result.name,
-                        test_result.test_result.value,
-                    ),
-                    flush=True,
-                )
-                test_vector_results.append(test_result)
-                if failfast and test_result.errors and not self.negative_test:
-                    pool.terminate()
 
-            start = perf_counter()
-            for test in tests:
-                pool.apply_async(self._run_worker, (test,), callback=_callback)
-            pool.close()
-            pool.join()
-        self.time_taken = perf_counter() - start
-        print("\n")
+    def print_test_vector_result(self, decoder_name: str, test_vector: TestVector) -> None:
+        """Print the result of a test vector as a row of the table of results"""
+        print(
+            self._get_result_line(
+                self.name,
+                decoder_name,
+                test_vector.name,
+                test_vector.test_result.value,
+            ),
+            flush=True,
+        )
+
+    def collect_test_vector_results(self, test_vector_results: List[TestVector], tests: int, time_taken: float) -> None:
+        """Gather the results of the test vectors run, reporting their errors"""
+        self.time_taken = time_taken
         self.test_vectors_success = 0
         self.test_vectors_not_run = 0
         self.test_vectors_not_supported = 0
+        cached = 0
         for test_vector_res in test_vector_results:
+            if test_vector_res.cached:
+                cached += 1
             if test_vector_res.test_result == TestVectorResult.SUCCESS:
                 self.test_vectors_success += 1
             elif test_vector_res.test_result == TestVectorResult.NOT_SUPPORTED:
@@ -495,25 +506,28 @@ class TestSuite:
             # from a different process
             self.test_vectors[test_vector_res.name] = test_vector_res
 
-        status_parts = [f"{self.test_vectors_success}/{len(tests)} tests successfully"]
+        status_parts = [f"{self.test_vectors_success}/{tests} tests successfully"]
         if self.test_vectors_not_run > 0:
             status_parts.append(f"{self.test_vectors_not_run} not run")
         if self.test_vectors_not_supported > 0:
             status_parts.append(f"{self.test_vectors_not_supported} not supported")
+        if cached > 0:
+            status_parts.append(f"{cached} from the cache")
         status_parts.append(f"in {self.time_taken:.3f} secs")
         print(f"Ran {', '.join(status_parts)}")
 
-    def run(self, ctx: Context) -> Optional["TestSuite"]:
+    def prepare(self, ctx: Context) -> Optional[Tuple["TestSuite", List[Test]]]:
         """
-        Run the test suite.
-        Returns a new copy of the test suite with the result of the test
+        Prepare the test suite to be run.
+        Returns a new copy of the test suite, that will hold the results, along
+        with the tests to run
         """
 
-        if not ctx.decoder.check(ctx.verbose):
+        if not ctx.remote and not ctx.decoder.check(ctx.verbose):
             print(f"Skipping decoder {ctx.decoder.name} because it cannot be run")
             return None
 
-        if not os.path.exists(os.path.join(self.resources_dir, self.name)):
+        if not ctx.remote and not os.path.exists(os.path.join(self.resources_dir, self.name)):
             print(
                 f"Skipping test suite {self.name} because its resources are not available. "
                 f"Please download it first, run `fluster.py download --help` for more information"
@@ -522,11 +536,13 @@ class TestSuite:
 
         if self.test_method in (TestMethod.PIXEL, TestMethod.SAMPLE):
             ctx.reference_decoder = get_reference_decoder_for_codec(ctx.decoder.codec)
-            if ctx.reference_decoder is None or not ctx.reference_decoder.check(ctx.verbose):
+            if ctx.reference_decoder is None or not (ctx.remote or ctx.reference_decoder.check(ctx.verbose)):
                 print(f"Skipping test suite {self.name}: no reference decoder for codec {ctx.decoder.codec.name}")
                 return None
 
-        ctx.output_dir = os.path.join(ctx.output_dir, self.name)
+        # Each decoder gets its own output directory so that several decoders
+        # can run the same test suite at the same time
+        ctx.output_dir = os.path.join(ctx.output_dir, self.name, ctx.decoder.name)
         if os.path.exists(ctx.output_dir):
             rmtree(ctx.output_dir)
         os.makedirs(ctx.output_dir)
@@ -552,18 +568,38 @@ class TestSuite:
             string += f"Test vectors {' '.join(ctx.test_vectors)}\n"
         if ctx.skip_vectors:
             string += f"Skipping test vectors {' '.join(ctx.skip_vectors)}\n"
-        string += f"Using {ctx.jobs} parallel job(s)"
+        string += "Using remote workers" if ctx.remote else f"Using {ctx.jobs} parallel job(s)"
         print(string)
         print("*" * 100 + "\n")
 
-        test_suite.run_test_suite_in_parallel(ctx.jobs, tests, ctx.failfast)
+        return test_suite, tests
 
+    def finish(self, ctx: Context) -> None:
+        """Store the reference results, if needed, and clean up the outputs once the tests have run"""
         if ctx.reference:
-            test_suite.to_json_file(test_suite.filename)
+            self.to_json_file(self.filename)
 
         if not ctx.keep_files and os.path.isdir(ctx.output_dir):
             rmtree(ctx.output_dir)
 
+    def run(self, ctx: Context) -> Optional["TestSuite"]:
+        """
+        Run the test suite on a scheduler of its own.
+        Returns a new copy of the test suite with the result of the test
+        """
+        prepared = self.prepare(ctx)
+        if prepared is None:
+            return None
+
+        test_suite, tests = prepared
+        scheduler = Scheduler(ctx.jobs, ctx.failfast, engine=ctx.engine)
+        suite_run = scheduler.add(test_suite, tests)
+        test_suite.print_results_header(ctx.decoder.name)
+        scheduler.run()
+        print("\n")
+        test_suite.collect_test_vector_results(suite_run.results, suite_run.tests_count, suite_run.time_taken)
+        test_suite.finish(ctx)
+
         return test_suite
 
     def generate_tests(self, ctx: Context) -> List[Test]:
@@ -613,8 +649,14 @@ class TestSuite:
                         ctx.timeout,
                         ctx.keep_files,
                         ctx.verbose,
+                        # The outputs to keep and the results of a reference run need an actual decode
+                        ctx.cache if not ctx.reference and not ctx.keep_files else None,
                     )
                 )
+                # The outputs to keep need to be files, as do those of the decoders that don't write them in order
+                tests[-1].fifo = ctx.fifo and not ctx.keep_files and ctx.decoder.sequential_output
+            tests[-1].stall_timeout = ctx.stall_timeout
+            tests[-1].limits = ctx.limits
             test_vectors_run[name] = test_vector
         self.test_vectors = test_vectors_run
         return tests
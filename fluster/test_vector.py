@@ -31,6 +31,7 @@ class TestVectorResult(Enum):
     ERROR = "Error"
     REFERENCE = "Reference run"  # used in reference runs to indicate the decoder for this test vector was succesful
     NOT_SUPPORTED = "Not Supported"  # used to indicate the decoder cannot handle this media
+    LIMIT_EXCEEDED = "Limit Exceeded"  # the decoder was stopped for going beyond the resource limits of its job
 
 
 class TestVector:
@@ -60,6 +61,8 @@ class TestVector:
         # Not included in JSON
         self.test_result = TestVectorResult.NOT_RUN
         self.test_time = 0.0
+        self.output_size = 0
+        self.cached = False  # the result was taken from the cache instead of decoding
         self.errors: List[List[str]] = []
 
     @classmethod
@@ -82,6 +85,8 @@ class TestVector:
         data.pop("test_result")
         data.pop("errors")
         data.pop("test_time")
+        data.pop("output_size")
+        data.pop("cached")
         data["output_format"] = str(self.output_format.value)
         if self.profile is not None:
             data["profile"] = str(self.profile.value)
@@ -94,6 +99,26 @@ class TestVector:
 
         return data
 
+    def results_to_serialize(self) -> Dict[str, Any]:
+        """Return the results of the last run to be serialized"""
+        return {
+            "test_result": self.test_result.value,
+            "result": self.result,
+            "test_time": self.test_time,
+            "output_size": self.output_size,
+            "cached": self.cached,
+            "errors": self.errors,
+        }
+
+    def load_results(self, data: Dict[str, Any]) -> None:
+        """Set the results of a run serialized with results_to_serialize"""
+        self.test_result = TestVectorResult(data["test_result"])
+        self.result = data["result"]
+        self.test_time = data["test_time"]
+        self.output_size = data["output_size"]
+        self.cached = data.get("cached", False)
+        self.errors = data["errors"]
+
     def __str__(self) -> str:
         ret = (
             f"        {self.name}\n"
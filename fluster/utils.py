@@ -19,6 +19,7 @@ from __future__ import annotations
 
 import array
 import contextlib
+import errno
 import hashlib
 import http.client
 import io
@@ -27,6 +28,7 @@ import platform
 import random
 import re
 import shutil
+import signal
 import subprocess
 import sys
 import time
@@ -35,9 +37,12 @@ import urllib.parse
 import urllib.request
 import wave
 import zipfile
-from functools import partial
-from threading import Lock
-from typing import Any, List, Optional, Tuple
+from functools import lru_cache, partial, wraps
+from threading import BoundedSemaphore, Event, Lock, Thread, local
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar, cast
+
+if sys.platform != "win32":
+    import resource
 
 TARBALL_EXTS = ("tar.gz", "tgz", "tar.bz2", "tbz2", "tar.xz")
 
@@ -214,8 +219,105 @@ def download(
                 raise RuntimeError(f"Failed to download {url} after {max_retries} attempts: {e}") from e
 
 
+DECODE_STAGE = "decode"
+VERIFY_STAGE = "verify"
+
+
+class PipelineStages:
+    """Concurrency of every stage of the tests run by the pipeline engine.
+
+    The decoder commands take a slot of the decode stage only while their
+    process runs, and the hashing and comparison of the outputs take a slot
+    of the verify stage. The next decoder starts as soon as a process exits,
+    instead of once the test that ran it is done verifying its output, so
+    CPU-bound decoders and IO-bound hashing overlap.
+
+    Given the sets of CPUs of the jobs, one for every slot of the decode
+    stage, the commands are pinned to the set of the slot they take.
+    """
+
+    def __init__(self, decode_jobs: int, verify_jobs: int, cpu_slots: Optional[List[List[int]]] = None):
+        self._slots = {DECODE_STAGE: BoundedSemaphore(decode_jobs), VERIFY_STAGE: BoundedSemaphore(verify_jobs)}
+        self._free_cpus = list(cpu_slots or [])
+        self._cpus_lock = Lock()
+        self._threads = local()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Hold a slot of a stage, unless the current thread already holds it"""
+        held: Set[str] = getattr(self._threads, "held", set())
+        if name in held:
+            yield
+            return
+        start = time.perf_counter()
+        with self._slots[name]:
+            self._threads.waited = self.waited() + time.perf_counter() - start
+            self._threads.held = held | {name}
+            cpus = None
+            if name == DECODE_STAGE and self._free_cpus:
+                # There are as many sets of CPUs as slots, so one is always free
+                with self._cpus_lock:
+                    cpus = self._free_cpus.pop(0)
+                self._threads.cpus = cpus
+            try:
+                yield
+            finally:
+                self._threads.held = held
+                if cpus is not None:
+                    self._threads.cpus = None
+                    with self._cpus_lock:
+                        self._free_cpus.append(cpus)
+
+    def waited(self) -> float:
+        """Secs the current thread has spent waiting for a free slot"""
+        waited: float = getattr(self._threads, "waited", 0.0)
+        return waited
+
+    def cpus(self) -> Optional[List[int]]:
+        """CPUs of the slot of the decode stage held by the current thread, if any"""
+        cpus: Optional[List[int]] = getattr(self._threads, "cpus", None)
+        return cpus
+
+
+_pipeline_stages: Optional[PipelineStages] = None
+
+
+def set_pipeline_stages(stages: Optional[PipelineStages]) -> None:
+    """Set the stages the commands and the verification of the outputs run in, or None to run them freely"""
+    global _pipeline_stages  # noqa: PLW0603
+    _pipeline_stages = stages
+
+
+def pipeline_stage(name: str) -> Any:
+    """Context holding a slot of a stage of the pipeline engine, if it is in use"""
+    if _pipeline_stages is None:
+        return contextlib.nullcontext()
+    return _pipeline_stages.stage(name)
+
+
+def pipeline_wait() -> float:
+    """Secs the current thread has spent waiting for the stages of the pipeline engine"""
+    return _pipeline_stages.waited() if _pipeline_stages is not None else 0.0
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _verify_stage(func: _F) -> _F:
+    @wraps(func)
+    def _wrapper(*args: Any, **kwargs: Any) -> Any:
+        with pipeline_stage(VERIFY_STAGE):
+            return func(*args, **kwargs)
+
+    return cast(_F, _wrapper)
+
+
+@_verify_stage
 def file_checksum(path: str) -> str:
-    """Calculates the checksum of a file reading chunks of 64KiB"""
+    """Calculates the checksum of a file reading chunks of 64KiB, or of what was written to it if it's a FIFO output"""
+    fifo = _fifo_output(path)
+    if fifo is not None:
+        return fifo.hexdigest()
     md5 = hashlib.md5()
     with open(path, "rb") as file:
         while True:
@@ -226,6 +328,595 @@ def file_checksum(path: str) -> str:
     return md5.hexdigest()
 
 
+def file_fingerprint(path: str) -> str:
+    """Identity of a file from its resolved path, size, modification time and checksum"""
+    realpath = os.path.realpath(path)
+    stat = os.stat(realpath)
+    return _file_fingerprint(realpath, stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _file_fingerprint(path: str, size: int, mtime_ns: int) -> str:
+    # The checksum is only computed again once the file is modified
+    return f"{path}:{size}:{mtime_ns}:{file_checksum(path)}"
+
+
+# Messages after which a decoder never produces a valid output, so there is no point in waiting for it to exit
+FATAL_ERROR_PATTERNS = [
+    r"GPU hang",
+    r"ERROR: from element",  # GStreamer pipelines that fail often hang while tearing down
+    r"double free or corruption",
+]
+# Secs between the checks of the progress of the commands being watched
+WATCHDOG_INTERVAL = 0.5
+
+
+class StalledError(subprocess.TimeoutExpired):
+    """A command made no progress for longer than its stall window"""
+
+    def __str__(self) -> str:
+        return f"Command '{self.cmd}' made no progress in {self.timeout} seconds"
+
+
+class FatalOutputError(subprocess.CalledProcessError):
+    """A command printed an error it never recovers from"""
+
+    def __str__(self) -> str:
+        return f"Command '{self.cmd}' reported a fatal error: {self.stderr}"
+
+
+class LimitExceededError(subprocess.CalledProcessError):
+    """A command was killed for going beyond one of the resource limits of its job"""
+
+    def __init__(self, returncode: int, cmd: Any, limit: str, output: Any = None):
+        super().__init__(returncode, cmd, output)
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return f"Command '{self.cmd}' exceeded the {self.limit}"
+
+
+class CommandResult:
+    """How a command ended.
+
+    Along with its exit code, its output if stdout is a pipe, the CPU time in
+    secs used by the command and its reaped children when known, and whether
+    it was killed by fluster, on failfast or when terminated.
+    """
+
+    def __init__(self, returncode: int, output: bytes = b"", cpu_time: Optional[float] = None, killed: bool = False):
+        self.returncode = returncode
+        self.output = output
+        self.cpu_time = cpu_time
+        self.killed = killed
+
+
+class ResourceLimits:
+    """Resources every command of a job can use, enforced by the kernel (POSIX only).
+
+    The limits are set with setrlimit in the child before running the
+    command, so its own children inherit them: address space in MiB, CPU
+    time in secs and size of the files written in MiB. The kernel stops a
+    command going beyond its CPU time or file size with SIGXCPU or SIGXFSZ,
+    and with SIGKILL one more sec of CPU time later if it ignores SIGXCPU.
+    Going beyond the address space only makes the allocations fail, so a
+    command is only taken as having exceeded it when it exits with ENOMEM or
+    is killed by anyone but fluster. Any other failure is the decoder's own,
+    whatever it prints.
+    """
+
+    def __init__(self, memory: Optional[int] = None, cpu_time: Optional[int] = None, file_size: Optional[int] = None):
+        self.memory = memory
+        self.cpu_time = cpu_time
+        self.file_size = file_size
+
+    def apply(self) -> None:
+        """Set the limits of the current process"""
+        limits = []
+        if self.memory is not None:
+            limits.append((resource.RLIMIT_AS, self.memory * 1024 * 1024, self.memory * 1024 * 1024))
+        if self.cpu_time is not None:
+            # SIGXCPU once the limit is reached, SIGKILL a second later if it is ignored
+            limits.append((resource.RLIMIT_CPU, self.cpu_time, self.cpu_time + 1))
+        if self.file_size is not None:
+            limits.append((resource.RLIMIT_FSIZE, self.file_size * 1024 * 1024, self.file_size * 1024 * 1024))
+        for limit, soft, hard in limits:
+            # Never above the limits of the current process, which can't be raised
+            _, current = resource.getrlimit(limit)
+            if current == resource.RLIM_INFINITY:
+                resource.setrlimit(limit, (soft, hard))
+            else:
+                resource.setrlimit(limit, (min(soft, current), min(hard, current)))
+
+    def exceeded(self, result: CommandResult) -> Optional[str]:
+        """Limit exceeded by a command, if any"""
+        # The commands are run directly, so only a negative exit code means they were killed by a signal
+        signum = -result.returncode
+        if self.cpu_time is not None:
+            if signum == signal.SIGXCPU:
+                return f"CPU time limit of {self.cpu_time} secs"
+            # Unlike the kills for any other reason, the one of the hard limit comes once it used up the CPU time
+            if signum == signal.SIGKILL and result.cpu_time is not None and result.cpu_time >= self.cpu_time:
+                return f"CPU time limit of {self.cpu_time} secs"
+        if self.file_size is not None and signum == signal.SIGXFSZ:
+            return f"file size limit of {self.file_size} MiB"
+        if self.memory is not None:
+            if result.returncode == errno.ENOMEM or (signum == signal.SIGKILL and not result.killed):
+                return f"memory limit of {self.memory} MiB"
+        return None
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return {"memory": self.memory, "cpu_time": self.cpu_time, "file_size": self.file_size}
+
+
+class ProgressWatchdog:
+    """Kills the commands of a decode as soon as they stop making progress.
+
+    A command makes progress while the output files grow or it writes to
+    stdout or stderr. It is killed, along with its process group, once it
+    makes no progress for stall_timeout secs or once it prints one of the
+    fatal error patterns, instead of holding a job until its timeout.
+    """
+
+    def __init__(self, stall_timeout: float, paths: List[str]):
+        self.stall_timeout = stall_timeout
+        self.paths = paths
+        self._patterns = re.compile("|".join(FATAL_ERROR_PATTERNS).encode("utf-8"))
+        self._sizes: List[int] = []
+        self._last_progress = 0.0
+        self._pending_line = b""
+        self.fatal_error: Optional[str] = None
+
+    def _path_sizes(self) -> List[int]:
+        sizes = []
+        for path in self.paths:
+            fifo = _fifo_output(path)
+            if fifo is not None:
+                sizes.append(fifo.size)
+            else:
+                sizes.append(os.path.getsize(path) if os.path.isfile(path) else -1)
+        return sizes
+
+    def reset(self) -> None:
+        """Start watching a new command"""
+        self._sizes = self._path_sizes()
+        self._last_progress = time.monotonic()
+        self._pending_line = b""
+        self.fatal_error = None
+
+    def feed(self, data: bytes, scan: bool) -> None:
+        """Account for the output of the command, looking for fatal errors in it if scan is set"""
+        self._last_progress = time.monotonic()
+        if not scan:
+            return
+        lines = (self._pending_line + data).split(b"\n")
+        self._pending_line = lines.pop()[-4096:]
+        for line in lines:
+            if self.fatal_error is None and self._patterns.search(line):
+                self.fatal_error = line.decode(errors="replace").strip()
+
+    def check(self, command: List[str], returncode: int = -9) -> None:
+        """Raise an error if the command printed a fatal error or stalled"""
+        if self.fatal_error is not None:
+            raise FatalOutputError(returncode, command, stderr=self.fatal_error)
+        sizes = self._path_sizes()
+        if sizes != self._sizes:
+            self._sizes = sizes
+            self._last_progress = time.monotonic()
+        elif time.monotonic() - self._last_progress > self.stall_timeout:
+            raise StalledError(command, self.stall_timeout)
+
+    def exited(self, command: List[str], returncode: int) -> None:
+        """Raise an error if the command crashed instead of exiting"""
+        # Told by the signal, the message telling about it is printed by the shell and not by the command
+        if returncode == -signal.SIGSEGV:
+            raise FatalOutputError(returncode, command, stderr="Segmentation fault")
+
+    def run(
+        self,
+        command: List[str],
+        stdout: Any,
+        stderr: Any,
+        timeout: Optional[float],
+        setup: Optional[Callable[[], None]] = None,
+    ) -> CommandResult:
+        """Run a command returning how it ended"""
+        self.reset()
+        merged = stderr == subprocess.STDOUT
+        proc = _start_process(command, stdout, subprocess.STDOUT if merged else subprocess.PIPE, setup)
+        chunks: List[bytes] = []
+
+        def _read_output(chunk: bytes) -> None:
+            self.feed(chunk, merged)
+            chunks.append(chunk)
+
+        def _read_errors(chunk: bytes) -> None:
+            self.feed(chunk, True)
+            if stderr is None:
+                # Verbose mode shows the errors of the command
+                sys.stderr.write(chunk.decode(errors="replace"))
+
+        readers = [_read_pipe(proc.stderr, _read_errors)] if proc.stderr else []
+        if proc.stdout:
+            readers.append(_read_pipe(proc.stdout, _read_output))
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                try:
+                    cpu_time = _wait_process(proc, WATCHDOG_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if deadline is not None and time.monotonic() > deadline:
+                    raise subprocess.TimeoutExpired(command, timeout or 0, output=b"".join(chunks))
+                self.check(command)
+        except BaseException:
+            kill_process_group(proc)
+            _wait_process(proc)
+            raise
+        finally:
+            killed = _release_process_group(proc.pid, command)
+            for reader in readers:
+                reader.join()
+            for pipe in (proc.stdout, proc.stderr):
+                if pipe:
+                    pipe.close()
+        self.exited(command, proc.returncode)
+        return CommandResult(proc.returncode, b"".join(chunks), cpu_time, killed)
+
+
+# Process groups of the commands running in this process, to kill them all at once
+_process_groups: Set[int] = set()
+# Process groups of the commands running killed by fluster instead of dying on their own
+_killed_process_groups: Set[int] = set()
+_process_groups_lock = Lock()
+
+
+def _child_setup(cpus: Optional[List[int]], limits: Optional[ResourceLimits]) -> Optional[Callable[[], None]]:
+    """Function pinning the child process to a set of CPUs and setting its limits before running the command"""
+    if cpus is None and limits is None:
+        return None
+
+    def _setup() -> None:
+        if cpus is not None:
+            os.sched_setaffinity(0, cpus)
+        if limits is not None:
+            limits.apply()
+
+    return _setup
+
+
+def _start_process(
+    command: List[str], stdout: Any, stderr: Any, setup: Optional[Callable[[], None]] = None
+) -> subprocess.Popen[bytes]:
+    """Start a command in a session of its own, so that it can be killed along with all its children"""
+    # The setup of the child only makes system calls that take no lock, safe to run after forking from a thread
+    proc = subprocess.Popen(
+        command,
+        stdout=stdout,
+        stderr=stderr,
+        start_new_session=True,
+        preexec_fn=setup,  # noqa: PLW1509
+    )
+    with _process_groups_lock:
+        _process_groups.add(proc.pid)
+    return proc
+
+
+def _group_processes(pgid: int) -> List[int]:
+    """Processes of a process group still alive, leaving out the zombies waiting to be reaped"""
+    # Cheap probe first, as the group is almost always gone once the command has been reaped
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return []
+    if not os.path.isdir("/proc"):
+        return [pgid]
+    # Zombies still count as members of the group, only the state of every process tells them apart
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as stat_file:
+                # pid (comm) state ppid pgrp ...
+                fields = stat_file.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if fields[0] != "Z" and int(fields[2]) == pgid:
+            pids.append(int(entry))
+    return pids
+
+
+def _wait_process(proc: subprocess.Popen[bytes], timeout: Optional[float] = None) -> Optional[float]:
+    """Wait for a process to exit, returning the CPU time in secs used by it and its reaped children.
+
+    The process is reaped with wait4, which unlike Popen.wait gives the
+    resources it used along with its exit status, and its return code is set
+    as Popen.wait would. The CPU time is None where wait4 isn't available.
+    Raises TimeoutExpired if it doesn't exit within timeout secs.
+    """
+    if not hasattr(os, "wait4"):
+        proc.wait(timeout)
+        return None
+    if proc.returncode is not None:
+        return None
+    deadline = time.monotonic() + (timeout or 0)
+    delay = 0.001
+    while True:
+        try:
+            pid, status, rusage = os.wait4(proc.pid, os.WNOHANG if timeout is not None else 0)
+        except ChildProcessError:
+            # Reaped elsewhere, the status is lost as with Popen.wait
+            proc.returncode = 0
+            return None
+        if pid == proc.pid:
+            break
+        # Only polled with a timeout, without it wait4 blocks until the process exits
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired(proc.args, timeout or 0)
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.02)
+    proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    cpu_time: float = rusage.ru_utime + rusage.ru_stime
+    return cpu_time
+
+
+def _read_pipe(pipe: Any, read: Callable[[bytes], None]) -> Thread:
+    """Start a thread handing everything written to a pipe to read until it is closed"""
+
+    def _read() -> None:
+        while True:
+            chunk = os.read(pipe.fileno(), 65536)
+            if not chunk:
+                break
+            read(chunk)
+
+    thread = Thread(target=_read, daemon=True)
+    thread.start()
+    return thread
+
+
+def _release_process_group(pgid: int, command: List[str]) -> bool:
+    """Kill and report the processes left behind by a command that has been reaped.
+
+    Returns whether fluster killed the command while it was running.
+    """
+    with _process_groups_lock:
+        _process_groups.discard(pgid)
+        killed = pgid in _killed_process_groups
+        _killed_process_groups.discard(pgid)
+    if os.name != "posix":
+        return killed
+    leaked = _group_processes(pgid)
+    if leaked:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except OSError:
+            pass
+        print(f"\nKilled {len(leaked)} process(es) left running by {' '.join(command)}: {leaked}")
+    return killed
+
+
+def kill_process_group(proc: Any) -> None:
+    """Kill a process started in a new session along with all its children"""
+    with _process_groups_lock:
+        if proc.pid in _process_groups:
+            _killed_process_groups.add(proc.pid)
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (OSError, ProcessLookupError):
+        pass
+
+
+def kill_running_commands() -> None:
+    """Kill the commands still running in this process along with all their children"""
+    with _process_groups_lock:
+        pgids = list(_process_groups)
+        _killed_process_groups.update(pgids)
+    for pgid in pgids:
+        try:
+            if os.name == "posix":
+                os.killpg(pgid, signal.SIGKILL)
+            else:
+                os.kill(pgid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+def _terminate(signum: int, frame: Any) -> None:
+    kill_running_commands()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+def kill_commands_on_termination() -> None:
+    """Kill the commands running when this process is terminated, as the pool workers are on failfast"""
+    if os.name == "posix":
+        signal.signal(signal.SIGTERM, _terminate)
+
+
+def _run_process(
+    command: List[str],
+    stdout: Any,
+    stderr: Any,
+    timeout: Optional[float],
+    setup: Optional[Callable[[], None]] = None,
+) -> CommandResult:
+    """Run a command returning how it ended"""
+    proc = _start_process(command, stdout, stderr, setup)
+    chunks: List[bytes] = []
+    reader = _read_pipe(proc.stdout, chunks.append) if proc.stdout else None
+    try:
+        cpu_time = _wait_process(proc, timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(proc)
+        _wait_process(proc)
+        if reader:
+            reader.join()
+        raise subprocess.TimeoutExpired(command, timeout or 0, output=b"".join(chunks)) from None
+    except BaseException:
+        # Ctrl-C included, the command doesn't get it in a session of its own
+        kill_process_group(proc)
+        _wait_process(proc)
+        raise
+    finally:
+        killed = _release_process_group(proc.pid, command)
+        if reader:
+            reader.join()
+        if proc.stdout:
+            proc.stdout.close()
+    return CommandResult(proc.returncode, b"".join(chunks), cpu_time, killed)
+
+
+_watchdogs = local()
+
+
+@contextlib.contextmanager
+def watch_progress(watchdog: Optional[ProgressWatchdog]) -> Iterator[None]:
+    """Watch the progress of the commands run from the current thread within the context"""
+    previous = getattr(_watchdogs, "current", None)
+    _watchdogs.current = watchdog
+    try:
+        yield
+    finally:
+        _watchdogs.current = previous
+
+
+_affinity = local()
+
+
+@contextlib.contextmanager
+def pin_to_cpus(cpus: Optional[List[int]]) -> Iterator[None]:
+    """Pin the commands run from the current thread within the context to a set of CPUs, None for all of them"""
+    previous = getattr(_affinity, "cpus", None)
+    _affinity.cpus = cpus
+    try:
+        yield
+    finally:
+        _affinity.cpus = previous
+
+
+_limits = local()
+
+
+@contextlib.contextmanager
+def limit_resources(limits: Optional[ResourceLimits]) -> Iterator[None]:
+    """Apply resource limits to the commands run from the current thread within the context, None for no limits"""
+    previous = getattr(_limits, "current", None)
+    _limits.current = limits
+    try:
+        yield
+    finally:
+        _limits.current = previous
+
+
+class FifoChecksum:
+    """Checksum of the data written to a named pipe, computed by a thread as it arrives.
+
+    A decoder writing its output into the pipe instead of a file doesn't
+    send it to the disk and it isn't read back once written. The pipe can be
+    opened and written several times until the checksum is taken.
+    """
+
+    def __init__(self, path: str):
+        os.mkfifo(path)
+        self.path = path
+        self.size = 0
+        self._md5 = hashlib.md5()
+        self._done = Event()
+        self._thread = Thread(target=self._read, name="fluster-fifo", daemon=True)
+        self._thread.start()
+
+    def _read(self) -> None:
+        while True:
+            # Waits for a writer to open the pipe and reads until every writer has closed it
+            with open(self.path, "rb") as fifo:
+                while True:
+                    data = fifo.read(65536)
+                    if not data:
+                        break
+                    self._md5.update(data)
+                    self.size += len(data)
+            if self._done.is_set():
+                return
+
+    def hexdigest(self) -> str:
+        """Wait for the writers to finish, returning the checksum of everything they wrote"""
+        self._done.set()
+        while self._thread.is_alive():
+            # The reader waiting for a writer that is never coming is released by opening the pipe for writing
+            try:
+                os.close(os.open(self.path, os.O_WRONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+            self._thread.join(0.01)
+        return self._md5.hexdigest()
+
+
+_fifo_outputs: Dict[str, FifoChecksum] = {}
+_fifo_outputs_lock = Lock()
+
+
+def is_fifo_available() -> bool:
+    """Whether the outputs can be named pipes (POSIX only)"""
+    return hasattr(os, "mkfifo")
+
+
+def _fifo_output(path: str) -> Optional[FifoChecksum]:
+    with _fifo_outputs_lock:
+        return _fifo_outputs.get(path)
+
+
+@contextlib.contextmanager
+def fifo_output(path: Optional[str]) -> Iterator[Optional[FifoChecksum]]:
+    """Make path a named pipe hashed as it is written within the context, None to leave the output a file.
+
+    The checksum of the output is then taken from what was written to the
+    pipe, and the pipe is removed on exit. The pipe is yielded to tell how
+    much was written to it once the context is left.
+    """
+    if path is None:
+        yield None
+        return
+    if os.path.lexists(path):
+        os.remove(path)
+    fifo = FifoChecksum(path)
+    with _fifo_outputs_lock:
+        _fifo_outputs[path] = fifo
+    try:
+        yield fifo
+    finally:
+        with _fifo_outputs_lock:
+            del _fifo_outputs[path]
+        fifo.hexdigest()
+        os.remove(path)
+
+
+def _run(command: List[str], stdout: Any, stderr: Any, timeout: Optional[float]) -> Tuple[int, bytes]:
+    """Run a command with the progress watchdog, the CPUs and the limits of the current thread.
+
+    Raises LimitExceededError if the command is stopped for going beyond its limits.
+    """
+    watchdog: Optional[ProgressWatchdog] = getattr(_watchdogs, "current", None)
+    limits: Optional[ResourceLimits] = getattr(_limits, "current", None)
+    with pipeline_stage(DECODE_STAGE):
+        cpus = _pipeline_stages.cpus() if _pipeline_stages is not None else None
+        setup = _child_setup(cpus or getattr(_affinity, "cpus", None), limits)
+        if watchdog is not None:
+            result = watchdog.run(command, stdout, stderr, timeout, setup)
+        else:
+            result = _run_process(command, stdout, stderr, timeout, setup)
+    limit = limits.exceeded(result) if limits is not None else None
+    if limit is not None:
+        raise LimitExceededError(result.returncode, command, limit, result.output)
+    return result.returncode, result.output
+
+
 def run_command(
     command: List[str],
     verbose: bool = False,
@@ -238,7 +929,9 @@ def run_command(
     if verbose:
         print(f'\nRunning command "{" ".join(command)}"')
     try:
-        subprocess.run(command, stdout=sout, stderr=serr, check=check, timeout=timeout)
+        returncode, _ = _run(command, sout, serr, timeout)
+        if check and returncode:
+            raise subprocess.CalledProcessError(returncode, command)
     except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as ex:
         # Developer experience improvement (facilitates copy/paste)
         ex.cmd = " ".join(ex.cmd)
@@ -260,7 +953,10 @@ def run_command_with_output(
         print(f'\nRunning command "{" ".join(command)}"')
 
     try:
-        output = subprocess.check_output(command, stderr=serr, timeout=timeout, universal_newlines=True)
+        returncode, data = _run(command, subprocess.PIPE, serr, timeout)
+        output = data.decode(errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, command, output)
         if verbose and output:
             print(output)
         return output or ""
@@ -272,6 +968,10 @@ def run_command_with_output(
             else:
                 print(ex.output)
 
+        # The commands stopped by fluster failed no matter what they return
+        if isinstance(ex, (LimitExceededError, FatalOutputError)):
+            ex.cmd = " ".join(ex.cmd)
+            raise ex
         if isinstance(ex, subprocess.CalledProcessError) and not check:
             return ex.output or ""
 
@@ -393,6 +1093,7 @@ def _active_channels(flat: array.array[int], nch: int) -> List[int]:
     return [ch for ch in range(nch) if any(flat[ch::nch])]
 
 
+@_verify_stage
 def compare_wav_files(reference_file: str, test_file: str, tolerance: int = 128) -> int:
     """Compare two WAV files sample-by-sample with active-channel detection and lag compensation."""
     ref_flat, ref_nch, ref_sw = _read_wav(reference_file)
@@ -438,6 +1139,7 @@ def compare_wav_files(reference_file: str, test_file: str, tolerance: int = 128)
     return violations
 
 
+@_verify_stage
 def compare_yuv_files(reference_file: str, test_file: str, tolerance: int = 2, blocksize: int = 1024) -> int:
     """Compare two YUV files byte-by-byte within a tolerance, streaming in blocks."""
     violations = 0
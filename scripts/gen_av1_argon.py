@@ -25,7 +25,7 @@ import sys
 import urllib.error
 import zipfile
 from time import sleep
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from fluster import utils
@@ -60,8 +60,10 @@ class AV1ArgonGenerator:
         self.use_ffprobe = use_ffprobe
         self.negative_test = negative_test
         self.decoder = av1_aom.AV1AOMDecoder()
+        self.optional_params: Optional[Dict[str, Any]] = None
         if any(keyword in self.suite_name for keyword in ["CORE", "STRESS"]):
-            self.decoder.annexb = True
+            # The streams of the CORE and STRESS test suites are stored in Annex B format
+            self.optional_params = {"annexb": True}
 
     def generate(self, download: bool) -> None:
         """Generates the test suite and saves it to a file"""
@@ -233,7 +235,9 @@ class AV1ArgonGenerator:
             temp_output_ref = f"{os.path.splitext(tv_abs_path)[0]}.out"
             try:
                 # Run libaom av1 decoder to get md5 checksum of expected output
-                result_checksum = self.decoder.decode(tv_abs_path, temp_output_ref, output_format, 240, False, False)
+                result_checksum = self.decoder.decode(
+                    tv_abs_path, temp_output_ref, output_format, 240, False, False, self.optional_params
+                )
                 os.remove(temp_output_ref)
             except FileNotFoundError:
                 print(f"File '{temp_output_ref}' not found.")
@@ -253,6 +257,7 @@ class AV1ArgonGenerator:
                 tv_rel_path,
                 output_format,
                 result_checksum,
+                optional_params=self.optional_params,
             )
             test_suite.test_vectors[tv_filename] = test_vector
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fluster import affinity
+
+
+@unittest.skipUnless(affinity.is_affinity_available(), "CPU affinity not available")
+class TestAffinity(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(affinity, "NODE_DIR", self._tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def _write_node(self, node: int, cpulist: str) -> None:
+        os.makedirs(os.path.join(self._tmp.name, f"node{node}"))
+        with open(os.path.join(self._tmp.name, f"node{node}", "cpulist"), "w") as f:
+            f.write(cpulist + "\n")
+
+    def test_parse_cpu_list(self) -> None:
+        self.assertEqual([0, 1, 2, 3, 8, 10, 11], affinity.parse_cpu_list("0-3,8,10-11"))
+        self.assertEqual([], affinity.parse_cpu_list("\n"))
+
+    def test_numa_nodes(self) -> None:
+        self._write_node(0, "0-3")
+        self._write_node(1, "4-7")
+        with mock.patch.object(os, "sched_getaffinity", return_value=set(range(1, 8))):
+            self.assertEqual([[1, 2, 3], [4, 5, 6, 7]], affinity.numa_nodes())
+        # CPUs outside of the topology found, as it happens in some containers
+        with mock.patch.object(os, "sched_getaffinity", return_value=set(range(10))):
+            self.assertEqual([list(range(10))], affinity.numa_nodes())
+
+    def test_cpu_slots(self) -> None:
+        slots = affinity.CpuSlots(3, [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]])
+        # A slot only spans several nodes when there is no room left for it in any of them
+        self.assertEqual(3, slots.cpus_per_job)
+        self.assertEqual([[0, 1, 2], [5, 6, 7], [3, 4, 8]], slots.slots)
+
+        first = slots.acquire()
+        second = slots.acquire()
+        self.assertEqual([[0, 1, 2], [5, 6, 7]], [first, second])
+        slots.release(first)
+        self.assertEqual([0, 1, 2], slots.acquire())
+        self.assertEqual([3, 4, 8], slots.acquire())
+
+    def test_more_jobs_than_cpus(self) -> None:
+        slots = affinity.CpuSlots(5, [[0, 1], [2]])
+        self.assertEqual([[0], [1], [2], [0], [1]], slots.slots)
+        acquired = [slots.acquire() for _ in range(5)]
+        slots.release([0])
+        slots.release([0])
+        self.assertEqual([0], slots.acquire())
+        self.assertEqual(5, len(acquired))
+
+
+if __name__ == "__main__":
+    unittest.main()
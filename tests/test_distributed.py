@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from typing import Any, List, Optional
+
+from fluster.codec import Codec, OutputFormat
+from fluster.decoder import Decoder
+from fluster.decoders.dummy import Dummy
+from fluster.distributed import Coordinator, Worker, is_local_host, parse_address
+from fluster.test_suite import Context, TestSuite
+from fluster.test_vector import TestVector, TestVectorResult
+from fluster.utils import file_checksum
+
+
+class StuckDummy(Dummy):
+    """Dummy decoder that doesn't finish until released"""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def decode(self, input_filepath: str, *args: Any, **kwargs: Any) -> str:
+        self.started.set()
+        self.release.wait(10)
+        return super().decode(input_filepath, *args, **kwargs)
+
+
+class TestDistributed(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.resources_dir = os.path.join(self._tmp.name, "resources")
+        self.test_suites = [self._create_test_suite("suiteA", 4, failing=1), self._create_test_suite("suiteB", 3)]
+        StuckDummy.started.clear()
+        StuckDummy.release.clear()
+
+    def tearDown(self) -> None:
+        StuckDummy.release.set()
+        self._tmp.cleanup()
+
+    def _create_test_suite(self, name: str, vectors: int, failing: int = -1) -> TestSuite:
+        test_vectors = {}
+        for i in range(vectors):
+            vector_name = f"{name}_{i}"
+            input_dir = os.path.join(self.resources_dir, name, vector_name)
+            os.makedirs(input_dir, exist_ok=True)
+            input_file = os.path.join(input_dir, "input.bit")
+            with open(input_file, "w") as f:
+                f.write(vector_name * (i + 1))
+            result = "0" * 32 if i == failing else file_checksum(input_file)
+            test_vectors[vector_name] = TestVector(vector_name, "", "", "input.bit", OutputFormat.YUV420P, result)
+        return TestSuite(f"{name}.json", self.resources_dir, name, Codec.DUMMY, "", test_vectors)
+
+    def _coordinator(self, token: Optional[str] = None) -> Coordinator:
+        coordinator = Coordinator(("127.0.0.1", 0), token=token)
+        output_dir = os.path.join(self._tmp.name, "coordinator")
+        for test_suite in self.test_suites:
+            ctx = Context(1, Dummy(), 30, False, True, output_dir, remote=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                prepared = test_suite.prepare(ctx)
+            assert prepared is not None
+            coordinator.add(*prepared)
+        coordinator.listen()
+        return coordinator
+
+    def _start_worker(
+        self, coordinator: Coordinator, name: str, decoder: Decoder, jobs: int, token: Optional[str] = None
+    ) -> threading.Thread:
+        output_dir = os.path.join(self._tmp.name, name)
+        worker = Worker(self.test_suites, [decoder], output_dir, jobs, name, token)
+        thread = threading.Thread(target=worker.run, args=(coordinator.address,), daemon=True)
+        thread.start()
+        return thread
+
+    def test_parse_address(self) -> None:
+        self.assertEqual(("", 7700), parse_address("7700"))
+        self.assertEqual(("localhost", 7700), parse_address("7700", "localhost"))
+        self.assertEqual(("10.0.0.1", 7700), parse_address("10.0.0.1:7700"))
+        with self.assertRaises(ValueError):
+            parse_address("10.0.0.1")
+
+    def test_is_local_host(self) -> None:
+        self.assertTrue(all(is_local_host(host) for host in ("localhost", "127.0.0.1", "127.1.2.3", "::1")))
+        self.assertFalse(any(is_local_host(host) for host in ("", "0.0.0.0", "10.0.0.1", "coordinator-host")))
+
+    def test_run_on_workers(self) -> None:
+        coordinator = self._coordinator()
+        with contextlib.redirect_stdout(io.StringIO()):
+            workers = [self._start_worker(coordinator, name, Dummy(), 2) for name in ("worker1", "worker2")]
+            coordinator.run()
+            for worker in workers:
+                worker.join(5)
+
+        self.assertFalse(any(worker.is_alive() for worker in workers))
+        suite_runs = coordinator.suite_runs
+        self.assertEqual([4, 3], [len(suite_run.results) for suite_run in suite_runs])
+        failed = [tv for tv in suite_runs[0].results if tv.test_result == TestVectorResult.FAIL]
+        self.assertEqual(["suiteA_1"], [tv.name for tv in failed])
+        self.assertEqual("suiteA_1 (Dummy.suiteA.suiteA_1)", failed[0].errors[0][0])
+        self.assertTrue(all(tv.test_result == TestVectorResult.SUCCESS for tv in suite_runs[1].results))
+
+    def test_reject_workers_without_token(self) -> None:
+        coordinator = self._coordinator("secret")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            intruders = [
+                self._start_worker(coordinator, "intruder1", Dummy(), 2),
+                self._start_worker(coordinator, "intruder2", Dummy(), 2, "wrong"),
+            ]
+            run_thread = threading.Thread(target=coordinator.run)
+            run_thread.start()
+            for intruder in intruders:
+                intruder.join(5)
+            worker = self._start_worker(coordinator, "worker", Dummy(), 2, "secret")
+            run_thread.join(5)
+            worker.join(5)
+
+        self.assertFalse(run_thread.is_alive())
+        self.assertFalse(any(intruder.is_alive() for intruder in intruders))
+        self.assertIn("Worker intruder1 rejected", output.getvalue())
+        self.assertIn("Worker intruder2 rejected", output.getvalue())
+        dispatched = [tv for suite_run in coordinator.suite_runs for tv in suite_run.results]
+        self.assertEqual(7, len(dispatched))
+
+    def test_steal_from_stuck_worker(self) -> None:
+        coordinator = self._coordinator()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self._start_worker(coordinator, "stuck", StuckDummy(), 1)
+            run_thread = threading.Thread(target=coordinator.run)
+            run_thread.start()
+            self.assertTrue(StuckDummy.started.wait(5))
+            self._start_worker(coordinator, "worker", Dummy(), 1)
+            run_thread.join(8)
+
+        self.assertFalse(run_thread.is_alive())
+        self.assertLess(time.perf_counter() - start, 8)
+        results: List[TestVector] = [tv for suite_run in coordinator.suite_runs for tv in suite_run.results]
+        self.assertEqual(7, len(results))
+
+
+if __name__ == "__main__":
+    unittest.main()
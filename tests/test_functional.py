@@ -17,6 +17,7 @@
 
 from __future__ import annotations
 
+import json
 import os
 import platform
 import subprocess
@@ -204,6 +205,42 @@ class TestRun(unittest.TestCase):
         result = run_fluster(["run", "-ts", "dummy_fail", "-j1", "-ff", "-s"])
         self.assertNotEqual(result.returncode, 0)
 
+    def test_run_shards_and_merge_results(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            summaries = [os.path.join(tmp_dir, f"shard{i}.json") for i in (1, 2)]
+            for i, summary in enumerate(summaries, 1):
+                run_fluster(["run", "-ts", "dummy", "dummy_fail", "--shard", f"{i}/2", "-f", "json", "-so", summary])
+            merged = os.path.join(tmp_dir, "merged.json")
+            result = run_fluster(["merge-results", *summaries, "-f", "json", "-so", merged])
+            self.assertEqual(result.returncode, 1)
+            with open(merged) as f:
+                data = json.load(f)
+            vectors = {name: len(suite["decoders"]["Dummy"]["vectors"]) for name, suite in data["test_suites"].items()}
+            self.assertEqual({"dummy": 1, "dummy_fail": 2}, vectors)
+            self.assertEqual(3, data["global_summary"]["Dummy"]["total_tests"])
+
+    def test_run_only_failed(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            summaries = [os.path.join(tmp_dir, f"run{i}.json") for i in (1, 2)]
+            run_fluster(["run", "-ts", "dummy", "dummy_fail", "-f", "json", "-so", summaries[0]])
+            result = run_fluster(["run", "--only-failed", summaries[0], "-f", "json", "-so", summaries[1]])
+            self.assertEqual(result.returncode, 1)
+            failed = []
+            for summary in summaries:
+                with open(summary) as f:
+                    data = json.load(f)
+                failed.append(
+                    {
+                        (suite_name, vector_name)
+                        for suite_name, suite in data["test_suites"].items()
+                        for vector_name, vector in suite["decoders"]["Dummy"]["vectors"].items()
+                        if vector["result"] != "Success"
+                    }
+                )
+            self.assertTrue(failed[0])
+            self.assertEqual(failed[0], failed[1])
+            self.assertEqual(["dummy_fail"], list(data["test_suites"]))
+
     @unittest.skipIf(IS_WINDOWS, "Unix-specific test")
     def test_run_h264_decoders(self) -> None:
         run_fluster(["download", "H264-min", "-k"])
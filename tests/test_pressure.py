@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fluster import pressure
+
+
+class TestPressure(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(pressure, "PRESSURE_DIR", self._tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def _write_pressure(self, avg10: float) -> None:
+        for resource in pressure.PRESSURE_RESOURCES:
+            with open(os.path.join(self._tmp.name, resource), "w") as f:
+                f.write(f"some avg10={avg10:.2f} avg60=0.00 avg300=0.00 total=0\n")
+                f.write("full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+
+    def test_read_pressure(self) -> None:
+        self.assertFalse(pressure.is_pressure_available())
+        self.assertIsNone(pressure.read_pressure("cpu"))
+        self._write_pressure(12.5)
+        self.assertTrue(pressure.is_pressure_available())
+        self.assertEqual(12.5, pressure.read_pressure("cpu"))
+
+    def test_controller(self) -> None:
+        self._write_pressure(90.0)
+        controller = pressure.PressureController(8)
+        with mock.patch.object(pressure, "PRESSURE_INTERVAL", 0.0):
+            self.assertEqual(6, controller.update())
+            self.assertEqual(5, controller.update())
+            for _ in range(10):
+                controller.update()
+            self.assertEqual(1, controller.jobs)
+
+            self._write_pressure(0.0)
+            self.assertEqual(2, controller.update())
+            for _ in range(10):
+                controller.update()
+            self.assertEqual(8, controller.jobs)
+
+
+if __name__ == "__main__":
+    unittest.main()
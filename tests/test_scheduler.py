@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from fluster import affinity, cache, events, history, journal, test, utils
+from fluster.codec import Codec, OutputFormat
+from fluster.decoder import ConcurrencyClass, Decoder
+from fluster.decoders import av1_aom, av1_dav1d, libvpx
+from fluster.decoders.av1_aom import AV1AOMDecoder
+from fluster.decoders.av1_dav1d import AV1Dav1dDecoder
+from fluster.decoders.dummy import Dummy
+from fluster.scheduler import Engine, Scheduler, select_shard
+from fluster.test_suite import Context, TestSuite
+from fluster.test_vector import TestVector, TestVectorResult
+from fluster.utils import DECODE_STAGE, VERIFY_STAGE, ResourceLimits, file_checksum, pipeline_stage, run_command
+
+
+class SlowDummy(Dummy):
+    """Dummy decoder that keeps track of the decodes running at the same time"""
+
+    name = "SlowDummy"
+    lock = threading.Lock()
+    running: Dict[ConcurrencyClass, int] = {}
+    max_running: Dict[ConcurrencyClass, int] = {}
+
+    def decode(self, input_filepath: str, *args: Any, **kwargs: Any) -> str:
+        with self.lock:
+            running = self.running[self.concurrency_class] = self.running.get(self.concurrency_class, 0) + 1
+            self.max_running[self.concurrency_class] = max(self.max_running.get(self.concurrency_class, 0), running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running[self.concurrency_class] -= 1
+        return super().decode(input_filepath, *args, **kwargs)
+
+
+class SlowHWDummy(SlowDummy):
+    name = "SlowHWDummy"
+    concurrency_class = ConcurrencyClass.HARDWARE
+
+
+class OtherHWDummy(SlowHWDummy):
+    name = "OtherHWDummy"
+
+
+class MultiDeviceHWDummy(SlowHWDummy):
+    name = "MultiDeviceHWDummy"
+    devices_used: Dict[str, int] = {}
+
+    def devices(self) -> List[str]:
+        return ["/dev/dri/renderD128", "/dev/dri/renderD129"]
+
+    def decode(self, input_filepath: str, *args: Any, **kwargs: Any) -> str:
+        assert self.device is not None
+        with self.lock:
+            self.devices_used[self.device] = self.devices_used.get(self.device, 0) + 1
+        return super().decode(input_filepath, *args, **kwargs)
+
+
+class PinnedDummy(Dummy):
+    """Dummy decoder able to set its number of threads that keeps track of the CPUs it is pinned to"""
+
+    name = "PinnedDummy"
+    thread_count = 1
+    lock = threading.Lock()
+    pinned: List[tuple[Optional[List[int]], Optional[int]]] = []
+
+    def decode(self, input_filepath: str, *args: Any, **kwargs: Any) -> str:
+        with self.lock:
+            self.pinned.append((self.cpus, self.thread_count))
+        return super().decode(input_filepath, *args, **kwargs)
+
+
+class OversizedDummy(Dummy):
+    """Dummy decoder writing an output far bigger than its input"""
+
+    name = "OversizedDummy"
+
+    def decode(self, input_filepath: str, output_filepath: str, *args: Any, **kwargs: Any) -> str:
+        run_command(["sh", "-c", f"exec head -c 2097152 /dev/zero > {output_filepath}"])
+        return file_checksum(output_filepath)
+
+
+class CopyDummy(Dummy):
+    """Dummy decoder copying its input to the output, written in order"""
+
+    name = "CopyDummy"
+    sequential_output = True
+
+    def decode(self, input_filepath: str, output_filepath: str, *args: Any, **kwargs: Any) -> str:
+        run_command(["sh", "-c", f"cat {input_filepath} > {output_filepath}"])
+        return file_checksum(output_filepath)
+
+
+class StagedDummy(Dummy):
+    """Dummy decoder that keeps track of the tests in every stage of the pipeline engine"""
+
+    name = "StagedDummy"
+    lock = threading.Lock()
+    running: Dict[str, int] = {}
+    max_running: Dict[str, int] = {}
+
+    def _track(self, stage: str, count: int) -> None:
+        with self.lock:
+            self.running[stage] = self.running.get(stage, 0) + count
+            self.max_running[stage] = max(self.max_running.get(stage, 0), self.running[stage])
+
+    def decode(self, input_filepath: str, *args: Any, **kwargs: Any) -> str:
+        self._track("tests", 1)
+        for stage in (DECODE_STAGE, VERIFY_STAGE):
+            with pipeline_stage(stage):
+                self._track(stage, 1)
+                time.sleep(0.05)
+                self._track(stage, -1)
+        self._track("tests", -1)
+        return super().decode(input_filepath, *args, **kwargs)
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.resources_dir = os.path.join(self._tmp.name, "resources")
+        self.output_dir = os.path.join(self._tmp.name, "output")
+        SlowDummy.max_running.clear()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _create_test_suite(self, name: str, vectors: int, failing: int = -1) -> TestSuite:
+        test_vectors = {}
+        for i in range(vectors):
+            vector_name = f"{name}_{i}"
+            input_dir = os.path.join(self.resources_dir, name, vector_name)
+            os.makedirs(input_dir, exist_ok=True)
+            input_file = os.path.join(input_dir, "input.bit")
+            with open(input_file, "w") as f:
+                f.write(vector_name * (i + 1))
+            result = "0" * 32 if i == failing else file_checksum(input_file)
+            test_vectors[vector_name] = TestVector(vector_name, "", "", "input.bit", OutputFormat.YUV420P, result)
+        return TestSuite(f"{name}.json", self.resources_dir, name, Codec.DUMMY, "", test_vectors)
+
+    def _create_av1_test_suite(self, name: str, annexb: bool) -> TestSuite:
+        suite = self._create_test_suite(name, 2)
+        suite.codec = Codec.AV1
+        for test_vector in suite.test_vectors.values():
+            test_vector.result = "0" * 32
+            test_vector.optional_params = {"annexb": True} if annexb else None
+        return suite
+
+    def _prepare(
+        self, test_suite: TestSuite, decoder: Optional[Decoder] = None, result_cache: Optional[cache.ResultCache] = None
+    ) -> tuple[TestSuite, List[test.Test]]:
+        ctx = Context(1, decoder or Dummy(), 30, False, True, self.output_dir, cache=result_cache)
+        with contextlib.redirect_stdout(io.StringIO()):
+            prepared = test_suite.prepare(ctx)
+        assert prepared is not None
+        return prepared
+
+    def test_run_several_suites(self) -> None:
+        for engine in Engine:
+            with self.subTest(engine=engine.value):
+                self._run_several_suites(engine)
+
+    def _run_several_suites(self, engine: Engine) -> None:
+        scheduler = Scheduler(2, engine=engine.value)
+        suite_runs = [
+            scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4, failing=1))),
+            scheduler.add(*self._prepare(self._create_test_suite("suiteB", 3))),
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual([4, 3], [len(suite_run.results) for suite_run in suite_runs])
+        failed = [tv.name for tv in suite_runs[0].results if tv.test_result == TestVectorResult.FAIL]
+        self.assertEqual(["suiteA_1"], failed)
+        errors = [tv.errors for tv in suite_runs[0].results if tv.errors]
+        self.assertEqual("suiteA_1 (Dummy.suiteA.suiteA_1)", errors[0][0][0])
+        self.assertTrue(all(tv.test_result == TestVectorResult.SUCCESS for tv in suite_runs[1].results))
+        self.assertTrue(all(suite_run.time_taken > 0 for suite_run in suite_runs))
+
+    def test_decode_time(self) -> None:
+        # With a single job the tests of every suite wait for the ones of the other
+        scheduler = Scheduler(1, engine=Engine.THREADS.value)
+        suite_runs = [
+            scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4), SlowDummy())),
+            scheduler.add(*self._prepare(self._create_test_suite("suiteB", 3), SlowDummy())),
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        for suite_run, tests in zip(suite_runs, (4, 3)):
+            self.assertGreaterEqual(suite_run.decode_time, 0.05 * tests)
+            self.assertLessEqual(suite_run.decode_time, suite_run.time_taken)
+        wall_time = max(run.end_time or 0.0 for run in suite_runs) - min(run.start_time or 0.0 for run in suite_runs)
+        self.assertLessEqual(sum(suite_run.decode_time for suite_run in suite_runs), wall_time)
+
+    def test_run_test_suite(self) -> None:
+        ctx = Context(2, Dummy(), 30, False, True, self.output_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            test_suite = self._create_test_suite("suiteA", 3, failing=2).run(ctx)
+        assert test_suite is not None
+
+        self.assertEqual(2, test_suite.test_vectors_success)
+        self.assertEqual(TestVectorResult.FAIL, test_suite.test_vectors["suiteA_2"].test_result)
+        self.assertFalse(os.path.exists(ctx.output_dir))
+
+    def test_failfast_stops_pending_tests(self) -> None:
+        scheduler = Scheduler(1, failfast=True)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 6, failing=0)))
+        scheduler.add(*self._prepare(self._create_test_suite("suiteB", 3)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual(1, len(suite_run.results))
+        self.assertEqual(1, sum(len(run.results) for run in scheduler.suite_runs))
+
+    def test_longest_tests_first(self) -> None:
+        history_file = os.path.join(self._tmp.name, "history.json")
+        test_suite = self._create_test_suite("suiteA", 4)
+
+        # Without previous decode times, the bigger inputs go first
+        scheduler = Scheduler(1, history=history.TestHistory(history_file))
+        suite_run = scheduler.add(*self._prepare(test_suite))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        self.assertEqual(["suiteA_3", "suiteA_2", "suiteA_1", "suiteA_0"], [tv.name for tv in suite_run.results])
+        assert scheduler.history is not None
+        scheduler.history.save()
+
+        test_history = history.TestHistory(history_file)
+        self.assertEqual(4, len(test_history.decoders["Dummy"]))
+        test_history.decoders["Dummy"]["suiteA/suiteA_0"]["time"] = 100.0
+        scheduler = Scheduler(1, history=test_history)
+        suite_run = scheduler.add(*self._prepare(test_suite))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        self.assertEqual("suiteA_0", suite_run.results[0].name)
+
+    def test_failed_first(self) -> None:
+        failed_first = {("suiteA", "Dummy", "suiteA_0"), ("suiteA", "Dummy", "suiteA_2")}
+        test_history = history.TestHistory(os.path.join(self._tmp.name, "history.json"))
+        scheduler = Scheduler(1, history=test_history, failed_first=failed_first)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        # The failed ones still go from the most to the least expensive
+        self.assertEqual(["suiteA_2", "suiteA_0", "suiteA_3", "suiteA_1"], [tv.name for tv in suite_run.results])
+
+    def test_priority(self) -> None:
+        scheduler = Scheduler(1)
+        low = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 3)))
+        high = scheduler.add(*self._prepare(self._create_test_suite("suiteB", 3)), priority=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        assert high.end_time is not None and low.start_time is not None
+        self.assertLessEqual(high.end_time, low.start_time)
+
+    def test_add_while_serving(self) -> None:
+        scheduler = Scheduler(2, engine=Engine.THREADS.value)
+        thread = threading.Thread(target=scheduler.serve, daemon=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4, failing=1)))
+            deadline = time.monotonic() + 10
+            while not suite_run.finished and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(thread.is_alive())
+            scheduler.close()
+            thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(4, len(suite_run.results))
+        scheduler.remove(suite_run)
+        self.assertEqual([], scheduler.suite_runs)
+
+    def test_adaptive_timeout(self) -> None:
+        test_history = history.TestHistory(os.path.join(self._tmp.name, "history.json"))
+        _, tests = self._prepare(self._create_test_suite("suiteA", 2))
+        test_history.decoders["Dummy"] = {"suiteA/suiteA_1": {"time": 20.5, "input_size": 2**30}}
+
+        timeouts = [history.TestHistory.adaptive_timeout(test_history.estimate(test), 4) for test in tests]
+        # Tiny inputs never run before only get the minimum, the slow ones a multiple of their decode time
+        self.assertEqual([history.MIN_ADAPTIVE_TIMEOUT, 82], timeouts)
+
+    def test_pipeline_stages(self) -> None:
+        scheduler = Scheduler(1, engine=Engine.PIPELINE.value, verify_jobs=2)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 6), StagedDummy()))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual(6, len(suite_run.results))
+        # A single decoder runs at a time, while the outputs of the previous ones are verified
+        self.assertEqual(1, StagedDummy.max_running[DECODE_STAGE])
+        self.assertLessEqual(StagedDummy.max_running[VERIFY_STAGE], 2)
+        self.assertGreater(StagedDummy.max_running["tests"], 1)
+        # The waits for a free slot are not part of the decode time
+        self.assertTrue(all(test_vector.test_time < 0.5 for test_vector in suite_run.results))
+
+    def test_hardware_decoders_limit(self) -> None:
+        scheduler = Scheduler(4, engine=Engine.THREADS.value, hw_jobs=1)
+        suite_runs = [
+            scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4), SlowHWDummy())),
+            scheduler.add(*self._prepare(self._create_test_suite("suiteB", 6), SlowDummy())),
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual([4, 6], [len(suite_run.results) for suite_run in suite_runs])
+        self.assertEqual(1, SlowDummy.max_running[ConcurrencyClass.HARDWARE])
+        # Software decoders keep using the rest of the jobs
+        self.assertGreaterEqual(SlowDummy.max_running[ConcurrencyClass.SOFTWARE], 3)
+
+    def test_hardware_decoders_default_device(self) -> None:
+        # Decoders not telling their devices don't share the budget of the default one
+        scheduler = Scheduler(4, engine=Engine.THREADS.value, hw_jobs=1)
+        suite_runs = [
+            scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4), SlowHWDummy())),
+            scheduler.add(*self._prepare(self._create_test_suite("suiteB", 4), OtherHWDummy())),
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual([4, 4], [len(suite_run.results) for suite_run in suite_runs])
+        self.assertEqual(2, SlowDummy.max_running[ConcurrencyClass.HARDWARE])
+
+    def test_hardware_decoders_devices(self) -> None:
+        scheduler = Scheduler(4, engine=Engine.THREADS.value, hw_jobs=1)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 6), MultiDeviceHWDummy()))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual(6, len(suite_run.results))
+        self.assertEqual({"/dev/dri/renderD128": 3, "/dev/dri/renderD129": 3}, MultiDeviceHWDummy.devices_used)
+        self.assertEqual(2, SlowDummy.max_running[ConcurrencyClass.HARDWARE])
+
+    @unittest.skipUnless(affinity.is_affinity_available(), "CPU affinity not available")
+    def test_cpu_affinity(self) -> None:
+        PinnedDummy.pinned.clear()
+        scheduler = Scheduler(2, engine=Engine.THREADS.value, cpu_affinity=True)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 6), PinnedDummy()))
+        nodes = [[0, 1, 2, 3], [4, 5, 6, 7]]
+        with mock.patch.object(affinity, "numa_nodes", return_value=nodes), contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual(6, len(suite_run.results))
+        # Every job gets a node of its own and runs as many threads as CPUs
+        self.assertEqual(6, len(PinnedDummy.pinned))
+        self.assertLessEqual(
+            {(tuple(cpus or []), threads) for cpus, threads in PinnedDummy.pinned},
+            {
+                ((0, 1, 2, 3), 4),
+                ((4, 5, 6, 7), 4),
+            },
+        )
+
+    @unittest.skipUnless(affinity.is_affinity_available(), "CPU affinity not available")
+    def test_cpu_affinity_pipeline(self) -> None:
+        # The CPUs are split among the decoding jobs only, the tests verifying their output don't hold any
+        PinnedDummy.pinned.clear()
+        scheduler = Scheduler(2, engine=Engine.PIPELINE.value, cpu_affinity=True, verify_jobs=2)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 6), PinnedDummy()))
+        nodes = [[0, 1, 2, 3], [4, 5, 6, 7]]
+        with mock.patch.object(affinity, "numa_nodes", return_value=nodes), contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual(6, len(suite_run.results))
+        self.assertEqual([(None, 4)] * 6, PinnedDummy.pinned)
+
+    def test_annexb_per_test_vector(self) -> None:
+        decoder = AV1AOMDecoder()
+        commands: List[List[str]] = []
+        scheduler = Scheduler(2, engine=Engine.THREADS.value)
+        with mock.patch.object(AV1AOMDecoder, "check", return_value=True), mock.patch.object(
+            av1_aom, "run_command", side_effect=lambda cmd, **kwargs: commands.append(cmd)
+        ), mock.patch.object(av1_aom, "file_checksum", return_value="0" * 32):
+            suite_runs = [
+                scheduler.add(*self._prepare(self._create_av1_test_suite("AV1-CORE-ANNEX-B", True), decoder)),
+                scheduler.add(*self._prepare(self._create_av1_test_suite("AV1-NON-ANNEX-B", False), decoder)),
+            ]
+            with contextlib.redirect_stdout(io.StringIO()):
+                scheduler.run()
+
+        # The suites of both formats share the decoder and run at the same time
+        self.assertEqual([2, 2], [len(suite_run.results) for suite_run in suite_runs])
+        annexb = {cmd[-3].split(os.sep)[-3]: "--annexb" in cmd for cmd in commands}
+        self.assertEqual({"AV1-CORE-ANNEX-B": True, "AV1-NON-ANNEX-B": False}, annexb)
+
+    def test_decoders_thread_count(self) -> None:
+        # Pinned decoders run as many threads as CPUs, the rest the default of their binary
+        for module, decoder, option in (
+            (av1_aom, AV1AOMDecoder(), "--threads=2"),
+            (av1_dav1d, AV1Dav1dDecoder(), "--threads 2"),
+            (libvpx, libvpx.VP9Decoder(), "--threads=2"),
+        ):
+            with self.subTest(decoder=decoder.name):
+                commands: List[str] = []
+                with mock.patch.object(
+                    module, "run_command", side_effect=lambda cmd, **kwargs: commands.append(" ".join(cmd))
+                ), mock.patch.object(module, "file_checksum", return_value="0" * 32):
+                    for dec in (decoder, decoder.with_cpus([0, 1])):
+                        dec.decode("input", "output", OutputFormat.YUV420P, 30, False, False)
+                self.assertEqual([False, True], [option in command for command in commands])
+                self.assertNotIn("--threads", commands[0])
+
+    def test_select_shard(self) -> None:
+        tests = [("suiteA", decoder, f"suiteA_{i}") for decoder in ("Dummy", "Other") for i in range(7)]
+        shards = [select_shard(tests, index, 3) for index in (1, 2, 3)]
+
+        # Every test goes to exactly one shard, the same one whatever the order the tests come in
+        self.assertEqual(sorted(tests), sorted(test for shard in shards for test in shard))
+        self.assertEqual(shards[1], select_shard(list(reversed(tests)), 2, 3))
+        self.assertEqual([5, 5, 4], [len(shard) for shard in shards])
+
+    def test_resume_from_journal(self) -> None:
+        journal_file = os.path.join(self._tmp.name, "journal.jsonl")
+        test_suite = self._create_test_suite("suiteA", 4, failing=1)
+        scheduler = Scheduler(1, journal=journal.ResultsJournal(journal_file))
+        scheduler.add(*self._prepare(test_suite))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        assert scheduler.journal is not None
+        scheduler.journal.close()
+
+        # Keep the first two results, as if the run had been killed while writing the third one
+        with open(journal_file) as f:
+            lines = f.readlines()
+        with open(journal_file, "w") as f:
+            f.write("".join(lines[:2]) + lines[2][:10])
+
+        results_journal = journal.ResultsJournal(journal_file, resume=True)
+        test_suite_res, tests = self._prepare(test_suite)
+        restored = [test for test in tests if results_journal.restore(test)]
+        self.assertEqual(2, len(restored))
+        scheduler = Scheduler(1, journal=results_journal)
+        suite_run = scheduler.add(test_suite_res, [test for test in tests if test not in restored], restored)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        results_journal.close()
+
+        self.assertEqual(4, suite_run.tests_count)
+        self.assertEqual([f"suiteA_{i}" for i in range(4)], sorted(tv.name for tv in suite_run.results))
+        failed = [tv for tv in suite_run.results if tv.test_result == TestVectorResult.FAIL]
+        self.assertEqual(["suiteA_1"], [tv.name for tv in failed])
+        self.assertTrue(failed[0].errors)
+        with open(journal_file) as f:
+            self.assertEqual(4, len([line for line in f if line.startswith("{") and line.endswith("}\n")]))
+
+    def test_result_cache(self) -> None:
+        result_cache = cache.ResultCache(os.path.join(self._tmp.name, "cache"))
+        test_suite = self._create_test_suite("suiteA", 4, failing=1)
+        scheduler = Scheduler(2, engine=Engine.THREADS.value)
+        scheduler.add(*self._prepare(test_suite, SlowDummy(), result_cache))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        self.assertIn(ConcurrencyClass.SOFTWARE, SlowDummy.max_running)
+
+        # The same decoder and inputs don't need to be decoded again, and still fail the same way
+        SlowDummy.max_running.clear()
+        scheduler = Scheduler(2, engine=Engine.THREADS.value)
+        suite_run = scheduler.add(*self._prepare(test_suite, SlowDummy(), result_cache))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        self.assertEqual({}, SlowDummy.max_running)
+        self.assertTrue(all(tv.cached for tv in suite_run.results))
+        failed = [tv.name for tv in suite_run.results if tv.test_result == TestVectorResult.FAIL]
+        self.assertEqual(["suiteA_1"], failed)
+
+        # A different input is a different entry
+        test_vector = test_suite.test_vectors["suiteA_0"]
+        self.assertIsNotNone(result_cache.get(SlowDummy(), "suiteA", test_vector))
+        test_vector.source_checksum = "0" * 32
+        self.assertIsNone(result_cache.get(SlowDummy(), "suiteA", test_vector))
+
+        result_cache.max_size = 0
+        self.assertEqual(4, result_cache.evict())
+
+    def test_events(self) -> None:
+        events_file = os.path.join(self._tmp.name, "events.jsonl")
+        event_stream = events.EventStream(events_file)
+        scheduler = Scheduler(2, events=event_stream)
+        scheduler.add(*self._prepare(self._create_test_suite("suiteA", 3, failing=1)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+        event_stream.close()
+
+        with open(events_file) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual("suite_started", lines[0]["event"])
+        self.assertEqual(3, lines[0]["test_vectors"])
+        self.assertEqual(3, len([line for line in lines if line["event"] == "vector_dispatched"]))
+        finished = {line["test_vector"]: line["result"] for line in lines if line["event"] == "vector_finished"}
+        self.assertEqual({"suiteA_0": "Success", "suiteA_1": "Fail", "suiteA_2": "Success"}, finished)
+        self.assertEqual("suite_finished", lines[-1]["event"])
+        self.assertEqual({"Success": 2, "Fail": 1}, lines[-1]["results"])
+        self.assertTrue(all(line["decoder"] == "Dummy" and line["test_suite"] == "suiteA" for line in lines))
+        self.assertEqual(sorted(line["time"] for line in lines), [line["time"] for line in lines])
+
+    @unittest.skipUnless(os.name == "posix", "requires POSIX")
+    def test_resource_limits(self) -> None:
+        ctx = Context(1, OversizedDummy(), 30, False, True, self.output_dir, limits=ResourceLimits(file_size=1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            prepared = self._create_test_suite("suiteA", 2).prepare(ctx)
+        assert prepared is not None
+        scheduler = Scheduler(2)
+        suite_run = scheduler.add(*prepared)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        # Reported apart from the errors of the decoder
+        self.assertEqual(
+            [TestVectorResult.LIMIT_EXCEEDED] * 2, [test_vector.test_result for test_vector in suite_run.results]
+        )
+        self.assertTrue(all("exceeded the file size limit" in str(tv.errors) for tv in suite_run.results))
+
+    @unittest.skipUnless(utils.is_fifo_available(), "requires named pipes")
+    def test_fifo_output(self) -> None:
+        for engine in Engine:
+            with self.subTest(engine=engine.value):
+                ctx = Context(1, CopyDummy(), 30, False, True, self.output_dir, fifo=True)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    prepared = self._create_test_suite(f"suite_{engine.value}", 3, failing=1).prepare(ctx)
+                assert prepared is not None
+                self.assertTrue(all(test.fifo for test in prepared[1]))
+                scheduler = Scheduler(2, engine=engine.value)
+                suite_run = scheduler.add(*prepared)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    scheduler.run()
+
+                results = [test_vector.test_result for test_vector in suite_run.results]
+                self.assertEqual(2, results.count(TestVectorResult.SUCCESS))
+                self.assertEqual(1, results.count(TestVectorResult.FAIL))
+                # The size of the outputs is recorded though nothing was written to the disk
+                self.assertEqual(
+                    {f"suite_{engine.value}_{i}": len(f"suite_{engine.value}_{i}") * (i + 1) for i in range(3)},
+                    {test_vector.name: test_vector.output_size for test_vector in suite_run.results},
+                )
+                self.assertEqual([], [name for _, _, names in os.walk(self.output_dir) for name in names])
+
+    def test_min_free_space(self) -> None:
+        # Without room for more outputs the tests still run, one at a time
+        scheduler = Scheduler(4, engine=Engine.THREADS.value, min_free_space=2**62)
+        suite_run = scheduler.add(*self._prepare(self._create_test_suite("suiteA", 4), SlowDummy()))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run()
+
+        self.assertEqual(4, len(suite_run.results))
+        self.assertEqual(1, SlowDummy.max_running[ConcurrencyClass.SOFTWARE])
+
+
+if __name__ == "__main__":
+    unittest.main()
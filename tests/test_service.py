@@ -0,0 +1,161 @@
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Tuple
+
+from fluster import test
+from fluster.codec import Codec, OutputFormat
+from fluster.decoder import Decoder
+from fluster.decoders.dummy import Dummy
+from fluster.scheduler import Engine, Scheduler
+from fluster.service import Service
+from fluster.test_suite import Context, TestSuite
+from fluster.test_vector import TestVector
+from fluster.utils import file_checksum
+
+
+class StuckDummy(Dummy):
+    """Dummy decoder that doesn't finish until released"""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def decode(self, input_filepath: str, *args: Any, **kwargs: Any) -> str:
+        self.started.set()
+        self.release.wait(10)
+        return super().decode(input_filepath, *args, **kwargs)
+
+
+class TestService(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.decoder: Decoder = Dummy()
+        StuckDummy.started.clear()
+        StuckDummy.release.clear()
+        self.resources_dir = os.path.join(self._tmp.name, "resources")
+        self.output_dir = os.path.join(self._tmp.name, "output")
+        self.test_suites = [self._create_test_suite("suiteA", 4, failing=1), self._create_test_suite("suiteB", 3)]
+
+    def tearDown(self) -> None:
+        StuckDummy.release.set()
+        self._tmp.cleanup()
+
+    def _create_test_suite(self, name: str, vectors: int, failing: int = -1) -> TestSuite:
+        test_vectors = {}
+        for i in range(vectors):
+            vector_name = f"{name}_{i}"
+            input_dir = os.path.join(self.resources_dir, name, vector_name)
+            os.makedirs(input_dir, exist_ok=True)
+            input_file = os.path.join(input_dir, "input.bit")
+            with open(input_file, "w") as f:
+                f.write(vector_name * (i + 1))
+            result = "0" * 32 if i == failing else file_checksum(input_file)
+            test_vectors[vector_name] = TestVector(vector_name, "", "", "input.bit", OutputFormat.YUV420P, result)
+        return TestSuite(f"{name}.json", self.resources_dir, name, Codec.DUMMY, "", test_vectors)
+
+    def _prepare(self, request: Dict[str, Any], output_dir: str) -> List[Tuple[TestSuite, List[test.Test]]]:
+        names = request.get("test_suites", [])
+        unknown = set(names) - {test_suite.name for test_suite in self.test_suites}
+        if unknown:
+            raise ValueError(f"No test suite found for: {', '.join(unknown)}")
+        prepared = []
+        for test_suite in self.test_suites:
+            if test_suite.name in names:
+                ctx = Context(1, self.decoder, 30, False, True, output_dir, test_vectors=request.get("test_vectors"))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    prepared_suite = test_suite.prepare(ctx)
+                if prepared_suite is not None:
+                    prepared.append(prepared_suite)
+        return prepared
+
+    def _post(self, service: Service, request: Any) -> List[Dict[str, Any]]:
+        http_request = urllib.request.Request(
+            f"http://{service.address[0]}:{service.address[1]}/runs", json.dumps(request).encode("utf-8")
+        )
+        with urllib.request.urlopen(http_request, timeout=10) as response:
+            return [json.loads(line) for line in response]
+
+    def test_run_requests(self) -> None:
+        scheduler = Scheduler(2, engine=Engine.THREADS.value)
+        service = Service(("127.0.0.1", 0), scheduler, self.test_suites, [Dummy()], self._prepare, self.output_dir)
+        service.listen()
+        thread = threading.Thread(target=service.run, daemon=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            events = [
+                self._post(service, {"test_suites": ["suiteA"], "priority": 1}),
+                self._post(service, {"test_suites": ["suiteB"], "test_vectors": ["*_2"]}),
+            ]
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                self._post(service, {"test_suites": ["suiteC"]})
+            with urllib.request.urlopen(f"http://127.0.0.1:{service.address[1]}/decoders", timeout=10) as response:
+                decoders = json.load(response)
+            service.close()
+            thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(400, error.exception.code)
+        self.assertEqual([{"name": "Dummy", "codec": "Dummy", "available": True}], decoders)
+        self.assertEqual(["run_queued", "run_finished"], [events[0][0]["event"], events[0][-1]["event"]])
+        self.assertEqual([False, True], [run_events[-1]["success"] for run_events in events])
+        finished = [event["test_vector"] for event in events[1] if event["event"] == "vector_finished"]
+        self.assertEqual(["suiteB_2"], finished)
+        results = [event["results"] for event in events[0] if event["event"] == "suite_finished"]
+        self.assertEqual([{"Success": 3, "Fail": 1}], results)
+        # Nothing is kept from the runs once finished
+        self.assertEqual([], scheduler.suite_runs)
+        self.assertEqual([], os.listdir(self.output_dir))
+
+    def test_client_disconnects(self) -> None:
+        # No event happens while the test is stuck, the client being gone has to be noticed meanwhile
+        self.decoder = StuckDummy()
+        scheduler = Scheduler(1, engine=Engine.THREADS.value)
+        service = Service(("127.0.0.1", 0), scheduler, self.test_suites, [Dummy()], self._prepare, self.output_dir)
+        service.listen()
+        thread = threading.Thread(target=service.run, daemon=True)
+        body = json.dumps({"test_suites": ["suiteA"]}).encode("utf-8")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            thread.start()
+            with socket.create_connection(service.address, timeout=10) as sock:
+                sock.sendall(b"POST /runs HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+                with sock.makefile("rb") as response:
+                    while b"vector_dispatched" not in response.readline():
+                        pass
+            self.assertTrue(StuckDummy.started.wait(5))
+            deadline = time.monotonic() + 5
+            while scheduler.suite_runs and time.monotonic() < deadline:
+                time.sleep(0.05)
+            dropped = not scheduler.suite_runs
+            StuckDummy.release.set()
+            service.close()
+            thread.join(10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(dropped)
+        self.assertIn("The client of run 1 is gone", output.getvalue())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+# Fluster - testing framework for decoders conformance
+# Copyright (C) 2026, Fluendo, S.A.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3
+# of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from typing import List
+
+from fluster import utils
+
+
+def is_running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Killed children of killed processes stay as zombies until reaped by init
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+# Starts a child that outlives the command unless killed, writing its pid to the file given
+SPAWN_CHILD = (
+    "import subprocess, sys\n"
+    "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+    "open(sys.argv[1], 'w').write(str(child.pid))\n"
+)
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "requires Linux")
+class TestProcessGroups(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.pid_file = os.path.join(self._tmp.name, "child.pid")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _child_pid(self) -> int:
+        with open(self.pid_file) as f:
+            return int(f.read())
+
+    def test_timeout_kills_children(self) -> None:
+        with self.assertRaises(subprocess.TimeoutExpired):
+            command = [sys.executable, "-c", SPAWN_CHILD + "import time; time.sleep(30)", self.pid_file]
+            utils.run_command(command, timeout=1)
+        time.sleep(0.1)
+        self.assertFalse(is_running(self._child_pid()))
+
+    def test_leaked_children_are_killed(self) -> None:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            utils.run_command([sys.executable, "-c", SPAWN_CHILD, self.pid_file])
+        time.sleep(0.1)
+        self.assertFalse(is_running(self._child_pid()))
+        self.assertIn(f"Killed 1 process(es) left running by {sys.executable}", output.getvalue())
+
+    def test_kill_running_commands(self) -> None:
+        errors: List[BaseException] = []
+
+        def _run() -> None:
+            command = [sys.executable, "-c", SPAWN_CHILD + "import time; time.sleep(30)", self.pid_file]
+            try:
+                # Killed by fluster, so not taken as having gone beyond the memory limit
+                with utils.limit_resources(utils.ResourceLimits(memory=1024)):
+                    utils.run_command(command)
+            except subprocess.CalledProcessError as ex:
+                errors.append(ex)
+
+        thread = threading.Thread(target=_run)
+        thread.start()
+        while not os.path.exists(self.pid_file) or not os.path.getsize(self.pid_file):
+            time.sleep(0.05)
+        start = time.monotonic()
+        utils.kill_running_commands()
+        thread.join(5)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(1, len(errors))
+        self.assertNotIsInstance(errors[0], utils.LimitExceededError)
+        time.sleep(0.1)
+        self.assertFalse(is_running(self._child_pid()))
+
+
+@unittest.skipUnless(os.name == "posix", "requires POSIX")
+class TestResourceLimits(unittest.TestCase):
+    def _run_limited(self, limits: utils.ResourceLimits, command: List[str]) -> None:
+        with utils.limit_resources(limits):
+            utils.run_command(command, check=False)
+
+    def test_limits(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Python ignores SIGXFSZ, unlike the decoders
+            write = ["sh", "-c", f"exec head -c 2097152 /dev/zero > {os.path.join(tmp, 'output')}"]
+            # Killed by the hard limit instead
+            ignore_sigxcpu = "import signal\nsignal.signal(signal.SIGXCPU, signal.SIG_IGN)\nwhile True: pass"
+            out_of_memory = "import errno, sys\ntry: bytearray(512 * 2**20)\nexcept MemoryError: sys.exit(errno.ENOMEM)"
+            kill = "import os, signal; os.kill(os.getpid(), signal.SIGKILL)"
+            cases = [
+                (utils.ResourceLimits(file_size=1), write, "file size"),
+                (utils.ResourceLimits(cpu_time=1), [sys.executable, "-c", "while True: pass"], "CPU time"),
+                (utils.ResourceLimits(cpu_time=1), [sys.executable, "-c", ignore_sigxcpu], "CPU time"),
+                (utils.ResourceLimits(memory=256), [sys.executable, "-c", out_of_memory], "memory"),
+                (utils.ResourceLimits(memory=256), [sys.executable, "-c", kill], "memory"),
+            ]
+            for limits, command, limit in cases:
+                with self.subTest(limit=limit):
+                    with self.assertRaises(utils.LimitExceededError) as context:
+                        self._run_limited(limits, command)
+                    self.assertIn(f"exceeded the {limit}", str(context.exception))
+            # Commands that stay within their limits, or fail for other reasons, are not affected
+            limits = utils.ResourceLimits(memory=256, cpu_time=5, file_size=1)
+            for code in (
+                "import sys; sys.exit(1)",
+                "import sys; sys.exit(137)",
+                "import os; os.abort()",
+                "import sys; sys.exit('failed to allocate the frame: out of memory')",
+            ):
+                self._run_limited(limits, [sys.executable, "-c", code])
+            # Killed before using up its CPU time, without a memory limit
+            self._run_limited(utils.ResourceLimits(cpu_time=5), [sys.executable, "-c", kill])
+
+
+class TestFileFingerprint(unittest.TestCase):
+    def test_file_fingerprint(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            binary = os.path.join(tmp, "decoder")
+            with open(binary, "w") as f:
+                f.write("v1")
+            link = os.path.join(tmp, "decoder-link")
+            os.symlink(binary, link)
+
+            fingerprint = utils.file_fingerprint(link)
+            self.assertTrue(fingerprint.startswith(f"{os.path.realpath(binary)}:2:"))
+            self.assertEqual(fingerprint, utils.file_fingerprint(binary))
+
+            with open(binary, "w") as f:
+                f.write("v2")
+            os.utime(binary, ns=(0, 0))
+            self.assertNotEqual(fingerprint, utils.file_fingerprint(binary))
+            self.assertTrue(utils.file_fingerprint(binary).endswith(utils.file_checksum(binary)))
+
+
+@unittest.skipUnless(utils.is_fifo_available(), "requires named pipes")
+class TestFifoOutput(unittest.TestCase):
+    def test_fifo_output(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "output")
+            with open(output_file, "w") as f:
+                f.write("leftover of a previous run")
+            # Decoders opening the output more than once, as well as those that never write it
+            write = "import sys\nfor chunk in sys.argv[2:]:\n    open(sys.argv[1], 'w').write(chunk * 100000)"
+            cases = [(["a", "b"], "a" * 100000 + "b" * 100000), ([], "")]
+            for chunks, data in cases:
+                with self.subTest(chunks=chunks):
+                    with utils.fifo_output(output_file):
+                        utils.run_command([sys.executable, "-c", write, output_file, *chunks], timeout=20)
+                        checksum = utils.file_checksum(output_file)
+                    self.assertEqual(hashlib.md5(data.encode()).hexdigest(), checksum)
+                    self.assertEqual([], os.listdir(tmp))
+
+            # Released when the decoder fails without opening it, and a file again afterwards
+            with self.assertRaises(subprocess.CalledProcessError):
+                with utils.fifo_output(output_file):
+                    utils.run_command([sys.executable, "-c", "import sys; sys.exit(1)"])
+            with utils.fifo_output(None):
+                with open(output_file, "w") as f:
+                    f.write("a")
+            self.assertEqual(hashlib.md5(b"a").hexdigest(), utils.file_checksum(output_file))
+
+
+class TestProgressWatchdog(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self._tmp.name, "output")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _run(self, code: str) -> None:
+        with utils.watch_progress(utils.ProgressWatchdog(1, [self.output_file])):
+            utils.run_command([sys.executable, "-c", code], timeout=20)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "requires Linux")
+    def test_watchdog(self) -> None:
+        # Keeps writing to the output for longer than the stall window
+        self._run(
+            f"import time\nwith open({self.output_file!r}, 'w') as f:\n"
+            "    for _ in range(6):\n        f.write('x'); f.flush(); time.sleep(0.5)"
+        )
+
+        # Deadlocked along with its children
+        pid_file = os.path.join(self._tmp.name, "child.pid")
+        start = time.monotonic()
+        with self.assertRaises(utils.StalledError):
+            self._run(
+                "import subprocess, sys, time\n"
+                "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+                f"open({pid_file!r}, 'w').write(str(child.pid))\ntime.sleep(30)"
+            )
+        self.assertLess(time.monotonic() - start, 5)
+        with open(pid_file) as f:
+            child_pid = int(f.read())
+        time.sleep(0.1)
+        self.assertFalse(is_running(child_pid))
+
+        start = time.monotonic()
+        with self.assertRaises(utils.FatalOutputError) as ctx:
+            self._run("import sys, time\nsys.stderr.write('i915: GPU hang detected\\n'); time.sleep(30)")
+        self.assertEqual("i915: GPU hang detected", ctx.exception.stderr)
+        self.assertLess(time.monotonic() - start, 5)
+
+        # A crash is told by the signal and not swallowed when the command may fail
+        with utils.watch_progress(utils.ProgressWatchdog(1, [self.output_file])):
+            with self.assertRaises(utils.FatalOutputError) as ctx:
+                utils.run_command_with_output(
+                    [sys.executable, "-c", "import os, signal; os.kill(os.getpid(), signal.SIGSEGV)"], check=False
+                )
+        self.assertEqual("Segmentation fault", ctx.exception.stderr)
+
+
+@unittest.skipUnless(hasattr(os, "sched_setaffinity"), "CPU affinity not available")
+class TestPinToCpus(unittest.TestCase):
+    def test_pin_to_cpus(self) -> None:
+        cpus = [min(os.sched_getaffinity(0))]
+        command = [sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"]
+        with utils.pin_to_cpus(cpus):
+            output = utils.run_command_with_output(command)
+        # Only the commands are pinned, not the process running them
+        self.assertEqual(str(cpus), output.strip())
+
+    def test_pipeline_stages(self) -> None:
+        # Pinned to the CPUs of the slot of the decode stage taken by the command
+        cpus = [min(os.sched_getaffinity(0))]
+        utils.set_pipeline_stages(utils.PipelineStages(1, 1, [cpus]))
+        try:
+            output = utils.run_command_with_output(
+                [sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"]
+            )
+        finally:
+            utils.set_pipeline_stages(None)
+        self.assertEqual(str(cpus), output.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()